@@ -1,12 +1,16 @@
 from pathlib import Path
 import environ
 
+from core.db_pool import configure_database
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 env = environ.Env(
     DEBUG=(bool, True),
     JWT_ACCESS_TTL_SECONDS=(int, 15 * 60),
     JWT_REFRESH_TTL_SECONDS=(int, 7 * 24 * 60 * 60),
+    JWT_USER_CACHE_TTL_SECONDS=(int, 60),
+    JWT_USER_CACHE_MAX_ENTRIES=(int, 10000),
 )
 environ.Env.read_env(BASE_DIR / ".env")
 
@@ -17,6 +21,9 @@ ALLOWED_HOSTS = env.list("DJANGO_ALLOWED_HOSTS", default=["localhost", "127.0.0.
 
 TEAM_APPS = [s.strip() for s in env("TEAM_APPS", default="team1,team2,team3,team4,team5,team6,team7,team8,team9,team10,team11,team12,team13").split(",") if s.strip()]
 
+# Import each team's urlconf (and views) on the first request to its prefix instead of at startup.
+LAZY_TEAM_URLS = env.bool("LAZY_TEAM_URLS", default=True)
+
 INSTALLED_APPS = [
     "django.contrib.admin",
     "django.contrib.auth",
@@ -35,9 +42,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.middleware.FastVerifyMiddleware",
+
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "core.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
 
@@ -50,6 +59,13 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Opt-in per-request SQL profiling (Server-Timing headers + /api/debug/queries/ for staff).
+QUERY_PROFILER = env.bool("QUERY_PROFILER", default=False)
+QUERY_PROFILER_HISTORY = env.int("QUERY_PROFILER_HISTORY", default=500)
+QUERY_PROFILER_REPEAT_THRESHOLD = env.int("QUERY_PROFILER_REPEAT_THRESHOLD", default=5)
+if QUERY_PROFILER:
+    MIDDLEWARE.insert(MIDDLEWARE.index("core.middleware.FastVerifyMiddleware") + 1, "core.query_profiler.QueryProfilerMiddleware")
+
 ROOT_URLCONF = "app404.urls"
 
 TEMPLATES = [
@@ -69,16 +85,58 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "app404.wsgi.application"
+ASGI_APPLICATION = "app404.asgi.application"
+
+# wsgi or asgi; picks the server in the Dockerfile and the defaults below.
+SERVER_MODE = env("SERVER_MODE", default="wsgi")
+
+# Shared client (core.async_http) for async views that call remote services. Kept per event
+# loop only under ASGI, where the loop lives as long as the worker.
+ASYNC_HTTP_SHARED_CLIENT = env.bool("ASYNC_HTTP_SHARED_CLIENT", default=SERVER_MODE == "asgi")
+ASYNC_HTTP_TIMEOUT_SECONDS = env.float("ASYNC_HTTP_TIMEOUT_SECONDS", default=20.0)
+ASYNC_HTTP_MAX_CONNECTIONS = env.int("ASYNC_HTTP_MAX_CONNECTIONS", default=100)
+ASYNC_HTTP_MAX_KEEPALIVE = env.int("ASYNC_HTTP_MAX_KEEPALIVE", default=20)
+
+# Outbound HTTP (core.http_client): keep-alive pools, bounded retries, per-upstream circuit breakers.
+HTTP_CLIENT_TIMEOUT_SECONDS = env.float("HTTP_CLIENT_TIMEOUT_SECONDS", default=10.0)
+HTTP_CLIENT_POOL_HOSTS = env.int("HTTP_CLIENT_POOL_HOSTS", default=20)
+HTTP_CLIENT_POOL_SIZE = env.int("HTTP_CLIENT_POOL_SIZE", default=10)
+HTTP_CLIENT_MAX_RETRIES = env.int("HTTP_CLIENT_MAX_RETRIES", default=2)
+HTTP_CLIENT_BACKOFF_SECONDS = env.float("HTTP_CLIENT_BACKOFF_SECONDS", default=0.2)
+HTTP_CLIENT_BACKOFF_MAX_SECONDS = env.float("HTTP_CLIENT_BACKOFF_MAX_SECONDS", default=2.0)
+HTTP_CLIENT_BREAKER_THRESHOLD = env.int("HTTP_CLIENT_BREAKER_THRESHOLD", default=5)
+HTTP_CLIENT_BREAKER_RESET_SECONDS = env.float("HTTP_CLIENT_BREAKER_RESET_SECONDS", default=30.0)
+HTTP_CLIENT_LATENCY_HISTORY = env.int("HTTP_CLIENT_LATENCY_HISTORY", default=200)
+
+# Persistent connections per alias; override per alias with e.g. TEAM4_DATABASE_CONN_MAX_AGE.
+# Under ASGI only 0 is accepted (core.db_pool).
+DB_CONN_MAX_AGE = env.int("DB_CONN_MAX_AGE", default=0 if SERVER_MODE == "asgi" else 60)
+DB_CONN_HEALTH_CHECKS = env.bool("DB_CONN_HEALTH_CHECKS", default=True)
+DB_POOL_MIN_SIZE = env.int("DB_POOL_MIN_SIZE", default=0)
+DB_POOL_MAX_SIZE = env.int("DB_POOL_MAX_SIZE", default=0)
+
+
+def _database(key, default_url):
+    prefix = key.removesuffix("_URL")
+    return configure_database(
+        env.db(key, default=default_url),
+        max_age=env.int(f"{prefix}_CONN_MAX_AGE", default=DB_CONN_MAX_AGE),
+        health_checks=DB_CONN_HEALTH_CHECKS,
+        pool_min=DB_POOL_MIN_SIZE,
+        pool_max=env.int(f"{prefix}_POOL_MAX_SIZE", default=DB_POOL_MAX_SIZE),
+        asgi=SERVER_MODE == "asgi",
+    )
+
 
 DATABASES = {
-    "default": env.db("DATABASE_URL", default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}")
+    "default": _database("DATABASE_URL", f"sqlite:///{BASE_DIR / 'db.sqlite3'}")
 }
 
 for t in TEAM_APPS:
     key = f"{t.upper()}_DATABASE_URL"
 
     default_url = f"sqlite:///{BASE_DIR / t / (t + '.sqlite3')}"
-    DATABASES[t] = env.db(key, default=default_url)
+    DATABASES[t] = _database(key, default_url)
 
 DATABASE_ROUTERS = ["core.db_router.TeamPerAppRouter"]
 
@@ -109,6 +167,15 @@ JWT_ALGORITHM = "HS256"
 JWT_ACCESS_TTL_SECONDS = env("JWT_ACCESS_TTL_SECONDS")
 JWT_REFRESH_TTL_SECONDS = env("JWT_REFRESH_TTL_SECONDS")
 
+# Per-process cache of users resolved from access tokens (0 disables it).
+JWT_USER_CACHE_TTL_SECONDS = env("JWT_USER_CACHE_TTL_SECONDS")
+JWT_USER_CACHE_MAX_ENTRIES = env("JWT_USER_CACHE_MAX_ENTRIES")
+# Compact records served by core.users.get_users / /api/users/ (dropped whenever a user is saved).
+USER_RECORD_CACHE_TTL_SECONDS = env.int("USER_RECORD_CACHE_TTL_SECONDS", default=600)
+
+# Paths answered by core.middleware.FastVerifyMiddleware (gateway auth_request).
+JWT_FAST_VERIFY_PATHS = env.list("JWT_FAST_VERIFY_PATHS", default=["/api/auth/verify/"])
+
 JWT_COOKIE_SECURE = env.bool("JWT_COOKIE_SECURE", default=False)
 JWT_COOKIE_SAMESITE = env("JWT_COOKIE_SAMESITE", default="Lax")
 
@@ -125,6 +192,33 @@ else:
 
 CSRF_TRUSTED_ORIGINS = env.list("CSRF_TRUSTED_ORIGINS", default=[])
 
+# Two-tier cache (core.cache): "default" is a per-process LRU in front of "shared".
+# CACHE_URL=redis://... makes "shared" Redis; anything else (the default) keeps it in-process.
+CACHE_URL = env("CACHE_URL", default="locmem://")
+CACHES = {
+    "default": {
+        "BACKEND": "core.cache.TieredCache",
+        "LOCATION": "app404-local",
+        "TIMEOUT": env.int("CACHE_DEFAULT_TIMEOUT", default=300),
+        "OPTIONS": {
+            "REMOTE": "shared",
+            "LOCAL_TIMEOUT": env.float("CACHE_LOCAL_TIMEOUT", default=5.0),
+            "LOCAL_MAX_ENTRIES": env.int("CACHE_LOCAL_MAX_ENTRIES", default=1000),
+        },
+    },
+    "shared": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+            "KEY_PREFIX": "app404",
+            "TIMEOUT": env.int("CACHE_DEFAULT_TIMEOUT", default=300),
+            "OPTIONS": {"socket_connect_timeout": 0.5, "socket_timeout": 0.5},
+        }
+        if CACHE_URL.startswith(("redis://", "rediss://", "unix://"))
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "app404-shared"}
+    ),
+}
+
 CELERY_BROKER_URL = env("CELERY_BROKER_URL", default="redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = env("CELERY_RESULT_BACKEND", default="redis://localhost:6379/0")
 CELERY_ACCEPT_CONTENT = ['json']
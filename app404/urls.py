@@ -19,6 +19,7 @@ from django.urls import path, include
 from django.conf import settings
 from core.web_views import home
 from core.web_auth_views import login_page, signup_page, logout_page
+from core.lazy_urls import lazy_include
 
 urlpatterns = [
     path("", home, name="home"),
@@ -33,6 +34,10 @@ urlpatterns = [
 
 
 for app in settings.TEAM_APPS:
-    urlpatterns.append(path(f"{app}/", include(f"{app}.urls")))
+    if settings.LAZY_TEAM_URLS:
+        urlpatterns.append(lazy_include(f"{app}/", f"{app}.urls"))
+    else:
+        urlpatterns.append(path(f"{app}/", include(f"{app}.urls")))
+
 
 
@@ -2,6 +2,8 @@ from django.contrib import admin
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
 
+from core.user_cache import invalidate_user
+
 User = get_user_model()
 
 @admin.register(User)
@@ -26,4 +28,17 @@ class UserAdmin(DjangoUserAdmin):
         }),
     )
 
-    username_field = "email"
\ No newline at end of file
+    username_field = "email"
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_user(obj.pk)
+
+    def delete_model(self, request, obj):
+        invalidate_user(obj.pk)
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        for pk in queryset.values_list("pk", flat=True):
+            invalidate_user(pk)
+        super().delete_queryset(request, queryset)
@@ -0,0 +1,56 @@
+"""
+Shared async HTTP client for views that call remote services (Neshan, IP geolocation, ...).
+
+Under an ASGI server each worker runs a single event loop, so one client per loop keeps
+connections to every upstream alive across requests, and a slow upstream only parks the
+coroutine awaiting it. Under WSGI, Django runs each async view in its own short-lived loop,
+so a per-loop client would never be reused nor closed: there (ASYNC_HTTP_SHARED_CLIENT off,
+the default unless SERVER_MODE=asgi) client() opens a client for the block and closes it.
+
+    async with async_http.client() as client:
+        response = await client.get(url)
+"""
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+
+import httpx
+from django.conf import settings
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=settings.ASYNC_HTTP_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_connections=settings.ASYNC_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.ASYNC_HTTP_MAX_KEEPALIVE,
+        ),
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the client bound to the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = _new_client()
+    return client
+
+
+@asynccontextmanager
+async def client():
+    """The loop's shared client under ASGI; otherwise a client closed when the block exits."""
+    if settings.ASYNC_HTTP_SHARED_CLIENT:
+        yield get_client()
+        return
+    async with _new_client() as own:
+        yield own
+
+
+async def aclose():
+    """Close the running loop's client (tests, shutdown hooks)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,305 @@
+"""
+Two-tier cache and a memoize decorator for service-layer reads.
+
+CACHES["default"] is a TieredCache: a small per-process LRU in front of CACHES["shared"]
+(Redis when CACHE_URL points at one, LocMemCache otherwise, e.g. in tests). Local copies live
+at most LOCAL_TIMEOUT seconds, which bounds how long another process can serve a value after
+it was changed or invalidated elsewhere; the process doing the invalidation sees it at once.
+If the shared tier is unreachable, reads miss and writes are dropped rather than failing the
+request.
+
+    from core.cache import memoize, invalidate_tags
+
+    @memoize(timeout=600, tags=lambda facility_id: [f"team4:facility:{facility_id}"])
+    def facility_summary(facility_id): ...
+
+    invalidate_tags("team4:facility:42")
+
+Memoized arguments must have a stable repr (ids, strings, numbers, tuples of those).
+tag_version() exposes a tag's version for callers that key their own entries on it (ETags,
+in-process indexes), and invalidate_tags_on_change() invalidates tags whenever instances of
+given models are saved or deleted.
+"""
+import hashlib
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+try:
+    from redis import RedisError
+except ImportError:  # redis is only needed when the shared tier is Redis
+    RedisError = OSError
+
+logger = logging.getLogger(__name__)
+
+_REMOTE_ERRORS = (RedisError, OSError)
+_MISSING = object()
+
+# Django builds cache backends per thread; the local tier is shared per process, by LOCATION.
+_local_tiers_lock = threading.Lock()
+_local_tiers: "dict[str, _LocalLRU]" = {}
+
+
+class _LocalLRU:
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, tuple[float, bytes]]" = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, blob = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+        return pickle.loads(blob)
+
+    def set(self, key, value, ttl):
+        if ttl <= 0 or self.max_entries <= 0:
+            self.delete(key)
+            return
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, blob)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TieredCache(BaseCache):
+    """
+    Cache backend: per-process LRU over another configured cache.
+
+    LOCATION names the per-process tier. OPTIONS: REMOTE (alias of the shared cache, default
+    "shared"), LOCAL_TIMEOUT (seconds a value may be served locally, default 5) and
+    LOCAL_MAX_ENTRIES (default 1000).
+    Keys, prefixes and versions are handled by the shared cache.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._remote_alias = options.get("REMOTE", "shared")
+        self._local_timeout = float(options.get("LOCAL_TIMEOUT", 5))
+        with _local_tiers_lock:
+            self._local = _local_tiers.get(location)
+            if self._local is None:
+                self._local = _local_tiers[location] = _LocalLRU(int(options.get("LOCAL_MAX_ENTRIES", 1000)))
+
+    @property
+    def remote(self):
+        return caches[self._remote_alias]
+
+    def _local_key(self, key, version):
+        return self.remote.make_and_validate_key(key, version=version)
+
+    def _local_ttl(self, timeout):
+        return self._local_timeout if timeout is None else min(self._local_timeout, timeout)
+
+    def get(self, key, default=None, version=None):
+        local_key = self._local_key(key, version)
+        value = self._local.get(local_key)
+        if value is not _MISSING:
+            return value
+        try:
+            value = self.remote.get(key, _MISSING, version=version)
+        except _REMOTE_ERRORS as e:
+            logger.warning("shared cache get failed: %s", e)
+            return default
+        if value is _MISSING:
+            return default
+        self._local.set(local_key, value, self._local_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        found, remote_keys = {}, []
+        for key in keys:
+            value = self._local.get(self._local_key(key, version))
+            if value is _MISSING:
+                remote_keys.append(key)
+            else:
+                found[key] = value
+        if remote_keys:
+            try:
+                fetched = self.remote.get_many(remote_keys, version=version)
+            except _REMOTE_ERRORS as e:
+                logger.warning("shared cache get_many failed: %s", e)
+                fetched = {}
+            for key, value in fetched.items():
+                self._local.set(self._local_key(key, version), value, self._local_timeout)
+            found.update(fetched)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        self._local.set(self._local_key(key, version), value, self._local_ttl(timeout))
+        try:
+            self.remote.set(key, value, timeout, version=version)
+        except _REMOTE_ERRORS as e:
+            logger.warning("shared cache set failed: %s", e)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        for key, value in data.items():
+            self.set(key, value, timeout, version=version)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        try:
+            added = self.remote.add(key, value, timeout, version=version)
+        except _REMOTE_ERRORS as e:
+            logger.warning("shared cache add failed: %s", e)
+            return False
+        if added:
+            self._local.set(self._local_key(key, version), value, self._local_ttl(timeout))
+        return added
+
+    def delete(self, key, version=None):
+        self._local.delete(self._local_key(key, version))
+        try:
+            return self.remote.delete(key, version=version)
+        except _REMOTE_ERRORS as e:
+            logger.warning("shared cache delete failed: %s", e)
+            return False
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.delete(key, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        try:
+            return self.remote.touch(key, timeout, version=version)
+        except _REMOTE_ERRORS as e:
+            logger.warning("shared cache touch failed: %s", e)
+            return False
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version=version) is not _MISSING
+
+    def incr(self, key, delta=1, version=None):
+        self._local.delete(self._local_key(key, version))
+        return self.remote.incr(key, delta, version=version)
+
+    def clear(self):
+        self._local.clear()
+        self.remote.clear()
+
+    def clear_local(self):
+        """Drop this process's copies only (tests, after bulk changes made by another process)."""
+        self._local.clear()
+
+    def close(self, **kwargs):
+        self.remote.close(**kwargs)
+
+
+def _tag_key(tag):
+    return f"tag:{tag}"
+
+
+def _tag_versions(cache, tags):
+    if not tags:
+        return ()
+    keys = [_tag_key(t) for t in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # A timestamp rather than a counter: if the version key is ever evicted, entries
+            # memoized under the old version cannot be revived by restarting at 1.
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key, 0)
+    return tuple(versions[k] for k in keys)
+
+
+def tag_version(tag, cache_alias="default"):
+    """Current version of `tag`; it changes whenever the tag is invalidated."""
+    return _tag_versions(caches[cache_alias], [tag])[0]
+
+
+def invalidate_tags(*tags, cache_alias="default"):
+    """Make every value memoized under any of `tags` stale."""
+    cache = caches[cache_alias]
+    for tag in tags:
+        cache.set(_tag_key(tag), time.time_ns(), None)
+
+
+def invalidate_tags_on_change(models, tags_for, dispatch_uid, cache_alias="default"):
+    """
+    Invalidate tags_for(model) whenever an instance of one of `models` is saved or deleted:
+    at once, and again when the transaction commits, since a value rebuilt in between was
+    read from the pre-commit rows.
+    """
+
+    def on_change(sender, using=None, **kwargs):
+        tags = list(tags_for(sender))
+        if not tags:
+            return
+        invalidate_tags(*tags, cache_alias=cache_alias)
+        transaction.on_commit(lambda: invalidate_tags(*tags, cache_alias=cache_alias), using=using)
+
+    for model in models:
+        uid = f"{dispatch_uid}_{model._meta.label_lower}"
+        post_save.connect(on_change, sender=model, weak=False, dispatch_uid=f"{uid}_save")
+        post_delete.connect(on_change, sender=model, weak=False, dispatch_uid=f"{uid}_delete")
+
+
+def memoize(timeout=300, tags=(), cache_alias="default", key=None):
+    """
+    Cache a function's results by its arguments for `timeout` seconds.
+
+    `tags` is a list of strings or a callable taking the function's arguments and returning
+    one; invalidate_tags(tag) expires every result stored under it. `key`, a callable taking
+    the same arguments, picks the ones that identify the result (e.g. to leave out a
+    callback); by default all of them do. The wrapper gains `.invalidate(*args, **kwargs)`
+    to drop one result.
+    """
+
+    def decorator(func):
+        prefix = f"memo:{func.__module__}.{func.__qualname__}"
+
+        def make_key(args, kwargs):
+            call_tags = tags(*args, **kwargs) if callable(tags) else tags
+            versions = _tag_versions(caches[cache_alias], list(call_tags))
+            if key is None:
+                raw = repr((args, sorted(kwargs.items()), versions)).encode()
+            else:
+                raw = repr((key(*args, **kwargs), versions)).encode()
+            return f"{prefix}:{hashlib.sha1(raw).hexdigest()}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = caches[cache_alias]
+            key = make_key(args, kwargs)
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                value = func(*args, **kwargs)
+                cache.set(key, value, timeout)
+            return value
+
+        def invalidate(*args, **kwargs):
+            caches[cache_alias].delete(make_key(args, kwargs))
+
+        wrapper.invalidate = invalidate
+        return wrapper
+
+    return decorator
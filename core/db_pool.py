@@ -0,0 +1,46 @@
+"""
+Connection reuse for the per-team database aliases.
+
+Every alias gets persistent connections (CONN_MAX_AGE) with health checks, so a request that
+touches core plus a team database reuses one open connection per alias and worker thread
+instead of connecting twice. For server databases the set of persistent connections held
+by the workers is the pool; on Django versions with a native PostgreSQL pool it is enabled
+as well.
+
+Under ASGI Django runs each request's synchronous database work in a new thread, so a
+persistent connection is never reused and they pile up until the server refuses new ones
+(Django ticket #33497). There CONN_MAX_AGE must be 0.
+"""
+import django
+from django.core.exceptions import ImproperlyConfigured
+
+SERVER_ENGINES = ("mysql", "postgresql")
+
+
+def is_server_database(config) -> bool:
+    return any(engine in config.get("ENGINE", "") for engine in SERVER_ENGINES)
+
+
+def configure_database(config, max_age, health_checks=True, pool_min=0, pool_max=0, asgi=False):
+    """Apply connection reuse settings to a DATABASES entry built by django-environ."""
+    if asgi and max_age != 0:
+        raise ImproperlyConfigured(
+            f"CONN_MAX_AGE={max_age} with SERVER_MODE=asgi leaks a connection per request thread; use 0."
+        )
+    config["CONN_MAX_AGE"] = max_age
+    config["CONN_HEALTH_CHECKS"] = health_checks
+
+    if not is_server_database(config):
+        return config
+
+    options = config.setdefault("OPTIONS", {})
+    if "mysql" in config["ENGINE"]:
+        # Fail fast on a dead server instead of blocking a worker for the OS default.
+        options.setdefault("connect_timeout", 5)
+    elif "postgresql" in config["ENGINE"]:
+        options.setdefault("connect_timeout", 5)
+        if pool_max and django.VERSION >= (5, 1):
+            # Native pooling replaces persistent connections.
+            options["pool"] = {"min_size": pool_min, "max_size": pool_max}
+            config["CONN_MAX_AGE"] = 0
+    return config
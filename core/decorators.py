@@ -0,0 +1,30 @@
+from functools import wraps
+
+from django.http import HttpResponseNotAllowed
+from django.utils.log import log_response
+
+
+def async_require_http_methods(request_method_list):
+    """`require_http_methods` for `async def` views (Django 4.2's version is sync-only)."""
+
+    def decorator(func):
+        @wraps(func)
+        async def inner(request, *args, **kwargs):
+            if request.method not in request_method_list:
+                response = HttpResponseNotAllowed(request_method_list)
+                log_response(
+                    "Method Not Allowed (%s): %s",
+                    request.method,
+                    request.path,
+                    response=response,
+                    request=request,
+                )
+                return response
+            return await func(request, *args, **kwargs)
+
+        return inner
+
+    return decorator
+
+
+async_require_GET = async_require_http_methods(["GET"])
@@ -0,0 +1,89 @@
+"""
+Great-circle distances and bounding boxes shared by the team apps.
+
+All functions take degrees and return kilometres on a sphere of radius EARTH_RADIUS_KM.
+`haversine_km` is the scalar form for one pair of points; the array forms work on NumPy
+arrays (or anything np.asarray accepts) and are what radius scans over many points should use:
+
+    from core import geo
+
+    box = geo.bounding_box(lat, lng, radius_km)        # prefilter, e.g. latitude__range in SQL
+    idx, km = geo.within_radius(lat, lng, lats, lngs, radius_km)   # exact, nearest first
+
+Bounding boxes do not wrap at the antimeridian.
+"""
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 110.574
+KM_PER_DEGREE_LNG_EQUATOR = 111.320
+
+
+def haversine_km(lat1, lng1, lat2, lng2) -> float:
+    """Distance between two points."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+def _haversine(phi1, lam1, phi2, lam2):
+    a = np.sin((phi2 - phi1) / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin((lam2 - lam1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def distances_km(lat, lng, lats, lngs) -> np.ndarray:
+    """Distances from one point to each of the points (lats[i], lngs[i])."""
+    return _haversine(
+        math.radians(lat),
+        math.radians(lng),
+        np.radians(np.asarray(lats, dtype=float)),
+        np.radians(np.asarray(lngs, dtype=float)),
+    )
+
+
+def distance_matrix_km(lats1, lngs1, lats2, lngs2) -> np.ndarray:
+    """(len(lats1), len(lats2)) matrix of distances between two sets of points."""
+    phi1 = np.radians(np.asarray(lats1, dtype=float))[:, np.newaxis]
+    lam1 = np.radians(np.asarray(lngs1, dtype=float))[:, np.newaxis]
+    phi2 = np.radians(np.asarray(lats2, dtype=float))[np.newaxis, :]
+    lam2 = np.radians(np.asarray(lngs2, dtype=float))[np.newaxis, :]
+    return _haversine(phi1, lam1, phi2, lam2)
+
+
+def bounding_box(lat, lng, radius_km):
+    """(min_lat, max_lat, min_lng, max_lng) enclosing the circle of radius_km around the point."""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    min_lat = max(-90.0, lat - dlat)
+    max_lat = min(90.0, lat + dlat)
+    # Longitude degrees shrink towards the poles; size the box for the widest latitude it spans.
+    widest = min(89.9, max(abs(min_lat), abs(max_lat)))
+    dlng = radius_km / (KM_PER_DEGREE_LNG_EQUATOR * math.cos(math.radians(widest)))
+    return min_lat, max_lat, max(-180.0, lng - dlng), min(180.0, lng + dlng)
+
+
+def in_bounding_box(lats, lngs, box) -> np.ndarray:
+    """Boolean mask of the points inside `box` (as returned by bounding_box)."""
+    min_lat, max_lat, min_lng, max_lng = box
+    lats = np.asarray(lats, dtype=float)
+    lngs = np.asarray(lngs, dtype=float)
+    return (lats >= min_lat) & (lats <= max_lat) & (lngs >= min_lng) & (lngs <= max_lng)
+
+
+def within_radius(lat, lng, lats, lngs, radius_km):
+    """
+    Points within radius_km of (lat, lng), nearest first, as (indices, distances_km) arrays.
+    Only points inside the bounding box get the exact distance computed.
+    """
+    lats = np.asarray(lats, dtype=float)
+    lngs = np.asarray(lngs, dtype=float)
+    candidates = np.flatnonzero(in_bounding_box(lats, lngs, bounding_box(lat, lng, radius_km)))
+    km = distances_km(lat, lng, lats[candidates], lngs[candidates])
+    keep = km <= radius_km
+    candidates, km = candidates[keep], km[keep]
+    order = np.argsort(km, kind="stable")
+    return candidates[order], km[order]
@@ -0,0 +1,259 @@
+"""
+Shared client for outbound HTTP calls (Neshan, Hugging Face, IP geolocation, team APIs, ...).
+
+- One `requests.Session` per process with a pool of keep-alive connections per host, so
+  repeated calls to the same upstream skip the TCP/TLS handshake. Async callers use
+  core.async_http.client(): the per-event-loop httpx client under ASGI.
+- Idempotent requests are retried a bounded number of times on connection errors, timeouts
+  and 502/503/504, sleeping with full jitter between attempts.
+- Every upstream (by default the URL's host) has a circuit breaker: after
+  HTTP_CLIENT_BREAKER_THRESHOLD consecutive failures calls fail fast with CircuitOpenError
+  for HTTP_CLIENT_BREAKER_RESET_SECONDS, then a single trial request decides whether to close it.
+- Per-upstream request, failure, retry and latency figures are kept in memory and exposed to
+  staff at /api/debug/upstreams/.
+
+    from core import http_client
+
+    resp = http_client.get(url, upstream="neshan", params=params, timeout=10)
+    resp = await http_client.aget(url, upstream="neshan", params=params, timeout=10)
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from core import async_http
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+
+class CircuitOpenError(requests.ConnectionError, httpx.TransportError):
+    """
+    Raised instead of calling an upstream whose breaker is open. Subclasses both the
+    requests and httpx connection errors so existing `except` clauses keep handling it.
+    """
+
+    def __init__(self, upstream):
+        self.upstream = upstream
+        super().__init__(f"circuit open for upstream {upstream!r}")
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one trial) -> closed/open."""
+
+    def __init__(self, threshold, reset_after):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_after:
+            return "open"
+        return "half-open"
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_after or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+
+class _Upstream:
+    def __init__(self, name):
+        self.name = name
+        self.breaker = CircuitBreaker(
+            settings.HTTP_CLIENT_BREAKER_THRESHOLD, settings.HTTP_CLIENT_BREAKER_RESET_SECONDS
+        )
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.rejected = 0
+        self.latencies = deque(maxlen=settings.HTTP_CLIENT_LATENCY_HISTORY)
+        self._lock = threading.Lock()
+
+    def admit(self):
+        if self.breaker.allow():
+            return
+        with self._lock:
+            self.rejected += 1
+        raise CircuitOpenError(self.name)
+
+    def record(self, started, ok):
+        with self._lock:
+            self.requests += 1
+            self.latencies.append(time.perf_counter() - started)
+            if not ok:
+                self.failures += 1
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def retry_delay(self, attempt):
+        with self._lock:
+            self.retries += 1
+        cap = min(settings.HTTP_CLIENT_BACKOFF_MAX_SECONDS, settings.HTTP_CLIENT_BACKOFF_SECONDS * 2**attempt)
+        return random.uniform(0, cap)
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self.latencies)
+            data = {
+                "state": self.breaker.state,
+                "requests": self.requests,
+                "failures": self.failures,
+                "retries": self.retries,
+                "rejected": self.rejected,
+            }
+        if latencies:
+            data["latency_ms"] = {
+                "p50": round(latencies[len(latencies) // 2] * 1000, 1),
+                "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+                "max": round(latencies[-1] * 1000, 1),
+            }
+        return data
+
+
+_lock = threading.Lock()
+_upstreams: dict[str, _Upstream] = {}
+_session = None
+
+
+def _upstream(name):
+    with _lock:
+        upstream = _upstreams.get(name)
+        if upstream is None:
+            upstream = _upstreams[name] = _Upstream(name)
+        return upstream
+
+
+def _get_session():
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            # Shared across callers: never keep cookies from one upstream response for the next call.
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            adapter = HTTPAdapter(
+                pool_connections=settings.HTTP_CLIENT_POOL_HOSTS,
+                pool_maxsize=settings.HTTP_CLIENT_POOL_SIZE,
+                max_retries=0,
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def _attempts(method, retries):
+    if method not in IDEMPOTENT_METHODS:
+        return 1
+    return 1 + (settings.HTTP_CLIENT_MAX_RETRIES if retries is None else retries)
+
+
+def request(method, url, *, upstream=None, retries=None, **kwargs) -> requests.Response:
+    """
+    `requests.request` through the shared session. `upstream` names the breaker/metrics
+    bucket (default: the URL's host); `retries` overrides HTTP_CLIENT_MAX_RETRIES.
+    Raises requests exceptions, including CircuitOpenError.
+    """
+    method = method.upper()
+    target = _upstream(upstream or urlsplit(url).netloc)
+    kwargs.setdefault("timeout", settings.HTTP_CLIENT_TIMEOUT_SECONDS)
+    attempts = _attempts(method, retries)
+    for attempt in range(attempts):
+        target.admit()
+        started = time.perf_counter()
+        try:
+            response = _get_session().request(method, url, **kwargs)
+        except requests.RequestException as exc:
+            target.record(started, ok=False)
+            if attempt + 1 == attempts or not isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+                raise
+        else:
+            target.record(started, ok=response.status_code < 500)
+            if response.status_code not in RETRY_STATUSES or attempt + 1 == attempts:
+                return response
+        time.sleep(target.retry_delay(attempt))
+
+
+async def arequest(method, url, *, upstream=None, retries=None, **kwargs) -> httpx.Response:
+    """Async `request` through async_http.client(); raises httpx exceptions."""
+    method = method.upper()
+    target = _upstream(upstream or urlsplit(url).netloc)
+    attempts = _attempts(method, retries)
+    for attempt in range(attempts):
+        target.admit()
+        started = time.perf_counter()
+        try:
+            async with async_http.client() as client:
+                response = await client.request(method, url, **kwargs)
+        except httpx.RequestError as exc:
+            target.record(started, ok=False)
+            if attempt + 1 == attempts or not isinstance(exc, httpx.TransportError):
+                raise
+        else:
+            target.record(started, ok=response.status_code < 500)
+            if response.status_code not in RETRY_STATUSES or attempt + 1 == attempts:
+                return response
+        await asyncio.sleep(target.retry_delay(attempt))
+
+
+def get(url, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+async def aget(url, **kwargs) -> httpx.Response:
+    return await arequest("GET", url, **kwargs)
+
+
+async def apost(url, **kwargs) -> httpx.Response:
+    return await arequest("POST", url, **kwargs)
+
+
+def snapshot() -> dict:
+    """Per-upstream breaker state, counters and latency percentiles."""
+    with _lock:
+        upstreams = list(_upstreams.values())
+    return {u.name: u.snapshot() for u in sorted(upstreams, key=lambda u: u.name)}
+
+
+def reset():
+    """Forget all breakers and metrics (tests, /api/debug/upstreams/ DELETE)."""
+    with _lock:
+        _upstreams.clear()
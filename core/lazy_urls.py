@@ -0,0 +1,108 @@
+import ast
+import importlib.util
+import logging
+import threading
+import time
+from importlib import import_module
+
+from django.urls import URLResolver, clear_url_caches
+from django.urls.resolvers import RoutePattern
+from django.utils.datastructures import MultiValueDict
+from django.utils.functional import cached_property
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.RLock()
+
+# urlconf name -> seconds spent importing it, filled as team urlconfs get loaded.
+import_times: dict[str, float] = {}
+
+
+def declared_app_name(urlconf_name):
+    """Read `app_name = "..."` from a urlconf's source without importing it."""
+    spec = importlib.util.find_spec(urlconf_name)
+    if spec is None or not spec.origin:
+        return None
+    with open(spec.origin, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=spec.origin)
+    for node in tree.body:
+        if (
+            isinstance(node, ast.Assign)
+            and isinstance(node.value, ast.Constant)
+            and any(isinstance(t, ast.Name) and t.id == "app_name" for t in node.targets)
+        ):
+            return node.value.value
+    return None
+
+
+class LazyURLResolver(URLResolver):
+    """
+    A URLResolver for `include(urlconf_name)` that imports the urlconf (and so the team's
+    views) only when a request first matches its prefix, or when one of its namespaced
+    URLs is reversed.
+
+    Until then it contributes nothing to the root resolver's reverse tables; once it loads
+    it clears the URL caches so the root resolver is rebuilt with the team's URL names.
+    """
+
+    def __init__(self, route, urlconf_name):
+        app_name = declared_app_name(urlconf_name)
+        super().__init__(
+            RoutePattern(route, is_endpoint=False),
+            urlconf_name,
+            app_name=app_name,
+            namespace=app_name,
+        )
+        self.loaded = False
+
+    def load(self):
+        if self.loaded:
+            return
+        with _lock:
+            if self.loaded:
+                return
+            started = time.perf_counter()
+            self._module = import_module(self.urlconf_name)
+            elapsed = time.perf_counter() - started
+            import_times[self.urlconf_name] = elapsed
+            self.loaded = True
+            logger.info("Loaded %s in %.1f ms", self.urlconf_name, elapsed * 1000)
+        clear_url_caches()
+
+    @cached_property
+    def urlconf_module(self):
+        self.load()
+        return self._module
+
+    def _populate(self):
+        if self.loaded:
+            super()._populate()
+
+    @property
+    def reverse_dict(self):
+        if not self.loaded:
+            if not self.namespace:
+                return MultiValueDict()
+            self.load()
+        return super().reverse_dict
+
+    @property
+    def namespace_dict(self):
+        if not self.loaded:
+            if not self.namespace:
+                return {}
+            self.load()
+        return super().namespace_dict
+
+    @property
+    def app_dict(self):
+        if not self.loaded:
+            if not self.namespace:
+                return {}
+            self.load()
+        return super().app_dict
+
+
+def lazy_include(route, urlconf_name):
+    """Drop-in for `path(route, include(urlconf_name))` that defers the import."""
+    return LazyURLResolver(route, urlconf_name)
@@ -0,0 +1,471 @@
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import warnings
+from datetime import date, datetime, timedelta, timezone
+from itertools import cycle
+from unittest import mock
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+from django.test.utils import setup_databases, teardown_databases
+
+from core.jwt_utils import create_access_token
+from core.query_profiler import _AliasRecorder
+
+User = get_user_model()
+
+SCENARIOS = (
+    "facility_search",
+    "nearby_search",
+    "places_in_radius",
+    "wiki_lookup",
+    "trip_generation",
+    "recommendation_feed",
+    "pdf_export",
+)
+
+# Runs inside team11/tripPlanService (a separate Django project) against a throwaway SQLite
+# file: migrate, create_sample_data.py, then time generate_trip_pdf on the sample trip.
+_PDF_PROBE = """
+import contextlib, io, json, os, sys, time
+sys.path.insert(0, os.getcwd())
+os.environ["DJANGO_SETTINGS_MODULE"] = "tripPlanService.settings"
+from django.conf import settings
+settings.DATABASES = {"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": sys.argv[1]}}
+import django
+django.setup()
+from django.core.management import call_command
+with contextlib.redirect_stdout(io.StringIO()):
+    call_command("migrate", verbosity=0, interactive=False)
+    with open("create_sample_data.py", encoding="utf-8") as f:
+        exec(compile(f.read(), "create_sample_data.py", "exec"), {})
+from data.models import Trip
+from presentation.pdf_generator import generate_trip_pdf
+trip = Trip.objects.order_by("-trip_id").first()
+generate_trip_pdf(trip)
+timings = []
+for _ in range(int(sys.argv[2])):
+    started = time.perf_counter()
+    pdf = generate_trip_pdf(trip)
+    timings.append((time.perf_counter() - started) * 1000)
+print(json.dumps({"timings": timings, "bytes": len(pdf.getvalue())}))
+"""
+
+# Destinations known to team10's offline facilities/wiki clients.
+_DESTINATIONS = ("tehran", "isfahan", "shiraz", "تهران", "اصفهان", "شیراز")
+
+
+class Skip(Exception):
+    """A scenario cannot run in this tree or environment; the message says why."""
+
+
+class _OfflineElasticsearch:
+    """
+    The Elasticsearch calls team2 makes (bulk, search, msearch), in memory: a document
+    matches when the query occurs in its content, summary or tags.
+    """
+
+    def __init__(self):
+        self.documents = {}
+
+    def bulk(self, operations, refresh=False):
+        lines = operations.splitlines()
+        for action, source in zip(lines[::2], lines[1::2]):
+            self.documents[json.loads(action)["index"]["_id"]] = json.loads(source)
+        return {"errors": False, "items": []}
+
+    def search(self, index, body):
+        query = body["query"]["multi_match"]["query"].casefold()
+        hits = [
+            {"_score": 1.0, "_source": doc}
+            for _, doc in sorted(self.documents.items())
+            if query in " ".join([doc["content"], doc["summary"], *doc["tags"]]).casefold()
+        ]
+        return {"hits": {"hits": hits[: body["size"]]}}
+
+    def msearch(self, searches):
+        return {"responses": [self.search(head["index"], body) for head, body in zip(searches[::2], searches[1::2])]}
+
+
+def _git_revision():
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=settings.BASE_DIR, check=True
+        ).stdout.strip()
+        dirty = bool(
+            subprocess.run(
+                ["git", "status", "--porcelain", "--untracked-files=no"],
+                capture_output=True,
+                text=True,
+                cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+    return sha, dirty
+
+
+def _summarize(timings_ms, queries):
+    ordered = sorted(timings_ms)
+    return {
+        "iterations": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(ordered[len(ordered) // 2], 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "min_ms": round(ordered[0], 3),
+        "max_ms": round(ordered[-1], 3),
+        "queries_per_iteration": round(queries / len(ordered), 2) if queries is not None else None,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed throwaway SQLite databases with the team loaders, run timed scenarios and write "
+        "the results as JSON so runs can be compared across commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20, help="Timed iterations per scenario.")
+        parser.add_argument("--warmup", type=int, default=2, help="Untimed iterations before each scenario.")
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=SCENARIOS,
+            dest="scenarios",
+            help="Run only this scenario (repeatable). Default: all.",
+        )
+        parser.add_argument(
+            "--output",
+            help="Where to write the JSON results (default: bench-results/<commit>.json).",
+        )
+        parser.add_argument("--compare", help="A previous results file to print p50 deltas against.")
+
+    def handle(self, *args, **options):
+        self.iterations = max(1, options["iterations"])
+        self.warmup = max(0, options["warmup"])
+        scenarios = options["scenarios"] or list(SCENARIOS)
+
+        non_sqlite = [alias for alias in connections if connections[alias].vendor != "sqlite"]
+        if non_sqlite:
+            raise CommandError(
+                "bench only runs against SQLite so it stays offline; these aliases are not SQLite: "
+                + ", ".join(non_sqlite)
+            )
+
+        sha, dirty = _git_revision()
+        results = {
+            "commit": sha,
+            "dirty": dirty,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "team_apps": list(settings.TEAM_APPS),
+            "iterations": self.iterations,
+            "seed": {},
+            "rows": {},
+            "scenarios": {},
+        }
+
+        # Test databases: in-memory SQLite per alias, so seeding never touches the real files.
+        old_config = setup_databases(verbosity=0, interactive=False, aliases=set(connections))
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+                results["seed"] = self._seed()
+                results["rows"] = self._row_counts()
+                self.user = User.objects.create_user(email="bench@example.invalid", password=None)
+                self.client = Client()
+                self.client.cookies["access_token"] = create_access_token(self.user)
+
+                for name in scenarios:
+                    self.stdout.write(f"{name:<20} ", ending="")
+                    self.stdout.flush()
+                    try:
+                        # Services log with print() and naive-datetime warnings; keep the report readable.
+                        with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+                            warnings.simplefilter("ignore", RuntimeWarning)
+                            row = getattr(self, f"_scenario_{name}")()
+                    except Skip as exc:
+                        row = {"skipped": str(exc)}
+                    results["scenarios"][name] = row
+                    self.stdout.write(self._format_row(row))
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        output = options["output"] or os.path.join(
+            settings.BASE_DIR, "bench-results", f"{(sha or 'unknown')[:12]}{'-dirty' if dirty else ''}.json"
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+        if options["compare"]:
+            self._compare(options["compare"], results)
+
+    # Seeding ---------------------------------------------------------------------------
+
+    def _seed(self):
+        loaders = {
+            "team2": self._seed_team2,
+            "team4": self._seed_team4,
+            "team5": lambda: call_command("seed_team5_demo_data", seed=1404),
+            "team13": self._seed_team13,
+        }
+        report = {}
+        for app, loader in loaders.items():
+            if app not in settings.TEAM_APPS:
+                report[app] = {"skipped": f"{app} is not in TEAM_APPS"}
+                continue
+            started = time.perf_counter()
+            error = None
+            try:
+                # The loaders read fixtures by relative path and print progress per row.
+                with contextlib.chdir(settings.BASE_DIR), contextlib.redirect_stdout(io.StringIO()):
+                    loader()
+            except Exception as exc:
+                error = f"{type(exc).__name__}: {exc}"
+            report[app] = {"seconds": round(time.perf_counter() - started, 3), "error": error}
+            self.stdout.write(f"seeded {app:<8} {report[app]['seconds']:8.2f}s {error or ''}")
+        return report
+
+    def _seed_team2(self):
+        from team2.models import Article, Tag, Version
+
+        # No loader or fixtures ship with team2: one article per destination.
+        tag = Tag.objects.create(name="destination")
+        for i, destination in enumerate(_DESTINATIONS):
+            article = Article.objects.create(name=f"bench-{i}", creator_id=uuid.uuid4())
+            version = Version.objects.create(
+                name=f"bench-{i}-v1",
+                article=article,
+                editor_id=uuid.uuid4(),
+                summary=f"{destination} travel guide",
+                content=f"# {destination}\n\n![{destination}](https://example.invalid/{i}.jpg)\n\n"
+                + "Sights, food and transport. " * 40,
+            )
+            version.tags.add(tag)
+            article.current_version = version
+            article.save()
+
+    def _seed_team4(self):
+        call_command("load_all_data")
+
+    def _seed_team13(self):
+        from team13.load_temp_data import get_data_dir, run_load
+        from team13.management.commands.loaddata_team13_csv import csv_path
+
+        if os.path.isdir(csv_path("")):
+            call_command("loaddata_team13_csv")
+        else:
+            # The CSV export is not checked in; the JSON loader reads the same data set.
+            run_load(data_dir=get_data_dir())
+
+    def _row_counts(self):
+        from django.apps import apps
+
+        counts = {}
+        for app in ("team2", "team4", "team5", "team13"):
+            if app not in settings.TEAM_APPS:
+                continue
+            for model in apps.get_app_config(app).get_models():
+                try:
+                    counts[model._meta.label] = model.objects.count()
+                except Exception:
+                    continue
+        return counts
+
+    # Measurement -----------------------------------------------------------------------
+
+    def _measure(self, calls):
+        """Run `calls` (cycled) for warmup + iterations and time each iteration."""
+        calls = cycle(calls)
+        for _ in range(self.warmup):
+            next(calls)()
+
+        timings, queries = [], 0
+        for _ in range(self.iterations):
+            recorders = [_AliasRecorder() for _ in connections]
+            call = next(calls)
+            with contextlib.ExitStack() as stack:
+                for alias, recorder in zip(connections, recorders):
+                    stack.enter_context(connections[alias].execute_wrapper(recorder))
+                started = time.perf_counter()
+                call()
+                timings.append((time.perf_counter() - started) * 1000)
+            queries += sum(r.count for r in recorders)
+        return _summarize(timings, queries)
+
+    def _require(self, app):
+        if app not in settings.TEAM_APPS:
+            raise Skip(f"{app} is not in TEAM_APPS")
+
+    def _get(self, path, params=None):
+        def call():
+            res = self.client.get(path, params or {})
+            if res.status_code != 200:
+                raise CommandError(f"GET {path} {params} answered {res.status_code}")
+
+        return call
+
+    def _post_json(self, path, body):
+        def call():
+            res = self.client.post(path, body, content_type="application/json")
+            if res.status_code != 200:
+                raise CommandError(f"POST {path} {body} answered {res.status_code}")
+
+        return call
+
+    def _team4_cities(self, limit=5):
+        from team4.models import City
+
+        cities = list(City.objects.filter(location__isnull=False).order_by("city_id")[:limit])
+        if not cities:
+            raise Skip("team4 has no seeded cities")
+        return cities
+
+    # Scenarios -------------------------------------------------------------------------
+
+    def _scenario_facility_search(self):
+        self._require("team4")
+        cities = self._team4_cities()
+        bodies = [{"city": c.name_fa} for c in cities]
+        bodies += [{"province": cities[0].province.name_fa, "category": "hotel"}, {"name": "هتل"}]
+        return self._measure([self._post_json("/team4/api/facilities/search/", body) for body in bodies])
+
+    def _scenario_nearby_search(self):
+        self._require("team4")
+        calls = [
+            self._get(
+                "/team4/api/facilities/nearby/",
+                {"lat": c.location.latitude, "lng": c.location.longitude, "radius": 5000},
+            )
+            for c in self._team4_cities()
+        ]
+        return self._measure(calls)
+
+    def _scenario_places_in_radius(self):
+        self._require("team13")
+        from team13.models import Place
+
+        places = list(Place.objects.order_by("place_id")[:5])
+        if not places:
+            raise Skip("team13 has no seeded places")
+        calls = [
+            self._get("/team13/places-in-radius/", {"lat": p.latitude, "lng": p.longitude, "radius_km": 10})
+            for p in places
+        ]
+        return self._measure(calls)
+
+    def _scenario_wiki_lookup(self):
+        # /team2/api/wiki/ with Elasticsearch replaced by an in-memory stand-in, indexed through
+        # the real bulk path. Each query is looked up once first, so the timings are the
+        # repeated-lookup path: search cache, article query and serialization.
+        self._require("team2")
+        from team2.tasks import indexing
+
+        es = _OfflineElasticsearch()
+        indexing.bulk_index(es, indexing.indexed_articles())
+        if not es.documents:
+            raise Skip("team2 has no seeded articles")
+        calls = [self._get("/team2/api/wiki/", {"content": d}) for d in _DESTINATIONS]
+        with mock.patch.object(indexing, "_ES", es):
+            for call in calls:
+                call()
+            return self._measure(calls)
+
+    def _scenario_trip_generation(self):
+        self._require("team10")
+        from team10.services import trip_planning_service
+
+        start = date.today() + timedelta(days=7)
+        user_id = str(self.user.id)
+        calls = [
+            lambda d=d, b=b: trip_planning_service.create_initial_trip(
+                {
+                    "destination": d,
+                    "start_date": start.isoformat(),
+                    "end_date": (start + timedelta(days=3)).isoformat(),
+                    "budget_level": b,
+                },
+                user_id,
+            )
+            for d in _DESTINATIONS[:3]
+            for b in ("ECONOMY", "MODERATE", "LUXURY")
+        ]
+        return self._measure(calls)
+
+    def _scenario_recommendation_feed(self):
+        self._require("team5")
+        from team5.models import Team5City, Team5MediaRating
+
+        user_ids = [str(u) for u in Team5MediaRating.objects.values_list("user_id", flat=True).distinct()[:5]]
+        city_ids = list(Team5City.objects.values_list("city_id", flat=True)[:3])
+        if not user_ids or not city_ids:
+            raise Skip("team5 has no seeded ratings")
+        calls = [self._get("/team5/api/recommendations/popular/")]
+        calls += [self._get("/team5/api/recommendations/nearest/", {"cityId": c}) for c in city_ids]
+        calls += [self._get("/team5/api/recommendations/personalized/", {"userId": u}) for u in user_ids]
+        calls += [self._get("/team5/api/media/", {"userId": u}) for u in user_ids]
+        return self._measure(calls)
+
+    def _scenario_pdf_export(self):
+        project = os.path.join(settings.BASE_DIR, "team11", "tripPlanService")
+        if not os.path.isdir(project):
+            raise Skip("team11/tripPlanService is missing")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            proc = subprocess.run(
+                [sys.executable, "-c", _PDF_PROBE, os.path.join(tmp, "bench.sqlite3"), str(self.iterations)],
+                capture_output=True,
+                text=True,
+                cwd=project,
+                env={k: v for k, v in os.environ.items() if k != "DJANGO_SETTINGS_MODULE"},
+            )
+        try:
+            probe = json.loads(proc.stdout.strip().splitlines()[-1])
+        except (IndexError, ValueError):
+            last = proc.stderr.strip().splitlines()[-1:] or ["no output"]
+            raise Skip(f"tripPlanService PDF export unavailable: {last[0]}")
+        row = _summarize(probe["timings"], None)
+        row["pdf_bytes"] = probe["bytes"]
+        return row
+
+    # Reporting -------------------------------------------------------------------------
+
+    def _format_row(self, row):
+        if "skipped" in row:
+            return self.style.WARNING(f"skipped: {row['skipped']}")
+        queries = row["queries_per_iteration"]
+        return (
+            f"p50 {row['p50_ms']:9.3f} ms  p95 {row['p95_ms']:9.3f} ms  "
+            f"queries {queries if queries is not None else '-':>7}"
+        )
+
+    def _compare(self, path, current):
+        with open(path, encoding="utf-8") as f:
+            previous = json.load(f)
+        self.stdout.write(f"\nvs {previous.get('commit', '?')[:12]} ({path})")
+        self.stdout.write(f"{'scenario':<20} {'old p50':>10} {'new p50':>10} {'delta':>8} {'queries':>15}")
+        for name, row in current["scenarios"].items():
+            old = previous.get("scenarios", {}).get(name, {})
+            if "p50_ms" not in row or "p50_ms" not in old:
+                continue
+            delta = (row["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100 if old["p50_ms"] else 0.0
+            queries = f"{old.get('queries_per_iteration')} -> {row.get('queries_per_iteration')}"
+            self.stdout.write(
+                f"{name:<20} {old['p50_ms']:10.2f} {row['p50_ms']:10.2f} {delta:+7.1f}% {queries:>15}"
+            )
@@ -0,0 +1,79 @@
+import statistics
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from core import geo
+
+# Around Tehran, roughly the spread of the team4/team13 place data.
+_CENTER = (35.6892, 51.3890)
+_SPREAD_DEGREES = 0.5
+
+
+class Command(BaseCommand):
+    help = (
+        "Per-request cost of a radius scan over an in-memory set of points: a scalar Haversine "
+        "loop, a vectorized scan of every point, and a bounding-box prefilter plus vectorized refine."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--points", type=int, default=10_000, help="Points scanned per request.")
+        parser.add_argument("--requests", type=int, default=200, help="Radius queries per mode.")
+        parser.add_argument("--radius", type=float, default=5.0, help="Search radius in km.")
+        parser.add_argument("--seed", type=int, default=404)
+
+    def handle(self, *args, **options):
+        n, radius = options["points"], options["radius"]
+        rng = np.random.default_rng(options["seed"])
+        lats = _CENTER[0] + rng.uniform(-_SPREAD_DEGREES, _SPREAD_DEGREES, n)
+        lngs = _CENTER[1] + rng.uniform(-_SPREAD_DEGREES, _SPREAD_DEGREES, n)
+        centers = list(zip(
+            _CENTER[0] + rng.uniform(-_SPREAD_DEGREES, _SPREAD_DEGREES, options["requests"]),
+            _CENTER[1] + rng.uniform(-_SPREAD_DEGREES, _SPREAD_DEGREES, options["requests"]),
+        ))
+        # What the call sites had: Python floats, one haversine call per point.
+        pairs = list(zip(lats.tolist(), lngs.tolist()))
+
+        def scalar(lat, lng):
+            hits = []
+            for i, (plat, plng) in enumerate(pairs):
+                d = geo.haversine_km(lat, lng, plat, plng)
+                if d <= radius:
+                    hits.append((i, d))
+            hits.sort(key=lambda hit: hit[1])
+            return [i for i, _ in hits]
+
+        def full_scan(lat, lng):
+            km = geo.distances_km(lat, lng, lats, lngs)
+            idx = np.flatnonzero(km <= radius)
+            return idx[np.argsort(km[idx], kind="stable")].tolist()
+
+        def prefiltered(lat, lng):
+            return geo.within_radius(lat, lng, lats, lngs, radius)[0].tolist()
+
+        modes = (
+            ("scalar loop", scalar),
+            ("vectorized full scan", full_scan),
+            ("bbox + vectorized", prefiltered),
+        )
+        results, expected = {}, None
+        for name, scan in modes:
+            timings, hits = [], []
+            for lat, lng in centers:
+                started = time.perf_counter()
+                hits.append(scan(lat, lng))
+                timings.append((time.perf_counter() - started) * 1000)
+            if expected is None:
+                expected = hits
+            elif hits != expected:
+                self.stderr.write(self.style.WARNING(f"{name}: results differ from the scalar loop"))
+            results[name] = timings
+
+        mean_hits = statistics.mean(len(h) for h in expected)
+        self.stdout.write(f"{n} points, {len(centers)} requests, radius {radius:g} km, {mean_hits:.0f} hits/request")
+        baseline = statistics.median(results["scalar loop"])
+        for name, timings in results.items():
+            p50 = statistics.median(timings)
+            p95 = sorted(timings)[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(f"{name:<22}: p50 {p50:8.3f} ms  p95 {p95:8.3f} ms  ({baseline / p50:6.1f}x)")
@@ -0,0 +1,66 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+
+from core.upstream_stub import SlowUpstream
+
+_PATH = "/team13/distance-matrix/?origins=35.70,51.40|35.72,51.42&destinations=35.69,51.39"
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test team13's async distance-matrix view against a stubbed slow Neshan: "
+        "a fixed pool of sync workers (WSGI) versus one event loop (ASGI)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50, help="Concurrent requests per mode.")
+        parser.add_argument("--delay", type=float, default=0.5, help="Upstream latency in seconds.")
+        parser.add_argument("--workers", type=int, default=4, help="Sync workers in WSGI mode.")
+
+    def handle(self, *args, **options):
+        if "team13" not in settings.TEAM_APPS:
+            raise CommandError("bench_slow_upstream needs team13 in TEAM_APPS.")
+        n, delay, workers = options["requests"], options["delay"], options["workers"]
+
+        with SlowUpstream(delay=delay) as upstream, override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            NESHAN_API_BASE=upstream.url,
+            NESHAN_API_KEY_SERVICE="bench",
+        ):
+            wsgi = self._run_wsgi(n, workers)
+            asgi = asyncio.run(self._run_asgi(n))
+
+        self.stdout.write(f"{n} requests, upstream delay {delay * 1000:.0f} ms")
+        self.stdout.write(f"{f'WSGI, {workers} sync workers':<24}: {wsgi:7.2f} s  ({n / wsgi:7.1f} req/s)")
+        self.stdout.write(f"{'ASGI, one event loop':<24}: {asgi:7.2f} s  ({n / asgi:7.1f} req/s)")
+        self.stdout.write(self.style.SUCCESS(f"{'speedup':<24}: {wsgi / asgi:7.2f}x"))
+
+    def _check(self, statuses):
+        bad = [s for s in statuses if s != 200]
+        if bad:
+            raise CommandError(f"{len(bad)} requests failed (status {bad[0]}); check ALLOWED_HOSTS and team13 URLs.")
+
+    def _run_wsgi(self, n, workers):
+        # Each worker thread handles one request at a time, like a sync gunicorn worker.
+        def one(_):
+            return Client().get(_PATH).status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            statuses = list(pool.map(one, range(n)))
+        elapsed = time.perf_counter() - started
+        self._check(statuses)
+        return elapsed
+
+    async def _run_asgi(self, n):
+        client = AsyncClient()
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(client.get(_PATH) for _ in range(n)))
+        elapsed = time.perf_counter() - started
+        self._check([r.status_code for r in responses])
+        return elapsed
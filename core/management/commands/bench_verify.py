@@ -0,0 +1,60 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+
+from core import user_cache
+from core.jwt_utils import create_access_token
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Compare requests/sec of the fast-path verify middleware against the full-stack verify view."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000, help="Requests per scenario.")
+
+    def handle(self, *args, **options):
+        n = options["requests"]
+        path = "/api/auth/verify/"
+        fast_mw = "core.middleware.FastVerifyMiddleware"
+
+        # Everything runs inside a transaction that is rolled back, so the bench user never persists.
+        with transaction.atomic():
+            user = User.objects.create_user(email="bench-verify@example.invalid", password=None)
+            token = create_access_token(user)
+
+            stack = [m for m in settings.MIDDLEWARE if m != fast_mw]
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+                with override_settings(MIDDLEWARE=stack):
+                    full = self._run(path, token, n)
+                with override_settings(MIDDLEWARE=[fast_mw, *stack], JWT_FAST_VERIFY_PATHS=[path]):
+                    fast = self._run(path, token, n)
+
+            transaction.set_rollback(True)
+
+        user_cache.invalidate_user(user.id)
+
+        self.stdout.write(f"full stack verify view : {full:10.1f} req/s")
+        self.stdout.write(f"fast-path middleware   : {fast:10.1f} req/s")
+        if full:
+            self.stdout.write(self.style.SUCCESS(f"speedup                : {fast / full:10.2f}x"))
+
+    def _run(self, path, token, n):
+        client = Client()
+        client.cookies["access_token"] = token
+
+        res = client.get(path)
+        if res.status_code != 200:
+            self.stderr.write(f"{path} answered {res.status_code}; check ALLOWED_HOSTS and JWT settings.")
+            return 0.0
+
+        started = time.perf_counter()
+        for _ in range(n):
+            client.get(path)
+        elapsed = time.perf_counter() - started
+        return n / elapsed if elapsed else 0.0
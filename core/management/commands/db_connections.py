@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+
+from core.db_pool import is_server_database
+
+_SERVER_COUNT_SQL = {
+    "mysql": "SELECT COUNT(*) FROM information_schema.PROCESSLIST WHERE USER = SUBSTRING_INDEX(CURRENT_USER(), '@', 1)",
+    "postgresql": "SELECT COUNT(*) FROM pg_stat_activity WHERE datname = current_database()",
+}
+
+
+class Command(BaseCommand):
+    help = "Report connection settings and live connections for every database alias."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--no-server",
+            action="store_true",
+            help="Skip asking MySQL/PostgreSQL servers for their live connection counts.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'alias':<10} {'vendor':<11} {'max_age':>7} {'health':>6} {'pool':>5} {'open':>5} {'server':>7}"
+        )
+        for alias in connections:
+            conn = connections[alias]
+            cfg = conn.settings_dict
+            pool = cfg.get("OPTIONS", {}).get("pool")
+            pool_size = pool.get("max_size", "-") if isinstance(pool, dict) else ("yes" if pool else "-")
+            is_open = conn.connection is not None
+            server = "-"
+
+            if not options["no_server"] and is_server_database(cfg):
+                try:
+                    with conn.cursor() as cursor:
+                        cursor.execute(_SERVER_COUNT_SQL[conn.vendor])
+                        server = str(cursor.fetchone()[0])
+                except (DatabaseError, KeyError) as exc:
+                    server = f"error: {exc}"[:40]
+
+            self.stdout.write(
+                f"{alias:<10} {conn.vendor:<11} {str(cfg.get('CONN_MAX_AGE')):>7} "
+                f"{'yes' if cfg.get('CONN_HEALTH_CHECKS') else 'no':>6} "
+                f"{pool_size:>5} {'yes' if is_open else 'no':>5} {server:>7}"
+            )
@@ -0,0 +1,71 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter per app so each measurement starts from the same baseline:
+# Django set up (models and admin loaded, as in a gunicorn worker), no urlconfs imported.
+_PROBE = """
+import json, os, resource, sys, time
+import django
+
+def rss_kb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+django.setup()
+from importlib import import_module
+rss_before = rss_kb()
+started = time.perf_counter()
+error = None
+try:
+    import_module(sys.argv[1])
+except Exception as exc:
+    error = f"{type(exc).__name__}: {exc}"
+elapsed = time.perf_counter() - started
+rss_after = rss_kb()
+print(json.dumps({"seconds": elapsed, "rss_kb": rss_after - rss_before, "total_rss_kb": rss_after, "error": error}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Report how long importing each team's urlconf takes and how much memory it adds."
+
+    def add_arguments(self, parser):
+        parser.add_argument("apps", nargs="*", help="Team apps to measure (default: TEAM_APPS).")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        apps = options["apps"] or settings.TEAM_APPS
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "app404.settings")}
+
+        report = {}
+        for app in apps:
+            proc = subprocess.run(
+                [sys.executable, "-c", _PROBE, f"{app}.urls"],
+                capture_output=True,
+                text=True,
+                env=env,
+                cwd=settings.BASE_DIR,
+            )
+            try:
+                report[app] = json.loads(proc.stdout.strip().splitlines()[-1])
+            except (IndexError, ValueError):
+                report[app] = {"seconds": None, "rss_kb": None, "error": proc.stderr.strip().splitlines()[-1:]}
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"{'app':<10} {'import ms':>10} {'+RSS MB':>9}  error")
+        ordered = sorted(report.items(), key=lambda kv: -(kv[1]["seconds"] or 0))
+        for app, row in ordered:
+            ms = f"{row['seconds'] * 1000:.1f}" if row["seconds"] is not None else "-"
+            mb = f"{row['rss_kb'] / 1024:.1f}" if row["rss_kb"] is not None else "-"
+            self.stdout.write(f"{app:<10} {ms:>10} {mb:>9}  {row.get('error') or ''}")
@@ -1,10 +1,21 @@
-from django.contrib.auth import get_user_model
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
 from django.utils.deprecation import MiddlewareMixin
 from jwt import ExpiredSignatureError, InvalidTokenError
+from whitenoise.middleware import WhiteNoiseMiddleware as _WhiteNoiseMiddleware
 
 from core.jwt_utils import decode_token
+from core.user_cache import get_active_user, get_cached_user
 
-User = get_user_model()
+
+def _get_token(request):
+    token = request.COOKIES.get("access_token")
+    if not token:
+        auth = request.headers.get("Authorization", "")
+        if auth.startswith("Bearer "):
+            token = auth.split(" ", 1)[1].strip()
+    return token
 
 
 class JWTAuthenticationMiddleware(MiddlewareMixin):
@@ -16,12 +27,7 @@ class JWTAuthenticationMiddleware(MiddlewareMixin):
         if hasattr(request, "user") and getattr(request.user, "is_authenticated", False):
             return
 
-        token = request.COOKIES.get("access_token")
-        if not token:
-            auth = request.headers.get("Authorization", "")
-            if auth.startswith("Bearer "):
-                token = auth.split(" ", 1)[1].strip()
-
+        token = _get_token(request)
         if not token:
             return
 
@@ -32,7 +38,7 @@ class JWTAuthenticationMiddleware(MiddlewareMixin):
 
             user_id = payload.get("sub")
             tv = payload.get("tv")
-            user = User.objects.filter(id=user_id, is_active=True).first()
+            user = get_active_user(user_id)
             if not user:
                 return
 
@@ -43,3 +49,91 @@ class JWTAuthenticationMiddleware(MiddlewareMixin):
             request.jwt_payload = payload
         except (ExpiredSignatureError, InvalidTokenError):
             return
+
+
+_VERIFY_OK = b'{"ok": true}'
+_VERIFY_DENIED = b'{"detail": "Authentication required"}'
+
+
+class FastVerifyMiddleware:
+    """
+    Answers the gateway's auth_request calls (JWT_FAST_VERIFY_PATHS) before the rest of the
+    middleware stack runs: no sessions, CSRF or messages, and the user comes from the
+    per-process user cache. Must be the first entry in MIDDLEWARE.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.paths = frozenset(settings.JWT_FAST_VERIFY_PATHS)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path_info not in self.paths:
+            return self.get_response(request)
+        return fast_verify(request)
+
+    async def __acall__(self, request):
+        if request.path_info not in self.paths:
+            return await self.get_response(request)
+        return await sync_to_async(fast_verify)(request)
+
+
+def fast_verify(request):
+    token = _get_token(request)
+    if not token:
+        return HttpResponse(_VERIFY_DENIED, status=401, content_type="application/json")
+
+    try:
+        payload = decode_token(token)
+    except (ExpiredSignatureError, InvalidTokenError):
+        return HttpResponse(_VERIFY_DENIED, status=401, content_type="application/json")
+
+    user = None
+    if payload.get("type") == "access":
+        user = get_cached_user(payload.get("sub"))
+    if user is None or user.token_version != payload.get("tv"):
+        return HttpResponse(_VERIFY_DENIED, status=401, content_type="application/json")
+
+    resp = HttpResponse(_VERIFY_OK, content_type="application/json")
+    resp["X-User-Id"] = str(user.id)
+    resp["X-User-Email"] = user.email
+    resp["X-User-First-Name"] = user.first_name or ""
+    resp["X-User-Last-Name"] = user.last_name or ""
+    resp["X-User-Age"] = str(user.age or "")
+    return resp
+
+
+class WhiteNoiseMiddleware(_WhiteNoiseMiddleware):
+    """
+    whitenoise's middleware is sync-only, which under ASGI would pin every request to a
+    thread for its whole lifetime. Static files are still served synchronously; everything
+    else is passed straight to the async handler.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
@@ -48,5 +48,9 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
 
+    class Meta:
+        # Keyset pagination of user listings (newest first).
+        indexes = [models.Index(fields=["date_joined", "id"], name="core_user_joined_idx")]
+
     def __str__(self):
         return self.email
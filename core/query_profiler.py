@@ -0,0 +1,151 @@
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+_SPACES = re.compile(r"\s+")
+
+_lock = threading.Lock()
+_history: deque = deque(maxlen=settings.QUERY_PROFILER_HISTORY)
+
+
+def query_shape(sql: str) -> str:
+    """Normalize a SQL string so queries differing only in their parameters compare equal."""
+    shape = _STRING.sub("?", sql)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("(...)", shape)
+    return _SPACES.sub(" ", shape).strip()
+
+
+class _AliasRecorder:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            self.shapes[query_shape(sql)] += 1
+
+
+class QueryProfilerMiddleware:
+    """
+    Opt-in (QUERY_PROFILER=True): records query count and SQL time per database alias for
+    each request, flags query shapes repeated QUERY_PROFILER_REPEAT_THRESHOLD times or more
+    (N+1 patterns), reports them in a Server-Timing header and keeps a rolling history for
+    the admin-only /api/debug/queries/ report.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold = settings.QUERY_PROFILER_REPEAT_THRESHOLD
+
+    def __call__(self, request):
+        recorders = {alias: _AliasRecorder() for alias in connections}
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias, recorder in recorders.items():
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        used = {alias: r for alias, r in recorders.items() if r.count}
+        repeated = [
+            {"alias": alias, "shape": shape, "count": count}
+            for alias, r in used.items()
+            for shape, count in r.shapes.most_common()
+            if count >= self.threshold
+        ]
+
+        timings = [f"total;dur={total * 1000:.1f}"]
+        timings += [
+            f'db-{alias};dur={r.seconds * 1000:.1f};desc="{r.count} queries"' for alias, r in used.items()
+        ]
+        if repeated:
+            timings.append(f'nplus1;desc="{len(repeated)} repeated shapes"')
+        response["Server-Timing"] = ", ".join(timings)
+
+        match = getattr(request, "resolver_match", None)
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "route": match.route if match else request.path,
+            "status": response.status_code,
+            "ms": total * 1000,
+            "aliases": {alias: {"queries": r.count, "ms": r.seconds * 1000} for alias, r in used.items()},
+            "repeated": repeated,
+        }
+        with _lock:
+            _history.append(record)
+        return response
+
+
+def build_report(top=20):
+    """Aggregate the rolling request history by alias, by route and by repeated query shape."""
+    with _lock:
+        history = list(_history)
+
+    aliases = defaultdict(lambda: {"queries": 0, "ms": 0.0, "requests": 0})
+    routes = defaultdict(lambda: {"requests": 0, "queries": 0, "db_ms": 0.0, "ms": 0.0})
+    repeated = defaultdict(lambda: {"requests": 0, "max_count": 0, "routes": set()})
+
+    for rec in history:
+        route = routes[(rec["method"], rec["route"])]
+        route["requests"] += 1
+        route["ms"] += rec["ms"]
+        for alias, stats in rec["aliases"].items():
+            aliases[alias]["queries"] += stats["queries"]
+            aliases[alias]["ms"] += stats["ms"]
+            aliases[alias]["requests"] += 1
+            route["queries"] += stats["queries"]
+            route["db_ms"] += stats["ms"]
+        for item in rec["repeated"]:
+            entry = repeated[(item["alias"], item["shape"])]
+            entry["requests"] += 1
+            entry["max_count"] = max(entry["max_count"], item["count"])
+            entry["routes"].add(rec["route"])
+
+    by_route = sorted(
+        (
+            {
+                "method": method,
+                "route": route,
+                "requests": s["requests"],
+                "avg_queries": s["queries"] / s["requests"],
+                "avg_db_ms": s["db_ms"] / s["requests"],
+                "avg_ms": s["ms"] / s["requests"],
+            }
+            for (method, route), s in routes.items()
+        ),
+        key=lambda r: -r["avg_queries"],
+    )
+    by_shape = sorted(
+        (
+            {"alias": alias, "shape": shape, "requests": s["requests"], "max_count": s["max_count"], "routes": sorted(s["routes"])}
+            for (alias, shape), s in repeated.items()
+        ),
+        key=lambda r: (-r["max_count"], -r["requests"]),
+    )
+    return {
+        "requests": len(history),
+        "aliases": dict(aliases),
+        "routes": by_route[:top],
+        "repeated_queries": by_shape[:top],
+    }
+
+
+def clear():
+    with _lock:
+        _history.clear()
@@ -0,0 +1,12 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.users import forget_users
+
+User = get_user_model()
+
+
+@receiver([post_save, post_delete], sender=User, dispatch_uid="core_forget_user_record")
+def _forget_user_record(sender, instance, **kwargs):
+    forget_users(instance.pk)
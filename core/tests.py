@@ -22,3 +22,389 @@ class AuthFlowTests(TestCase):
         # logout
         res3 = self.client.post("/api/auth/logout/", data="{}", content_type="application/json")
         self.assertEqual(res3.status_code, 200)
+
+
+class JWTUserCacheTests(TestCase):
+    def setUp(self):
+        from core import user_cache
+        from core.jwt_utils import create_access_token
+
+        user_cache.clear()
+        self.user = User.objects.create_user(email="c@test.com", password="x-Strong-pass-42")
+        self.client.cookies["access_token"] = create_access_token(self.user)
+
+    def test_cache_hit_skips_db(self):
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 200)
+        with self.assertNumQueries(0):
+            res = self.client.get("/api/auth/me/")
+        self.assertEqual(res.json()["user"]["email"], "c@test.com")
+
+    def test_logout_invalidates_cached_user(self):
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 200)
+        token = self.client.cookies["access_token"].value
+
+        self.client.post("/api/auth/logout/", data="{}", content_type="application/json")
+
+        self.client.cookies["access_token"] = token
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 401)
+
+    def test_fast_verify_returns_user_headers_without_db(self):
+        self.client.get("/api/auth/verify/")
+        with self.assertNumQueries(0):
+            res = self.client.get("/api/auth/verify/")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res["X-User-Email"], "c@test.com")
+
+        self.client.cookies["access_token"] = "garbage"
+        self.assertEqual(self.client.get("/api/auth/verify/").status_code, 401)
+
+
+class LazyURLResolverTests(TestCase):
+    def test_urlconf_is_imported_on_first_match(self):
+        from core import views
+        from core.lazy_urls import LazyURLResolver
+
+        resolver = LazyURLResolver("lazy/", "core.urls")
+        self.assertIsNone(resolver.namespace)
+        self.assertEqual(len(resolver.reverse_dict), 0)
+        self.assertFalse(resolver.loaded)
+
+        match = resolver.resolve("lazy/health/")
+        self.assertTrue(resolver.loaded)
+        self.assertEqual(match.func, views.health)
+        self.assertIn(views.health, resolver.reverse_dict)
+
+
+class DatabaseConfigTests(TestCase):
+    def test_configure_database_sets_persistent_connections(self):
+        from core.db_pool import configure_database
+
+        mysql = configure_database({"ENGINE": "django.db.backends.mysql"}, max_age=120)
+        self.assertEqual(mysql["CONN_MAX_AGE"], 120)
+        self.assertTrue(mysql["CONN_HEALTH_CHECKS"])
+        self.assertEqual(mysql["OPTIONS"]["connect_timeout"], 5)
+
+        sqlite = configure_database({"ENGINE": "django.db.backends.sqlite3"}, max_age=60, health_checks=False)
+        self.assertFalse(sqlite["CONN_HEALTH_CHECKS"])
+        self.assertNotIn("OPTIONS", sqlite)
+
+    def test_asgi_refuses_persistent_connections(self):
+        from django.core.exceptions import ImproperlyConfigured
+
+        from core.db_pool import configure_database
+
+        self.assertEqual(configure_database({"ENGINE": "django.db.backends.mysql"}, max_age=0, asgi=True)["CONN_MAX_AGE"], 0)
+        with self.assertRaises(ImproperlyConfigured):
+            configure_database({"ENGINE": "django.db.backends.mysql"}, max_age=60, asgi=True)
+
+
+class QueryProfilerTests(TestCase):
+    def test_server_timing_and_staff_report(self):
+        from django.conf import settings
+        from django.test import override_settings
+
+        from core import query_profiler, user_cache
+        from core.jwt_utils import create_access_token
+
+        self.assertEqual(
+            query_profiler.query_shape("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x' LIMIT 21"),
+            "SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?",
+        )
+
+        user_cache.clear()
+        query_profiler.clear()
+        staff = User.objects.create_user(email="s@test.com", password="x-Strong-pass-42", is_staff=True)
+        self.client.cookies["access_token"] = create_access_token(staff)
+        middleware = ["core.query_profiler.QueryProfilerMiddleware", *settings.MIDDLEWARE]
+
+        with override_settings(MIDDLEWARE=middleware):
+            res = self.client.get("/api/auth/me/")
+            self.assertIn("db-default;", res["Server-Timing"])
+
+            report = self.client.get("/api/debug/queries/").json()
+        self.assertEqual(report["requests"], 1)
+        self.assertGreaterEqual(report["aliases"]["default"]["queries"], 1)
+        self.assertEqual(report["routes"][0]["route"], "api/auth/me/")
+
+
+class AsyncHTTPClientTests(TestCase):
+    def test_one_client_per_event_loop(self):
+        import asyncio
+
+        from core import async_http
+
+        async def twice():
+            first, second = async_http.get_client(), async_http.get_client()
+            await async_http.aclose()
+            return first, second
+
+        a1, a2 = asyncio.run(twice())
+        b1, _ = asyncio.run(twice())
+        self.assertIs(a1, a2)
+        self.assertIsNot(a1, b1)
+        self.assertTrue(a1.is_closed)
+
+    def test_wsgi_mode_closes_clients(self):
+        import asyncio
+
+        from asgiref.sync import async_to_sync
+        from django.test import override_settings
+
+        from core import async_http
+
+        async def view():
+            async with async_http.client() as client:
+                return client
+
+        with override_settings(ASYNC_HTTP_SHARED_CLIENT=False):
+            clients = [async_to_sync(view)() for _ in range(3)]
+        self.assertTrue(all(c.is_closed for c in clients))
+
+        async def shared():
+            async with async_http.client() as first, async_http.client() as second:
+                self.assertIs(first, second)
+            self.assertFalse(first.is_closed)
+            await async_http.aclose()
+
+        with override_settings(ASYNC_HTTP_SHARED_CLIENT=True):
+            asyncio.run(shared())
+
+    def test_fast_verify_under_async_client(self):
+        import asyncio
+
+        from django.test import AsyncClient
+
+        res = asyncio.run(AsyncClient().get("/api/auth/verify/"))
+        self.assertEqual(res.status_code, 401)
+
+
+class HTTPClientTests(TestCase):
+    def setUp(self):
+        from core import http_client
+
+        http_client.reset()
+        self.addCleanup(http_client.reset)
+
+    def test_keep_alive_and_metrics(self):
+        from core import http_client
+        from core.upstream_stub import SlowUpstream
+
+        with SlowUpstream(delay=0) as upstream:
+            for _ in range(3):
+                self.assertEqual(http_client.get(upstream.url, upstream="stub").status_code, 200)
+        self.assertEqual(upstream.connections, 1)
+        stats = http_client.snapshot()["stub"]
+        self.assertEqual((stats["state"], stats["requests"], stats["failures"]), ("closed", 3, 0))
+        self.assertIn("p95", stats["latency_ms"])
+
+    def test_retries_then_breaker_fails_fast(self):
+        import httpx
+        import requests
+        from django.test import override_settings
+
+        from core import http_client
+        from core.upstream_stub import SlowUpstream
+
+        with SlowUpstream(delay=0, status=503) as upstream, override_settings(
+            HTTP_CLIENT_MAX_RETRIES=2, HTTP_CLIENT_BACKOFF_SECONDS=0, HTTP_CLIENT_BREAKER_THRESHOLD=3
+        ):
+            self.assertEqual(http_client.get(upstream.url, upstream="stub").status_code, 503)
+            self.assertEqual(upstream.requests, 3)
+
+            with self.assertRaises(requests.ConnectionError):
+                http_client.get(upstream.url, upstream="stub")
+            with self.assertRaises(httpx.HTTPError):
+                import asyncio
+
+                asyncio.run(http_client.aget(upstream.url, upstream="stub"))
+            self.assertEqual(upstream.requests, 3)
+
+            # POSTs are not retried.
+            http_client.reset()
+            self.assertEqual(http_client.post(upstream.url, upstream="stub").status_code, 501)
+
+        stats = http_client.snapshot()["stub"]
+        self.assertEqual(stats["retries"], 0)
+
+    def test_half_open_trial_closes_breaker(self):
+        from core.http_client import CircuitBreaker
+
+        breaker = CircuitBreaker(threshold=2, reset_after=0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "closed")
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+
+class TieredCacheTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_local_tier_serves_until_local_timeout(self):
+        from django.core.cache import cache, caches
+
+        cache.set("k", {"v": 1}, 60)
+        self.assertEqual(caches["shared"].get("k"), {"v": 1})
+
+        # Another process changed the shared value: this one keeps its copy until LOCAL_TIMEOUT.
+        caches["shared"].set("k", {"v": 2}, 60)
+        self.assertEqual(cache.get("k"), {"v": 1})
+        cache.clear_local()
+        self.assertEqual(cache.get("k"), {"v": 2})
+
+        value = cache.get("k")
+        value["v"] = 3
+        self.assertEqual(cache.get("k"), {"v": 2})
+
+        cache.delete("k")
+        self.assertIsNone(cache.get("k"))
+        self.assertEqual(cache.get_many(["k", "missing"]), {})
+
+    def test_memoize_with_tags(self):
+        from core.cache import invalidate_tags, memoize
+
+        calls = []
+
+        @memoize(timeout=60, tags=lambda item_id: [f"item:{item_id}", "items"])
+        def load(item_id):
+            calls.append(item_id)
+            return {"id": item_id, "n": len(calls)}
+
+        self.assertEqual(load(1), {"id": 1, "n": 1})
+        self.assertEqual(load(1), {"id": 1, "n": 1})
+        self.assertEqual(load(2)["n"], 2)
+
+        invalidate_tags("item:1")
+        self.assertEqual(load(1)["n"], 3)
+        self.assertEqual(load(2)["n"], 2)
+
+        invalidate_tags("items")
+        self.assertEqual(load(2)["n"], 4)
+
+        load.invalidate(2)
+        self.assertEqual(load(2)["n"], 5)
+        self.assertEqual(calls, [1, 2, 1, 2, 2])
+
+    def test_memoize_key_leaves_out_callback(self):
+        from core.cache import memoize
+
+        @memoize(timeout=60, key=lambda name, build: name)
+        def load(name, build):
+            return build()
+
+        self.assertEqual(load("a", lambda: 1), 1)
+        self.assertEqual(load("a", lambda: 2), 1)
+        self.assertEqual(load("b", lambda: 3), 3)
+
+    def test_tag_version_changes_on_invalidate(self):
+        from core.cache import invalidate_tags, tag_version
+
+        version = tag_version("items")
+        self.assertEqual(tag_version("items"), version)
+        invalidate_tags("items")
+        self.assertNotEqual(tag_version("items"), version)
+
+
+class UserBatchTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.users = [
+            User.objects.create_user(email=f"u{i}@test.com", password="x-Strong-pass-42", first_name=f"U{i}")
+            for i in range(3)
+        ]
+
+    def test_get_users_one_query_then_cached(self):
+        from core.users import get_users
+
+        ids = [u.id for u in self.users] + ["not-a-uuid", "00000000-0000-0000-0000-000000000000"]
+        with self.assertNumQueries(1):
+            records = get_users(ids)
+        self.assertEqual(set(records), {str(u.id) for u in self.users})
+        self.assertEqual(records[str(self.users[0].id)]["display_name"], "U0")
+
+        with self.assertNumQueries(0):
+            get_users(u.id for u in self.users)
+
+        self.users[1].first_name = "Renamed"
+        self.users[1].save()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_users([self.users[1].id])[str(self.users[1].id)]["first_name"], "Renamed")
+
+    def test_users_endpoint(self):
+        from core.jwt_utils import create_access_token
+
+        url = "/api/users/?ids=" + ",".join(str(u.id) for u in self.users[:2])
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+        self.client.cookies["access_token"] = create_access_token(self.users[2])
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(set(res.json()["users"]), {str(u.id) for u in self.users[:2]})
+        self.assertNotIn("email", res.json()["users"][str(self.users[0].id)])
+
+
+class GeoTests(TestCase):
+    # Tehran -> Isfahan is about 340 km along the great circle.
+    TEHRAN = (35.6892, 51.3890)
+    ISFAHAN = (32.6546, 51.6680)
+
+    def test_scalar_and_vectorized_agree(self):
+        from core import geo
+
+        d = geo.haversine_km(*self.TEHRAN, *self.ISFAHAN)
+        self.assertAlmostEqual(d, 338.0, delta=3)
+        self.assertEqual(geo.haversine_km(*self.TEHRAN, *self.TEHRAN), 0.0)
+
+        many = geo.distances_km(*self.TEHRAN, [self.ISFAHAN[0], self.TEHRAN[0]], [self.ISFAHAN[1], self.TEHRAN[1]])
+        self.assertAlmostEqual(float(many[0]), d, places=6)
+        self.assertAlmostEqual(float(many[1]), 0.0, places=6)
+
+        matrix = geo.distance_matrix_km(
+            [self.TEHRAN[0], self.ISFAHAN[0]], [self.TEHRAN[1], self.ISFAHAN[1]],
+            [self.ISFAHAN[0]], [self.ISFAHAN[1]],
+        )
+        self.assertEqual(matrix.shape, (2, 1))
+        self.assertAlmostEqual(float(matrix[0, 0]), d, places=6)
+
+    def test_bounding_box_contains_circle(self):
+        import math
+
+        from core import geo
+
+        lat, lng, radius = *self.TEHRAN, 10.0
+        box = geo.bounding_box(lat, lng, radius)
+        # Points just inside the circle due north and due east must be inside the box.
+        km_per_degree = math.radians(geo.EARTH_RADIUS_KM)
+        north = lat + 9.99 / km_per_degree
+        self.assertLess(geo.haversine_km(lat, lng, north, lng), radius)
+        self.assertTrue(geo.in_bounding_box([north], [lng], box)[0])
+        east = lng + 9.99 / (km_per_degree * math.cos(math.radians(lat)))
+        self.assertLess(geo.haversine_km(lat, lng, lat, east), radius)
+        self.assertTrue(geo.in_bounding_box([lat], [east], box)[0])
+        self.assertFalse(geo.in_bounding_box([lat + 1], [lng], box)[0])
+
+    def test_within_radius_matches_scalar_scan(self):
+        import numpy as np
+
+        from core import geo
+
+        rng = np.random.default_rng(7)
+        lats = self.TEHRAN[0] + rng.uniform(-0.3, 0.3, 2000)
+        lngs = self.TEHRAN[1] + rng.uniform(-0.3, 0.3, 2000)
+        idx, km = geo.within_radius(*self.TEHRAN, lats, lngs, 8.0)
+
+        expected = sorted(
+            (d, i) for i in range(len(lats)) if (d := geo.haversine_km(*self.TEHRAN, lats[i], lngs[i])) <= 8.0
+        )
+        self.assertEqual(idx.tolist(), [i for _, i in expected])
+        self.assertTrue(np.all(np.diff(km) >= 0))
+        self.assertEqual(geo.within_radius(*self.TEHRAN, [], [], 8.0)[0].size, 0)
@@ -0,0 +1,73 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Answers every Neshan endpoint the async views call with something they accept.
+_PAYLOAD = {
+    "status": "Ok",
+    "rows": [{"elements": [{"distance": {"value": 1200}, "duration": {"value": 300}}]}],
+    "origin_addresses": ["origin"],
+    "destination_addresses": ["destination"],
+    "points": [{"name": "a", "location": [51.4, 35.7], "index": 0}],
+    "routes": [{"legs": [{"distance": {"value": 1200}, "duration": {"value": 300}}]}],
+}
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class SlowUpstream:
+    """
+    A local HTTP server that sleeps `delay` seconds before answering every GET with a canned
+    Neshan-shaped JSON body and the given `status`. Used as a stand-in for a degraded upstream
+    in load tests; `requests` and `connections` count what it has accepted:
+
+        with SlowUpstream(delay=0.5) as upstream:
+            ...  # point NESHAN_API_BASE at upstream.url
+    """
+
+    def __init__(self, delay=0.5, status=200):
+        self.delay = delay
+        self.status = status
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                with stub._lock:
+                    stub.connections += 1
+                super().setup()
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                time.sleep(stub.delay)
+                body = json.dumps(_PAYLOAD).encode()
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _Server(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
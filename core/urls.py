@@ -9,4 +9,7 @@ urlpatterns = [
     path("auth/me/", views.me),
     path("auth/verify/", views.verify),
     path("health/", views.health),
+    path("users/", views.users_batch),
+    path("debug/queries/", views.query_report),
+    path("debug/upstreams/", views.upstream_report),
 ]
\ No newline at end of file
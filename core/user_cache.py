@@ -0,0 +1,67 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+_lock = threading.Lock()
+_users: "OrderedDict[str, tuple[float, object]]" = OrderedDict()
+
+
+def _now() -> float:
+    return time.monotonic()
+
+
+def get_cached_user(user_id):
+    """
+    Return the active user with the given id, served from a per-process cache.
+    The returned instance is shared between requests and must be treated as read-only.
+    """
+    if not user_id:
+        return None
+
+    key = str(user_id)
+    ttl = settings.JWT_USER_CACHE_TTL_SECONDS
+
+    if ttl > 0:
+        with _lock:
+            entry = _users.get(key)
+            if entry is not None:
+                expires_at, user = entry
+                if expires_at > _now():
+                    _users.move_to_end(key)
+                    return user
+                del _users[key]
+
+    user = User.objects.filter(id=user_id, is_active=True).first()
+
+    if ttl > 0:
+        with _lock:
+            _users[key] = (_now() + ttl, user)
+            _users.move_to_end(key)
+            while len(_users) > settings.JWT_USER_CACHE_MAX_ENTRIES:
+                _users.popitem(last=False)
+
+    return user
+
+
+def get_active_user(user_id):
+    """Like get_cached_user, but returns a private copy the caller may mutate."""
+    user = get_cached_user(user_id)
+    return copy.copy(user) if user is not None else None
+
+
+def invalidate_user(user_id) -> None:
+    if not user_id:
+        return
+    with _lock:
+        _users.pop(str(user_id), None)
+
+
+def clear() -> None:
+    with _lock:
+        _users.clear()
@@ -0,0 +1,76 @@
+"""
+Compact user records for other teams: resolve many user ids in one query, cached per user.
+
+    from core.users import get_users
+
+    users = get_users(c.submitted_by_id for c in contributions)
+    users.get(str(c.submitted_by_id), {}).get("email")
+"""
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+User = get_user_model()
+
+RECORD_FIELDS = ("id", "email", "first_name", "last_name")
+
+
+def _key(user_id: str) -> str:
+    return f"core:user:{user_id}"
+
+
+def _normalize(user_id):
+    try:
+        return str(user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id)))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def user_record(user) -> dict:
+    full_name = f"{user.first_name} {user.last_name}".strip()
+    return {
+        "id": str(user.id),
+        "email": user.email,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "display_name": full_name or user.email,
+    }
+
+
+def public_record(record: dict) -> dict:
+    """`record` without the email, for other users to see (/api/users/)."""
+    full_name = f"{record['first_name']} {record['last_name']}".strip()
+    return {
+        "id": record["id"],
+        "first_name": record["first_name"],
+        "last_name": record["last_name"],
+        "display_name": full_name,
+    }
+
+
+def get_users(ids) -> dict:
+    """
+    Map each known id (as a string) to its record; unknown or malformed ids are left out.
+    Misses are loaded from the default database with a single query.
+    """
+    wanted = {n for n in map(_normalize, ids) if n}
+    if not wanted:
+        return {}
+
+    cached = cache.get_many([_key(i) for i in wanted])
+    records = {r["id"]: r for r in cached.values()}
+    missing = wanted - records.keys()
+    if missing:
+        loaded = {
+            str(u.id): user_record(u)
+            for u in User.objects.using("default").filter(id__in=missing).only(*RECORD_FIELDS)
+        }
+        cache.set_many({_key(i): r for i, r in loaded.items()}, settings.USER_RECORD_CACHE_TTL_SECONDS)
+        records.update(loaded)
+    return records
+
+
+def forget_users(*ids) -> None:
+    cache.delete_many([_key(n) for n in map(_normalize, ids) if n])
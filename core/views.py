@@ -9,9 +9,13 @@ from django.contrib.auth.password_validation import validate_password
 
 from core.jwt_utils import create_access_token, create_refresh_token, decode_token
 from core.auth import api_login_required
+from core.user_cache import invalidate_user
+from core.users import get_users, public_record
 
 User = get_user_model()
 
+USERS_BATCH_MAX = 200
+
 
 def _set_auth_cookies(resp: JsonResponse, access: str, refresh: str, settings):
     resp.set_cookie(
@@ -177,6 +181,7 @@ def logout_api(request):
     if user and getattr(user, "is_authenticated", False):
         user.token_version += 1
         user.save(update_fields=["token_version"])
+        invalidate_user(user.id)
 
     resp = JsonResponse({"ok": True})
     _clear_auth_cookies(resp, settings)
@@ -199,3 +204,43 @@ def verify(request):
     resp["X-User-Last-Name"] = u.last_name or ""
     resp["X-User-Age"] = str(u.age or "")
     return resp
+
+
+@api_login_required
+def users_batch(request):
+    ids = [i for i in request.GET.get("ids", "").split(",") if i.strip()]
+    if len(ids) > USERS_BATCH_MAX:
+        return JsonResponse({"detail": f"At most {USERS_BATCH_MAX} ids per request"}, status=400)
+    users = get_users(i.strip() for i in ids)
+    # Any signed-in user may call this: no emails.
+    return JsonResponse({"users": {i: public_record(r) for i, r in users.items()}})
+
+
+@api_login_required
+def query_report(request):
+    if not request.user.is_staff:
+        return JsonResponse({"detail": "Staff only"}, status=403)
+
+    from core import query_profiler
+
+    if request.method == "DELETE":
+        query_profiler.clear()
+        return JsonResponse({"ok": True})
+    try:
+        top = int(request.GET.get("top", 20))
+    except ValueError:
+        top = 20
+    return JsonResponse(query_profiler.build_report(top=top))
+
+
+@api_login_required
+def upstream_report(request):
+    if not request.user.is_staff:
+        return JsonResponse({"detail": "Staff only"}, status=403)
+
+    from core import http_client
+
+    if request.method == "DELETE":
+        http_client.reset()
+        return JsonResponse({"ok": True})
+    return JsonResponse({"upstreams": http_client.snapshot()})
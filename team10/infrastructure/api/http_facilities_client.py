@@ -3,13 +3,14 @@ HTTP implementation of FacilitiesServicePort calling Team 4 Facilities API.
 Uses api_integration_guide.json: SearchRegions, GetPlacesInRegion, GetNearbyPlaces, GetPlaceByIds.
 GetTravelEstimates is not implemented by the API; we compute a local estimate.
 """
-import math
 import logging
 from typing import List, Optional
 from datetime import datetime
 
 import requests
 
+from core import geo, http_client
+
 from ..ports.facilities_service_port import FacilitiesServicePort
 from ..models.region import Region
 from ..models.search_criteria import SearchCriteria
@@ -48,12 +49,11 @@ class HttpFacilitiesClient(FacilitiesServicePort):
     def __init__(self, base_url: str = "http://localhost:8000", timeout: int = 10):
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
-        self._session = requests.Session()
 
     def _get(self, path: str, params: Optional[dict] = None) -> Optional[dict]:
         url = f"{self.base_url}{path}"
         try:
-            r = self._session.get(url, params=params, timeout=self.timeout)
+            r = http_client.get(url, upstream="facilities", params=params, timeout=self.timeout)
             r.raise_for_status()
             return r.json()
         except requests.RequestException as e:
@@ -63,7 +63,7 @@ class HttpFacilitiesClient(FacilitiesServicePort):
     def _post(self, path: str, json: Optional[dict] = None, params: Optional[dict] = None) -> Optional[dict]:
         url = f"{self.base_url}{path}"
         try:
-            r = self._session.post(url, json=json or {}, params=params, timeout=self.timeout)
+            r = http_client.post(url, upstream="facilities", json=json or {}, params=params, timeout=self.timeout)
             r.raise_for_status()
             return r.json()
         except requests.RequestException as e:
@@ -187,7 +187,7 @@ class HttpFacilitiesClient(FacilitiesServicePort):
                 transport_mode=TransportMode.TAXI,
                 estimated_cost=200000.0,
             )
-        distance_km = self._haversine_km(from_f.latitude, from_f.longitude, to_f.latitude, to_f.longitude)
+        distance_km = geo.haversine_km(from_f.latitude, from_f.longitude, to_f.latitude, to_f.longitude)
         if distance_km <= 1.0:
             transport_mode = TransportMode.WALKING
             duration_minutes = max(5, int(distance_km * 12))
@@ -209,16 +209,6 @@ class HttpFacilitiesClient(FacilitiesServicePort):
             estimated_cost=float(int(estimated_cost)),
         )
 
-    @staticmethod
-    def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-        R = 6371
-        lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        return R * c
-
     @staticmethod
     def _normalize_category(raw: str) -> str:
         """Map API category (e.g. هتل, hotel) to our facility_type (HOTEL, RESTAURANT, ATTRACTION)."""
@@ -8,6 +8,8 @@ from typing import List
 
 import requests
 
+from core import http_client
+
 from ..ports.recommendation_service_port import RecommendationServicePort
 from ..models.recommended_place import RecommendedPlace
 from ...domain.enums.season import Season
@@ -36,7 +38,6 @@ class HttpRecommendationClient(RecommendationServicePort):
         self.default_budget_level = default_budget_level
         self.default_trip_duration_days = default_trip_duration_days
         self.limit_places = min(50, max(1, limit_places))
-        self._session = requests.Session()
 
     def get_recommendations(
         self,
@@ -59,7 +60,7 @@ class HttpRecommendationClient(RecommendationServicePort):
         }
         url = f"{self.base_url}{path}"
         try:
-            r = self._session.get(url, params=params, timeout=self.timeout)
+            r = http_client.get(url, upstream="recommendation", params=params, timeout=self.timeout)
             r.raise_for_status()
             data = r.json()
         except requests.RequestException as e:
@@ -1,4 +1,4 @@
-import math
+import numpy as np
 from typing import List, Dict, Optional
 
 # External services - will be implemented by Mohammad Hossein
@@ -160,27 +160,21 @@ class AlternativesProvider:
     ) -> List[Dict]:
         """Rank places by distance from reference point"""
 
-        def haversine(lat1, lon1, lat2, lon2):
-            """Calculate distance between two points in km"""
-            R = 6371  # Earth radius in kilometers
-            dlat = math.radians(lat2 - lat1)
-            dlon = math.radians(lon2 - lon1)
-            a = (math.sin(dlat / 2) ** 2 +
-                 math.cos(math.radians(lat1)) *
-                 math.cos(math.radians(lat2)) *
-                 math.sin(dlon / 2) ** 2)
-            c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-            return R * c
-
-        # Calculate distance for each place
+        located = [p for p in places if p.get('lat') and p.get('lng')]
         for place in places:
-            if place.get('lat') and place.get('lng'):
-                place['distance'] = haversine(
-                    ref_lat, ref_lng,
-                    place['lat'], place['lng']
-                )
-            else:
-                place['distance'] = float('inf')
+            place['distance'] = float('inf')
+
+        # Calculate the distance to every located place at once (Haversine, km)
+        if located:
+            R = 6371  # Earth radius in kilometers
+            lat1, lon1 = np.radians(ref_lat), np.radians(ref_lng)
+            lat2 = np.radians([float(p['lat']) for p in located])
+            lon2 = np.radians([float(p['lng']) for p in located])
+            a = (np.sin((lat2 - lat1) / 2) ** 2 +
+                 np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+            distances = 2 * R * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+            for place, distance in zip(located, distances):
+                place['distance'] = float(distance)
 
         # Sort by distance
         return sorted(places, key=lambda p: p['distance'])
@@ -4,6 +4,8 @@
 import logging
 from django.conf import settings
 
+from core import http_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,17 +41,11 @@ def _user_from_request(request):
 
 def _fetch_user_from_core(request, base_url):
     """فراخوانی Core برای دریافت وضعیت کاربر با ارسال کوکی."""
-    try:
-        import requests
-    except ImportError:
-        logger.warning("برای فراخوانی Core، پکیج requests لازم است.")
-        return _user_from_request(request)
-
     url = f"{base_url}/api/auth/me/"
     cookies = dict(request.COOKIES) if request.COOKIES else {}
     headers = {"Accept": "application/json"}
     try:
-        resp = requests.get(url, cookies=cookies, headers=headers, timeout=3)
+        resp = http_client.get(url, upstream="core", cookies=cookies, headers=headers, timeout=3)
         if resp.status_code != 200:
             return None
         data = resp.json()
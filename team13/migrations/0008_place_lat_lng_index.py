@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-18 06:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team13', '0007_comment_is_approved_image_is_approved'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='place',
+            index=models.Index(fields=['latitude', 'longitude'], name='team13_place_lat_lng_idx'),
+        ),
+    ]
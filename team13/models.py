@@ -35,6 +35,9 @@ class Place(models.Model):
     class Meta:
         app_label = "team13"
         db_table = "team13_places"
+        indexes = [
+            models.Index(fields=["latitude", "longitude"], name="team13_place_lat_lng_idx"),
+        ]
 
     def __str__(self):
         return f"{self.get_type_display()} — {self.city or 'بدون شهر'}"
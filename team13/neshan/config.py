@@ -3,9 +3,12 @@
 # دو کلید: service (فراخوانی از بک‌اند)، web (برای فرانت/نقشه در صورت نیاز).
 
 import os
+from functools import lru_cache
 from pathlib import Path
 
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 
 
 def _env_file_paths():
@@ -78,6 +81,21 @@ def is_configured():
 
 # آدرس پایهٔ API — مستندات: https://platform.neshan.org/docs/api/routing-category/routing/
 NESHAN_API_BASE = "https://api.neshan.org"
+
+
+@lru_cache(maxsize=None)
+def get_api_base():
+    """آدرس پایهٔ API نشان؛ با NESHAN_API_BASE در settings/.env قابل تغییر است (مثلاً سرویس ساختگی در تست بار).
+    یک بار خوانده می‌شود تا هر درخواست فایل .env را دوباره نخواند."""
+    return _get_setting("NESHAN_API_BASE", "NESHAN_API_BASE", NESHAN_API_BASE).rstrip("/")
+
+
+@receiver(setting_changed)
+def _reset_api_base(setting, **kwargs):
+    # override_settings در تست‌ها و bench_slow_upstream
+    if setting == "NESHAN_API_BASE":
+        get_api_base.cache_clear()
+
 # مسیریابی با ترافیک (خودرو/موتور): نوع وسیله type=car|motorcycle اجباری است.
 NESHAN_DIRECTION_PATH = "/v4/direction"
 # مسیریابی بدون ترافیک (فقط خودرو): https://platform.neshan.org/docs/api/routing-category/noTraffic-routing-api/
@@ -4,10 +4,13 @@
 # بدون ترافیک: GET https://api.neshan.org/v1/distance-matrix/no-traffic
 
 import logging
+
+from core import http_client
+
 from .config import (
     get_api_key,
     is_configured,
-    NESHAN_API_BASE,
+    get_api_base,
     NESHAN_DISTANCE_MATRIX_PATH,
     NESHAN_DISTANCE_MATRIX_NO_TRAFFIC_PATH,
 )
@@ -36,6 +39,33 @@ def _points_to_string(points):
     return "|".join(parts) if parts else ""
 
 
+def _distance_matrix_request(origins, destinations, vehicle_type=TYPE_CAR, no_traffic=False):
+    """(url, params) برای ماتریس فاصله؛ اگر مبدأ یا مقصد خالی باشد None."""
+    if vehicle_type not in (TYPE_CAR, TYPE_MOTORCYCLE):
+        vehicle_type = TYPE_CAR
+    origins_str = _points_to_string(origins) if not isinstance(origins, str) else origins
+    destinations_str = _points_to_string(destinations) if not isinstance(destinations, str) else destinations
+    if not origins_str or not destinations_str:
+        return None
+    path = NESHAN_DISTANCE_MATRIX_NO_TRAFFIC_PATH if no_traffic else NESHAN_DISTANCE_MATRIX_PATH
+    params = {
+        "type": vehicle_type,
+        "origins": origins_str,
+        "destinations": destinations_str,
+    }
+    return f"{get_api_base()}{path}", params
+
+
+def _parse_distance_matrix(resp):
+    if resp.status_code != 200:
+        logger.debug("Neshan distance-matrix HTTP %s: %s", resp.status_code, resp.text[:200])
+        return None
+    data = resp.json()
+    if data.get("status") != "Ok":
+        return None
+    return data
+
+
 def fetch_distance_matrix(origins, destinations, vehicle_type=TYPE_CAR, no_traffic=False):
     """
     ماتریس فاصله و زمان بین نقاط مبدأ و مقصد.
@@ -48,31 +78,31 @@ def fetch_distance_matrix(origins, destinations, vehicle_type=TYPE_CAR, no_traff
     """
     if not is_configured():
         return None
-    api_key = get_api_key()
-    if vehicle_type not in (TYPE_CAR, TYPE_MOTORCYCLE):
-        vehicle_type = TYPE_CAR
-    origins_str = _points_to_string(origins) if not isinstance(origins, str) else origins
-    destinations_str = _points_to_string(destinations) if not isinstance(destinations, str) else destinations
-    if not origins_str or not destinations_str:
+    request = _distance_matrix_request(origins, destinations, vehicle_type, no_traffic)
+    if request is None:
+        return None
+    url, params = request
+    try:
+        headers = {"Api-Key": get_api_key()}
+        resp = http_client.get(url, upstream="neshan", params=params, headers=headers, timeout=20)
+        return _parse_distance_matrix(resp)
+    except Exception as e:
+        logger.debug("Neshan distance-matrix failed: %s", e)
+        return None
+
+
+async def afetch_distance_matrix(origins, destinations, vehicle_type=TYPE_CAR, no_traffic=False):
+    """نسخهٔ async از fetch_distance_matrix."""
+    if not is_configured():
+        return None
+    request = _distance_matrix_request(origins, destinations, vehicle_type, no_traffic)
+    if request is None:
         return None
+    url, params = request
     try:
-        import requests
-        path = NESHAN_DISTANCE_MATRIX_NO_TRAFFIC_PATH if no_traffic else NESHAN_DISTANCE_MATRIX_PATH
-        url = f"{NESHAN_API_BASE.rstrip('/')}{path}"
-        params = {
-            "type": vehicle_type,
-            "origins": origins_str,
-            "destinations": destinations_str,
-        }
-        headers = {"Api-Key": api_key}
-        resp = requests.get(url, params=params, headers=headers, timeout=20)
-        if resp.status_code != 200:
-            logger.debug("Neshan distance-matrix HTTP %s: %s", resp.status_code, resp.text[:200])
-            return None
-        data = resp.json()
-        if data.get("status") != "Ok":
-            return None
-        return data
+        headers = {"Api-Key": get_api_key()}
+        resp = await http_client.aget(url, upstream="neshan", params=params, headers=headers, timeout=20)
+        return _parse_distance_matrix(resp)
     except Exception as e:
         logger.debug("Neshan distance-matrix failed: %s", e)
         return None
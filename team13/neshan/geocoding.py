@@ -6,8 +6,10 @@ import json
 import logging
 from urllib.parse import quote
 
+from core import http_client
+
 from .config import (
-    NESHAN_API_BASE,
+    get_api_base,
     NESHAN_GEOCODING_PATH,
     NESHAN_GEOCODING_PLUS_PATH,
     NESHAN_REVERSE_PATH,
@@ -34,11 +36,10 @@ def reverse_geocode(lat, lng):
         return None
     api_key = get_api_key()
     try:
-        import requests
-        url = f"{NESHAN_API_BASE.rstrip('/')}{NESHAN_REVERSE_PATH}"
+        url = f"{get_api_base()}{NESHAN_REVERSE_PATH}"
         params = {"lat": lat_f, "lng": lng_f}
         headers = {"Api-Key": api_key}
-        resp = requests.get(url, params=params, headers=headers, timeout=10)
+        resp = http_client.get(url, upstream="neshan", params=params, headers=headers, timeout=10)
         if resp.status_code != 200:
             logger.debug("Neshan reverse HTTP %s: %s", resp.status_code, resp.text[:200])
             return None
@@ -118,14 +119,13 @@ def geocode(
             except (TypeError, ValueError, AttributeError):
                 pass
     path = NESHAN_GEOCODING_PLUS_PATH if plus else NESHAN_GEOCODING_PATH
-    base = NESHAN_API_BASE.rstrip("/")
+    base = get_api_base()
     json_str = json.dumps(payload, ensure_ascii=False)
     url = f"{base}{path}?json={quote(json_str)}"
     api_key = get_api_key()
     try:
-        import requests
         headers = {"Api-Key": api_key, "Content-Type": "application/json"}
-        resp = requests.get(url, headers=headers, timeout=10)
+        resp = http_client.get(url, upstream="neshan", headers=headers, timeout=10)
         if resp.status_code != 200:
             logger.debug("Neshan geocode HTTP %s: %s", resp.status_code, resp.text[:200])
             return None
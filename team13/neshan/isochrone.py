@@ -3,7 +3,10 @@
 # Endpoint: GET https://api.neshan.org/v1/isochrone
 
 import logging
-from .config import get_api_key, is_configured, NESHAN_API_BASE, NESHAN_ISOCHRONE_PATH
+
+from core import http_client
+
+from .config import get_api_key, is_configured, get_api_base, NESHAN_ISOCHRONE_PATH
 
 logger = logging.getLogger(__name__)
 
@@ -49,10 +52,9 @@ def fetch_isochrone(lat, lng, distance_km=None, time_minutes=None, polygon=False
     if denoise is not None and 0 <= denoise <= 1:
         params["denoise"] = denoise
     try:
-        import requests
-        url = f"{NESHAN_API_BASE.rstrip('/')}{NESHAN_ISOCHRONE_PATH}"
+        url = f"{get_api_base()}{NESHAN_ISOCHRONE_PATH}"
         headers = {"Api-Key": api_key}
-        resp = requests.get(url, params=params, headers=headers, timeout=20)
+        resp = http_client.get(url, upstream="neshan", params=params, headers=headers, timeout=20)
         if resp.status_code != 200:
             logger.debug("Neshan isochrone HTTP %s: %s", resp.status_code, resp.text[:200])
             return None
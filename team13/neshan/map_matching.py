@@ -4,7 +4,10 @@
 # Body: JSON { "path": "lat1,lng1|lat2,lng2|..." } — حداقل ۲، حداکثر ۱۰۰۰ نقطه.
 
 import logging
-from .config import get_api_key, is_configured, NESHAN_API_BASE, NESHAN_MAP_MATCHING_PATH
+
+from core import http_client
+
+from .config import get_api_key, is_configured, get_api_base, NESHAN_MAP_MATCHING_PATH
 
 logger = logging.getLogger(__name__)
 
@@ -43,11 +46,10 @@ def fetch_map_matching(path):
         path_str = "|".join(parts[:1000])
     api_key = get_api_key()
     try:
-        import requests
-        url = f"{NESHAN_API_BASE.rstrip('/')}{NESHAN_MAP_MATCHING_PATH}"
+        url = f"{get_api_base()}{NESHAN_MAP_MATCHING_PATH}"
         headers = {"Api-Key": api_key, "Content-Type": "application/json"}
         payload = {"path": path_str}
-        resp = requests.post(url, json=payload, headers=headers, timeout=30)
+        resp = http_client.post(url, upstream="neshan", json=payload, headers=headers, timeout=30)
         if resp.status_code == 404:
             logger.debug("Neshan map-matching 404: no route found for path")
             return None
@@ -4,10 +4,13 @@
 # عابر پیاده: https://platform.neshan.org/docs/api/routing-category/routing_pedestrian/
 
 import logging
+
+from core import http_client
+
 from .config import (
     get_api_key,
     is_configured,
-    NESHAN_API_BASE,
+    get_api_base,
     NESHAN_DIRECTION_PATH,
     NESHAN_DIRECTION_NO_TRAFFIC_PATH,
 )
@@ -20,33 +23,49 @@ VEHICLE_MOTORCYCLE = "motorcycle"
 VEHICLE_PEDESTRIAN = "pedestrian"
 
 
+def _parse_direction(resp):
+    """پاسخ direction (requests یا httpx) → (distance_km, duration_seconds, route_geometry)."""
+    if resp.status_code != 200:
+        logger.debug("Neshan direction HTTP %s: %s", resp.status_code, resp.text[:200])
+        return None, None, None
+    data = resp.json()
+    routes = data.get("routes") or []
+    if not routes:
+        return None, None, None
+    first = routes[0]
+    legs = first.get("legs") or []
+    distance_m = None
+    duration_s = None
+    for leg in legs:
+        d = (leg.get("distance") or {}).get("value")
+        t = (leg.get("duration") or {}).get("value")
+        if d is not None:
+            distance_m = (distance_m or 0) + d
+        if t is not None:
+            duration_s = (duration_s or 0) + t
+    dist_km = (distance_m / 1000.0) if distance_m is not None else None
+    return dist_km, duration_s, first
+
+
 def _request_direction(url_path, params, api_key, timeout=15):
     """درخواست GET به یک endpoint مسیریابی نشان؛ خروجی (distance_km, duration_seconds, route_geometry)."""
     try:
-        import requests
-        url = f"{NESHAN_API_BASE.rstrip('/')}{url_path}"
+        url = f"{get_api_base()}{url_path}"
         headers = {"Api-Key": api_key}
-        resp = requests.get(url, params=params, headers=headers, timeout=timeout)
-        if resp.status_code != 200:
-            logger.debug("Neshan direction HTTP %s: %s", resp.status_code, resp.text[:200])
-            return None, None, None
-        data = resp.json()
-        routes = data.get("routes") or []
-        if not routes:
-            return None, None, None
-        first = routes[0]
-        legs = first.get("legs") or []
-        distance_m = None
-        duration_s = None
-        for leg in legs:
-            d = (leg.get("distance") or {}).get("value")
-            t = (leg.get("duration") or {}).get("value")
-            if d is not None:
-                distance_m = (distance_m or 0) + d
-            if t is not None:
-                duration_s = (duration_s or 0) + t
-        dist_km = (distance_m / 1000.0) if distance_m is not None else None
-        return dist_km, duration_s, first
+        resp = http_client.get(url, upstream="neshan", params=params, headers=headers, timeout=timeout)
+        return _parse_direction(resp)
+    except Exception as e:
+        logger.debug("Neshan direction failed: %s", e)
+        return None, None, None
+
+
+async def _arequest_direction(url_path, params, api_key, timeout=15):
+    """نسخهٔ async از _request_direction."""
+    try:
+        url = f"{get_api_base()}{url_path}"
+        headers = {"Api-Key": api_key}
+        resp = await http_client.aget(url, upstream="neshan", params=params, headers=headers, timeout=timeout)
+        return _parse_direction(resp)
     except Exception as e:
         logger.debug("Neshan direction failed: %s", e)
         return None, None, None
@@ -84,15 +103,11 @@ def _build_direction_params(lat_origin, lng_origin, lat_dest, lng_dest, vehicle_
     return params
 
 
-def fetch_route_eta(lng_origin, lat_origin, lng_dest, lat_dest, vehicle_type=VEHICLE_CAR,
+def _route_eta_call(lng_origin, lat_origin, lng_dest, lat_dest, vehicle_type=VEHICLE_CAR,
                     waypoints=None, avoid_traffic_zone=False, avoid_odd_even_zone=False, alternative=False, bearing=None):
-    """
-    فاصله (کیلومتر)، زمان (ثانیه) و geometry مسیر از سرویس مسیریابی با ترافیک نشان.
-    خروجی: (distance_km, duration_seconds, route_geometry). نوع وسیله: car | motorcycle.
-    """
+    """(url_path, params, api_key) برای مسیریابی با ترافیک؛ اگر نشان تنظیم نشده باشد None."""
     if not is_configured():
-        return None, None, None
-    api_key = get_api_key()
+        return None
     if vehicle_type not in (VEHICLE_CAR, VEHICLE_MOTORCYCLE):
         vehicle_type = VEHICLE_CAR
     params = _build_direction_params(
@@ -100,7 +115,57 @@ def fetch_route_eta(lng_origin, lat_origin, lng_dest, lat_dest, vehicle_type=VEH
         waypoints=waypoints, avoid_traffic_zone=avoid_traffic_zone,
         avoid_odd_even_zone=avoid_odd_even_zone, alternative=alternative, bearing=bearing,
     )
-    return _request_direction(NESHAN_DIRECTION_PATH, params, api_key)
+    return NESHAN_DIRECTION_PATH, params, get_api_key()
+
+
+def _route_eta_no_traffic_call(lng_origin, lat_origin, lng_dest, lat_dest,
+                               waypoints=None, avoid_traffic_zone=False, avoid_odd_even_zone=False,
+                               alternative=False, bearing=None):
+    """(url_path, params, api_key) برای مسیریابی بدون ترافیک؛ اگر نشان تنظیم نشده باشد None."""
+    if not is_configured():
+        return None
+    params = _build_direction_params(
+        lat_origin, lng_origin, lat_dest, lng_dest, VEHICLE_CAR,
+        waypoints=waypoints, avoid_traffic_zone=avoid_traffic_zone,
+        avoid_odd_even_zone=avoid_odd_even_zone, alternative=alternative, bearing=bearing,
+    )
+    return NESHAN_DIRECTION_NO_TRAFFIC_PATH, params, get_api_key()
+
+
+def _route_eta_pedestrian_call(lng_origin, lat_origin, lng_dest, lat_dest,
+                               waypoints=None, alternative=False, bearing=None):
+    """(url_path, params, api_key) برای مسیریابی عابر پیاده؛ اگر نشان تنظیم نشده باشد None."""
+    if not is_configured():
+        return None
+    params = _build_direction_params(
+        lat_origin, lng_origin, lat_dest, lng_dest, VEHICLE_PEDESTRIAN,
+        waypoints=waypoints, avoid_traffic_zone=False, avoid_odd_even_zone=False,
+        alternative=alternative, bearing=bearing,
+    )
+    return NESHAN_DIRECTION_PATH, params, get_api_key()
+
+
+def fetch_route_eta(lng_origin, lat_origin, lng_dest, lat_dest, vehicle_type=VEHICLE_CAR,
+                    waypoints=None, avoid_traffic_zone=False, avoid_odd_even_zone=False, alternative=False, bearing=None):
+    """
+    فاصله (کیلومتر)، زمان (ثانیه) و geometry مسیر از سرویس مسیریابی با ترافیک نشان.
+    خروجی: (distance_km, duration_seconds, route_geometry). نوع وسیله: car | motorcycle.
+    """
+    call = _route_eta_call(
+        lng_origin, lat_origin, lng_dest, lat_dest, vehicle_type,
+        waypoints, avoid_traffic_zone, avoid_odd_even_zone, alternative, bearing,
+    )
+    return _request_direction(*call) if call else (None, None, None)
+
+
+async def afetch_route_eta(lng_origin, lat_origin, lng_dest, lat_dest, vehicle_type=VEHICLE_CAR,
+                           waypoints=None, avoid_traffic_zone=False, avoid_odd_even_zone=False, alternative=False, bearing=None):
+    """نسخهٔ async از fetch_route_eta."""
+    call = _route_eta_call(
+        lng_origin, lat_origin, lng_dest, lat_dest, vehicle_type,
+        waypoints, avoid_traffic_zone, avoid_odd_even_zone, alternative, bearing,
+    )
+    return await _arequest_direction(*call) if call else (None, None, None)
 
 
 def fetch_route_eta_no_traffic(lng_origin, lat_origin, lng_dest, lat_dest,
@@ -112,15 +177,22 @@ def fetch_route_eta_no_traffic(lng_origin, lat_origin, lng_dest, lat_dest,
     Endpoint: GET https://api.neshan.org/v4/direction/no-traffic
     خروجی: (distance_km, duration_seconds, route_geometry).
     """
-    if not is_configured():
-        return None, None, None
-    api_key = get_api_key()
-    params = _build_direction_params(
-        lat_origin, lng_origin, lat_dest, lng_dest, VEHICLE_CAR,
-        waypoints=waypoints, avoid_traffic_zone=avoid_traffic_zone,
-        avoid_odd_even_zone=avoid_odd_even_zone, alternative=alternative, bearing=bearing,
+    call = _route_eta_no_traffic_call(
+        lng_origin, lat_origin, lng_dest, lat_dest,
+        waypoints, avoid_traffic_zone, avoid_odd_even_zone, alternative, bearing,
     )
-    return _request_direction(NESHAN_DIRECTION_NO_TRAFFIC_PATH, params, api_key)
+    return _request_direction(*call) if call else (None, None, None)
+
+
+async def afetch_route_eta_no_traffic(lng_origin, lat_origin, lng_dest, lat_dest,
+                                      waypoints=None, avoid_traffic_zone=False, avoid_odd_even_zone=False,
+                                      alternative=False, bearing=None):
+    """نسخهٔ async از fetch_route_eta_no_traffic."""
+    call = _route_eta_no_traffic_call(
+        lng_origin, lat_origin, lng_dest, lat_dest,
+        waypoints, avoid_traffic_zone, avoid_odd_even_zone, alternative, bearing,
+    )
+    return await _arequest_direction(*call) if call else (None, None, None)
 
 
 def fetch_route_eta_pedestrian(lng_origin, lat_origin, lng_dest, lat_dest,
@@ -132,12 +204,16 @@ def fetch_route_eta_pedestrian(lng_origin, lat_origin, lng_dest, lat_dest,
     پارامترها: type=pedestrian، origin، destination؛ اختیاری: waypoints، alternative، bearing.
     خروجی: (distance_km, duration_seconds, route_geometry).
     """
-    if not is_configured():
-        return None, None, None
-    api_key = get_api_key()
-    params = _build_direction_params(
-        lat_origin, lng_origin, lat_dest, lng_dest, VEHICLE_PEDESTRIAN,
-        waypoints=waypoints, avoid_traffic_zone=False, avoid_odd_even_zone=False,
-        alternative=alternative, bearing=bearing,
+    call = _route_eta_pedestrian_call(
+        lng_origin, lat_origin, lng_dest, lat_dest, waypoints, alternative, bearing,
+    )
+    return _request_direction(*call) if call else (None, None, None)
+
+
+async def afetch_route_eta_pedestrian(lng_origin, lat_origin, lng_dest, lat_dest,
+                                      waypoints=None, alternative=False, bearing=None):
+    """نسخهٔ async از fetch_route_eta_pedestrian."""
+    call = _route_eta_pedestrian_call(
+        lng_origin, lat_origin, lng_dest, lat_dest, waypoints, alternative, bearing,
     )
-    return _request_direction(NESHAN_DIRECTION_PATH, params, api_key)
+    return await _arequest_direction(*call) if call else (None, None, None)
@@ -1,6 +1,91 @@
-from django.test import TestCase
+import asyncio
+import time
+
+from django.test import AsyncClient, TestCase, override_settings
+
+from core.upstream_stub import SlowUpstream
+
 
 class TeamPingTests(TestCase):
     def test_ping_requires_auth(self):
         res = self.client.get("/team13/ping/")
         self.assertEqual(res.status_code, 401)
+
+
+class AdminDashboardTests(TestCase):
+    databases = {"default", "team13"}
+
+    def test_pending_contributions_show_submitters(self):
+        from django.contrib.auth import get_user_model
+        from django.core.cache import cache
+
+        from core.jwt_utils import create_access_token
+        from team13.models import Image, PlaceContribution
+
+        cache.clear()
+        User = get_user_model()
+        admin = User.objects.create_superuser(email="admin13@test.com", password="x-Strong-pass-42")
+        for i in range(3):
+            submitter = User.objects.create_user(email=f"s{i}@test.com", password="x-Strong-pass-42")
+            c = PlaceContribution.objects.using("team13").create(
+                name_fa=f"مکان {i}", type="museum", latitude=35.7, longitude=51.4, submitted_by_id=submitter.id,
+            )
+            Image.objects.using("team13").create(
+                target_type=Image.TargetType.PENDING_PLACE, target_id=c.contribution_id, image_url=f"/m/{i}.jpg",
+            )
+
+        self.client.cookies["access_token"] = create_access_token(admin)
+        res = self.client.get("/team13/admin/")
+        self.assertEqual(res.status_code, 200)
+        rows = res.context["pending_requests"]
+        self.assertEqual(sorted(r["submitter_display"] for r in rows), ["s0@test.com", "s1@test.com", "s2@test.com"])
+        self.assertTrue(all(len(r["images"]) == 1 for r in rows))
+
+
+class NeshanAsyncViewTests(TestCase):
+    matrix_path = "/team13/distance-matrix/?origins=35.70,51.40&destinations=35.69,51.39"
+
+    def test_distance_matrix_proxies_upstream(self):
+        with SlowUpstream(delay=0) as upstream, override_settings(
+            NESHAN_API_BASE=upstream.url, NESHAN_API_KEY_SERVICE="test"
+        ):
+            res = self.client.get(self.matrix_path)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["status"], "Ok")
+
+    def test_tsp_requires_two_waypoints(self):
+        res = self.client.get("/team13/tsp/?waypoints=35.70,51.40")
+        self.assertEqual(res.status_code, 400)
+
+    def test_route_from_coords_uses_upstream_eta(self):
+        with SlowUpstream(delay=0) as upstream, override_settings(
+            NESHAN_API_BASE=upstream.url, NESHAN_API_KEY_SERVICE="test"
+        ):
+            res = self.client.get(
+                "/team13/routes/?format=json&source_lat=35.70&source_lng=51.40&dest_lat=35.69&dest_lng=51.39"
+            )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["eta_source"], "neshan")
+        self.assertEqual(res.json()["eta_minutes"], 5)
+
+    def test_routes_rejects_post(self):
+        self.assertEqual(self.client.post("/team13/routes/").status_code, 405)
+
+    def test_slow_upstream_does_not_serialize_requests(self):
+        delay, n = 0.3, 10
+
+        async def burst():
+            client = AsyncClient()
+            return await asyncio.gather(*(client.get(self.matrix_path) for _ in range(n)))
+
+        with SlowUpstream(delay=delay) as upstream, override_settings(
+            NESHAN_API_BASE=upstream.url, NESHAN_API_KEY_SERVICE="test"
+        ):
+            started = time.perf_counter()
+            responses = asyncio.run(burst())
+            elapsed = time.perf_counter() - started
+
+        self.assertTrue(all(r.status_code == 200 for r in responses))
+        self.assertEqual(upstream.requests, n)
+        # Serially this would take n * delay (3 s).
+        self.assertLess(elapsed, n * delay / 2)
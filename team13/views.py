@@ -1,10 +1,10 @@
 # مطابق فاز ۳، ۵، ۷ — سرویس امکانات و حمل‌ونقل (گروه Axiom)
 import base64
-import math
 import re
 import uuid
 from pathlib import Path
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.http import JsonResponse, FileResponse, Http404, HttpResponseForbidden
 from django.shortcuts import render, get_object_or_404, redirect
@@ -14,7 +14,10 @@ from urllib.parse import quote
 from django.db.models import Avg, Count, F, Q, Subquery, OuterRef
 from django.db.models.functions import Coalesce
 from django.views.decorators.http import require_GET, require_POST
+from core import geo
 from core.auth import api_login_required
+from core.decorators import async_require_GET
+from core.users import get_users
 
 from .context_processors import team13_user_context
 from .neshan.config import get_web_key
@@ -67,15 +70,16 @@ def _login_required_team13(view_func):
     return _wrapped
 
 
-def _distance_km(lat1, lon1, lat2, lon2):
-    """فاصله تقریبی به کیلومتر (Haversine)."""
-    R = 6371
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlam = math.radians(lon2 - lon1)
-    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlam / 2) ** 2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return R * c
+def _places_within(qs, lat, lng, radius_km):
+    """مکان‌های qs در شعاع radius_km از (lat, lng)، نزدیک‌ترین اول، به‌صورت [(place, distance_km)]."""
+    min_lat, max_lat, min_lng, max_lng = geo.bounding_box(lat, lng, radius_km)
+    places = list(qs.filter(latitude__range=(min_lat, max_lat), longitude__range=(min_lng, max_lng)))
+    if not places:
+        return []
+    idx, km = geo.within_radius(
+        lat, lng, [p.latitude for p in places], [p.longitude for p in places], radius_km
+    )
+    return [(places[i], float(d)) for i, d in zip(idx, km)]
 
 
 def _team13_context(request, extra=None):
@@ -258,7 +262,7 @@ def place_list(request):
             "rating": rating_by_place.get(str(p.place_id)),
         }
         if user_lat is not None and user_lng is not None:
-            item["distance_km"] = round(_distance_km(user_lat, user_lng, p.latitude, p.longitude), 2)
+            item["distance_km"] = round(geo.haversine_km(user_lat, user_lng, p.latitude, p.longitude), 2)
         places.append(item)
 
     # Distance filter (when lat/lng present): keep only places within max_distance_km
@@ -397,16 +401,10 @@ def nearest_place(request):
             radius_km = 0.05
     except (TypeError, ValueError):
         radius_km = 0.05
-    places = list(Place.objects.using(TEAM13_DB).all())
-    best = None
-    best_d = float("inf")
-    for p in places:
-        d = _distance_km(lat, lng, p.latitude, p.longitude)
-        if d <= radius_km and d < best_d:
-            best_d = d
-            best = p
-    if best is None:
+    hits = _places_within(Place.objects.using(TEAM13_DB), lat, lng, radius_km)
+    if not hits:
         return JsonResponse({"place": None})
+    best, best_d = hits[0]
     trans_fa = best.translations.filter(lang="fa").first()
     trans_en = best.translations.filter(lang="en").first()
     payload = {
@@ -748,30 +746,28 @@ def team13_admin_dashboard(request):
         )
 
     # پیشنهادهای در انتظار (pending = is_approved=False) از دیتابیس team13
-    pending = PlaceContribution.objects.using("team13").filter(is_approved=False).order_by("-created_at")
+    pending = list(PlaceContribution.objects.using("team13").filter(is_approved=False).order_by("-created_at"))
+    # تصاویر و ایمیل ثبت‌کننده‌ها برای همهٔ پیشنهادها با یک درخواست (نه یک کوئری به ازای هر ردیف)
+    images_by_contribution = {}
+    for target_id, image_url in Image.objects.using("team13").filter(
+        target_type=Image.TargetType.PENDING_PLACE,
+        target_id__in=[c.contribution_id for c in pending],
+    ).values_list("target_id", "image_url"):
+        images_by_contribution.setdefault(target_id, []).append(image_url)
+    submitters = get_users(c.submitted_by_id for c in pending if c.submitted_by_id)
     pending_requests = []
     for c in pending:
-        images = list(
-            Image.objects.using("team13").filter(
-                target_type=Image.TargetType.PENDING_PLACE,
-                target_id=c.contribution_id,
-            ).values_list("image_url", flat=True)
-        )
         map_url = (
             reverse("team13:index")
             + "?lat={}&lng={}&zoom=16".format(c.latitude, c.longitude)
         )
         submitter_display = "—"
         if c.submitted_by_id:
-            try:
-                User = request.user.__class__
-                sub = User.objects.using("default").filter(id=c.submitted_by_id).first()
-                submitter_display = getattr(sub, "email", str(c.submitted_by_id)) if sub else str(c.submitted_by_id)
-            except Exception:
-                submitter_display = str(c.submitted_by_id)
+            sub = submitters.get(str(c.submitted_by_id))
+            submitter_display = sub["email"] if sub else str(c.submitted_by_id)
         pending_requests.append({
             "contribution": c,
-            "images": images,
+            "images": images_by_contribution.get(c.contribution_id, []),
             "map_url": map_url,
             "submitter_display": submitter_display,
         })
@@ -1064,11 +1060,12 @@ def event_rate(request, event_id):
 # مسیریابی و امکانات روی مسیر (در صورت تنظیم نشان از API نشان؛ وگرنه Haversine)
 # -----------------------------------------------------------------------------
 
-def _compute_route_result(source, dest, travel_mode, request, **route_options):
-    """محاسبه فاصله و ETA؛ برای خودرو/موتور در صورت وجود کلید نشان از API نشان استفاده می‌شود.
-    route_options: vehicle_type, avoid_traffic_zone, avoid_odd_even_zone, alternative (برای fetch_route_eta).
+async def _aroute_eta(travel_mode, lat_src, lng_src, lat_dest, lng_dest, route_options):
+    """فاصله و ETA بین دو نقطه؛ برای خودرو/موتور/پیاده در صورت وجود کلید نشان از API نشان (async)، وگرنه Haversine.
+    route_options: vehicle_type, avoid_traffic_zone, avoid_odd_even_zone, alternative, no_traffic, bearing.
+    خروجی: (distance_km, eta_minutes, eta_source, route_geometry).
     """
-    dist_km = _distance_km(source.latitude, source.longitude, dest.latitude, dest.longitude)
+    dist_km = geo.haversine_km(lat_src, lng_src, lat_dest, lng_dest)
     eta_minutes = None
     eta_source = "haversine"
 
@@ -1078,9 +1075,9 @@ def _compute_route_result(source, dest, travel_mode, request, **route_options):
             no_traffic = route_options.get("no_traffic", False)
             bearing = route_options.get("bearing")
             if travel_mode == "car" and no_traffic:
-                from .neshan import fetch_route_eta_no_traffic
-                dist_neshan, dur_sec, route_geometry = fetch_route_eta_no_traffic(
-                    source.longitude, source.latitude, dest.longitude, dest.latitude,
+                from .neshan import afetch_route_eta_no_traffic
+                dist_neshan, dur_sec, route_geometry = await afetch_route_eta_no_traffic(
+                    lng_src, lat_src, lng_dest, lat_dest,
                     avoid_traffic_zone=route_options.get("avoid_traffic_zone", False),
                     avoid_odd_even_zone=route_options.get("avoid_odd_even_zone", False),
                     alternative=route_options.get("alternative", False),
@@ -1088,11 +1085,10 @@ def _compute_route_result(source, dest, travel_mode, request, **route_options):
                 )
                 eta_source = "neshan_no_traffic"
             else:
-                from .neshan import fetch_route_eta
+                from .neshan import afetch_route_eta
                 vehicle_type = route_options.get("vehicle_type") or ("motorcycle" if travel_mode == "motorcycle" else "car")
-                dist_neshan, dur_sec, route_geometry = fetch_route_eta(
-                    source.longitude, source.latitude,
-                    dest.longitude, dest.latitude,
+                dist_neshan, dur_sec, route_geometry = await afetch_route_eta(
+                    lng_src, lat_src, lng_dest, lat_dest,
                     vehicle_type=vehicle_type,
                     avoid_traffic_zone=route_options.get("avoid_traffic_zone", False),
                     avoid_odd_even_zone=route_options.get("avoid_odd_even_zone", False),
@@ -1109,10 +1105,10 @@ def _compute_route_result(source, dest, travel_mode, request, **route_options):
             eta_minutes = max(1, round(dist_km / 0.5))
     elif travel_mode == "walk":
         try:
-            from .neshan import fetch_route_eta_pedestrian
+            from .neshan import afetch_route_eta_pedestrian
             bearing = route_options.get("bearing")
-            dist_neshan, dur_sec, route_geometry = fetch_route_eta_pedestrian(
-                source.longitude, source.latitude, dest.longitude, dest.latitude,
+            dist_neshan, dur_sec, route_geometry = await afetch_route_eta_pedestrian(
+                lng_src, lat_src, lng_dest, lat_dest,
                 alternative=route_options.get("alternative", False),
                 bearing=bearing,
             )
@@ -1126,7 +1122,11 @@ def _compute_route_result(source, dest, travel_mode, request, **route_options):
             eta_minutes = max(1, round(dist_km / 0.08))
     else:
         eta_minutes = max(1, round(dist_km / 0.4))
+    return dist_km, eta_minutes, eta_source, route_geometry
+
 
+def _route_result_for_places(source, dest, travel_mode, dist_km, eta_minutes, eta_source, route_geometry):
+    """نتیجهٔ مسیریابی بین دو مکان دیتابیس (نام و امکانات از دیتابیس خوانده می‌شوند)."""
     trans_src = source.translations.filter(lang="fa").first()
     trans_dst = dest.translations.filter(lang="fa").first()
     result = {
@@ -1150,66 +1150,17 @@ def _compute_route_result(source, dest, travel_mode, request, **route_options):
     return result
 
 
-def _compute_route_result_from_coords(lat_src, lng_src, name_src, lat_dest, lng_dest, name_dest, travel_mode, **route_options):
-    """محاسبه فاصله و ETA از روی مختصات؛ برای خودرو/موتور در صورت وجود نشان از API نشان."""
-    dist_km = _distance_km(lat_src, lng_src, lat_dest, lng_dest)
-    eta_minutes = None
-    eta_source = "haversine"
+async def _acompute_route_result(source, dest, travel_mode, **route_options):
+    """محاسبه فاصله و ETA بین دو مکان؛ برای خودرو/موتور در صورت وجود کلید نشان از API نشان استفاده می‌شود."""
+    eta = await _aroute_eta(travel_mode, source.latitude, source.longitude, dest.latitude, dest.longitude, route_options)
+    return await sync_to_async(_route_result_for_places)(source, dest, travel_mode, *eta)
 
-    route_geometry = None
-    if travel_mode in ("car", "motorcycle"):
-        try:
-            no_traffic = route_options.get("no_traffic", False)
-            bearing = route_options.get("bearing")
-            if travel_mode == "car" and no_traffic:
-                from .neshan import fetch_route_eta_no_traffic
-                dist_neshan, dur_sec, route_geometry = fetch_route_eta_no_traffic(
-                    lng_src, lat_src, lng_dest, lat_dest,
-                    avoid_traffic_zone=route_options.get("avoid_traffic_zone", False),
-                    avoid_odd_even_zone=route_options.get("avoid_odd_even_zone", False),
-                    alternative=route_options.get("alternative", False),
-                    bearing=bearing,
-                )
-                eta_source = "neshan_no_traffic"
-            else:
-                from .neshan import fetch_route_eta
-                vehicle_type = route_options.get("vehicle_type") or ("motorcycle" if travel_mode == "motorcycle" else "car")
-                dist_neshan, dur_sec, route_geometry = fetch_route_eta(
-                    lng_src, lat_src, lng_dest, lat_dest,
-                    vehicle_type=vehicle_type,
-                    avoid_traffic_zone=route_options.get("avoid_traffic_zone", False),
-                    avoid_odd_even_zone=route_options.get("avoid_odd_even_zone", False),
-                    alternative=route_options.get("alternative", False),
-                    bearing=bearing,
-                )
-                eta_source = "neshan"
-            if dist_neshan is not None and dur_sec is not None:
-                dist_km = dist_neshan
-                eta_minutes = max(1, round(dur_sec / 60.0))
-            else:
-                eta_minutes = max(1, round(dist_km / 0.5))
-        except Exception:
-            eta_minutes = max(1, round(dist_km / 0.5))
-    elif travel_mode == "walk":
-        try:
-            from .neshan import fetch_route_eta_pedestrian
-            bearing = route_options.get("bearing")
-            dist_neshan, dur_sec, route_geometry = fetch_route_eta_pedestrian(
-                lng_src, lat_src, lng_dest, lat_dest,
-                alternative=route_options.get("alternative", False),
-                bearing=bearing,
-            )
-            if dist_neshan is not None and dur_sec is not None:
-                dist_km = dist_neshan
-                eta_minutes = max(1, round(dur_sec / 60.0))
-                eta_source = "neshan_pedestrian"
-            else:
-                eta_minutes = max(1, round(dist_km / 0.08))
-        except Exception:
-            eta_minutes = max(1, round(dist_km / 0.08))
-    else:
-        eta_minutes = max(1, round(dist_km / 0.4))
 
+async def _acompute_route_result_from_coords(lat_src, lng_src, name_src, lat_dest, lng_dest, name_dest, travel_mode, **route_options):
+    """محاسبه فاصله و ETA از روی مختصات؛ برای خودرو/موتور در صورت وجود نشان از API نشان."""
+    dist_km, eta_minutes, eta_source, route_geometry = await _aroute_eta(
+        travel_mode, lat_src, lng_src, lat_dest, lng_dest, route_options
+    )
     result = {
         "source_name": name_src or "مبدأ",
         "destination_name": name_dest or "مقصد",
@@ -1229,12 +1180,49 @@ def _compute_route_result_from_coords(lat_src, lng_src, name_src, lat_dest, lng_
     return result
 
 
-@require_GET
-def route_request(request):
+def _get_route_places(src_id, dst_id):
+    source = Place.objects.using(TEAM13_DB).prefetch_related("translations", "amenities").get(place_id=src_id)
+    dest = Place.objects.using(TEAM13_DB).prefetch_related("translations", "amenities").get(place_id=dst_id)
+    return source, dest
+
+
+def _log_route(request, source, dest, travel_mode):
+    if getattr(request.user, "is_authenticated", False):
+        try:
+            RouteLog.objects.using(TEAM13_DB).create(
+                user_id=getattr(request.user, "id", None),
+                source_place=source,
+                destination_place=dest,
+                travel_mode=travel_mode,
+            )
+        except Exception:
+            pass
+
+
+def _render_routes_page(request, route_result, travel_mode, src_id, dst_id):
+    places_choices = list(Place.objects.using(TEAM13_DB).all().prefetch_related("translations")[:200])
+    places_for_select = []
+    for p in places_choices:
+        t = p.translations.filter(lang="fa").first()
+        name = (t.name if t else None) or (p.translations.filter(lang="en").first().name if p.translations.filter(lang="en").first() else None) or str(p.place_id)
+        places_for_select.append({"place_id": str(p.place_id), "name": name})
+
+    return render(request, f"{TEAM_NAME}/routes.html", _team13_context(request, {
+        "route_result": route_result,
+        "places_for_select": places_for_select,
+        "travel_mode": travel_mode,
+        "source_place_id": src_id or "",
+        "destination_place_id": dst_id or "",
+    }))
+
+
+@async_require_GET
+async def route_request(request):
     """
     مسیریابی و ETA بین دو مکان + امکانات مبدأ و مقصد.
     پذیرش: source_place_id/destination_place_id (مکان از دیتابیس) یا
     source_lat, source_lng, source_name, dest_lat, dest_lng, dest_name (جستجوی آدرس).
+    فراخوانی نشان async است؛ زیر ASGI درخواست کند نشان فقط همین coroutine را معطل می‌کند.
     """
     src_id = request.GET.get("source_place_id")
     dst_id = request.GET.get("destination_place_id")
@@ -1273,19 +1261,9 @@ def route_request(request):
     if _wants_json(request):
         if src_id and dst_id:
             try:
-                source = Place.objects.using(TEAM13_DB).prefetch_related("translations", "amenities").get(place_id=src_id)
-                dest = Place.objects.using(TEAM13_DB).prefetch_related("translations", "amenities").get(place_id=dst_id)
-                result = _compute_route_result(source, dest, travel_mode, request, **route_options)
-                if getattr(request.user, "is_authenticated", False):
-                    try:
-                        RouteLog.objects.using(TEAM13_DB).create(
-                            user_id=getattr(request.user, "id", None),
-                            source_place=source,
-                            destination_place=dest,
-                            travel_mode=travel_mode,
-                        )
-                    except Exception:
-                        pass
+                source, dest = await sync_to_async(_get_route_places)(src_id, dst_id)
+                result = await _acompute_route_result(source, dest, travel_mode, **route_options)
+                await sync_to_async(_log_route)(request, source, dest, travel_mode)
                 return JsonResponse(result)
             except Place.DoesNotExist:
                 return JsonResponse({"error": "مکان مبدأ یا مقصد یافت نشد"}, status=404)
@@ -1295,7 +1273,7 @@ def route_request(request):
                 lng_s = float(source_lng)
                 lat_d = float(dest_lat)
                 lng_d = float(dest_lng)
-                result = _compute_route_result_from_coords(
+                result = await _acompute_route_result_from_coords(
                     lat_s, lng_s, source_name, lat_d, lng_d, dest_name, travel_mode, **route_options
                 )
                 return JsonResponse(result)
@@ -1311,43 +1289,20 @@ def route_request(request):
             lng_s = float(source_lng)
             lat_d = float(dest_lat)
             lng_d = float(dest_lng)
-            route_result = _compute_route_result_from_coords(
+            route_result = await _acompute_route_result_from_coords(
                 lat_s, lng_s, source_name, lat_d, lng_d, dest_name, travel_mode, **route_options
             )
         except (TypeError, ValueError):
             route_result = {"error": "مختصات مبدأ یا مقصد نامعتبر است."}
     elif src_id and dst_id:
         try:
-            source = Place.objects.using(TEAM13_DB).prefetch_related("translations", "amenities").get(place_id=src_id)
-            dest = Place.objects.using(TEAM13_DB).prefetch_related("translations", "amenities").get(place_id=dst_id)
-            route_result = _compute_route_result(source, dest, travel_mode, request, **route_options)
-            if getattr(request.user, "is_authenticated", False):
-                try:
-                    RouteLog.objects.using(TEAM13_DB).create(
-                        user_id=getattr(request.user, "id", None),
-                        source_place=source,
-                        destination_place=dest,
-                        travel_mode=travel_mode,
-                    )
-                except Exception:
-                    pass
+            source, dest = await sync_to_async(_get_route_places)(src_id, dst_id)
+            route_result = await _acompute_route_result(source, dest, travel_mode, **route_options)
+            await sync_to_async(_log_route)(request, source, dest, travel_mode)
         except Place.DoesNotExist:
             route_result = {"error": "مکان مبدأ یا مقصد یافت نشد."}
 
-    places_choices = list(Place.objects.using(TEAM13_DB).all().prefetch_related("translations")[:200])
-    places_for_select = []
-    for p in places_choices:
-        t = p.translations.filter(lang="fa").first()
-        name = (t.name if t else None) or (p.translations.filter(lang="en").first().name if p.translations.filter(lang="en").first() else None) or str(p.place_id)
-        places_for_select.append({"place_id": str(p.place_id), "name": name})
-
-    return render(request, f"{TEAM_NAME}/routes.html", _team13_context(request, {
-        "route_result": route_result,
-        "places_for_select": places_for_select,
-        "travel_mode": travel_mode,
-        "source_place_id": src_id or "",
-        "destination_place_id": dst_id or "",
-    }))
+    return await sync_to_async(_render_routes_page)(request, route_result, travel_mode, src_id, dst_id)
 
 
 # -----------------------------------------------------------------------------
@@ -1355,8 +1310,8 @@ def route_request(request):
 # مستندات: https://platform.neshan.org/docs/api/routing-category/tsp/
 # -----------------------------------------------------------------------------
 
-@require_GET
-def tsp_request(request):
+@async_require_GET
+async def tsp_request(request):
     """
     بهینه‌سازی ترتیب بازدید از چند نقطه (TSP).
     GET: waypoints (اجباری) = lat1,lng1|lat2,lng2|... یا چند waypoints=lat,lng
@@ -1369,8 +1324,6 @@ def tsp_request(request):
         waypoints_list = request.GET.getlist("waypoints")
         waypoints_raw = "|".join(p.strip() for p in waypoints_list if p.strip())
     if not waypoints_raw or waypoints_raw.count("|") < 1:
-        if _wants_json(request):
-            return JsonResponse({"error": "پارامتر waypoints الزامی است (حداقل دو نقطه به صورت lat,lng|lat,lng)"}, status=400)
         return JsonResponse({"error": "پارامتر waypoints الزامی است (حداقل دو نقطه به صورت lat,lng|lat,lng)"}, status=400)
 
     round_trip = request.GET.get("round_trip", "true").lower() in ("1", "true", "yes")
@@ -1378,25 +1331,19 @@ def tsp_request(request):
     last_is_any = request.GET.get("last_is_any_point", "true").lower() in ("1", "true", "yes")
 
     try:
-        from .neshan import fetch_tsp
-        points = fetch_tsp(
+        from .neshan import afetch_tsp
+        points = await afetch_tsp(
             waypoints_raw,
             round_trip=round_trip,
             source_is_any_point=source_is_any,
             last_is_any_point=last_is_any,
         )
-    except Exception as e:
-        if _wants_json(request):
-            return JsonResponse({"error": "خطا در فراخوانی سرویس بهینه‌سازی مسیر"}, status=500)
+    except Exception:
         return JsonResponse({"error": "خطا در فراخوانی سرویس بهینه‌سازی مسیر"}, status=500)
 
     if points is None:
-        if _wants_json(request):
-            return JsonResponse({"error": "سرویس بهینه‌سازی مسیر در دسترس نیست یا پاسخ نامعتبر"}, status=502)
         return JsonResponse({"error": "سرویس بهینه‌سازی مسیر در دسترس نیست یا پاسخ نامعتبر"}, status=502)
 
-    if _wants_json(request):
-        return JsonResponse({"points": points})
     return JsonResponse({"points": points})
 
 
@@ -1405,8 +1352,8 @@ def tsp_request(request):
 # مستندات: https://platform.neshan.org/docs/api/routing-category/distance-matrix/
 # -----------------------------------------------------------------------------
 
-@require_GET
-def distance_matrix_request(request):
+@async_require_GET
+async def distance_matrix_request(request):
     """
     ماتریس فاصله و زمان بین نقاط مبدأ و مقصد.
     GET: origins (اجباری) = lat1,lng1|lat2,lng2|... ، destinations (اجباری) همان فرمت.
@@ -1431,8 +1378,8 @@ def distance_matrix_request(request):
         vehicle_type = "car"
     no_traffic = request.GET.get("no_traffic", "").lower() in ("1", "true", "yes")
     try:
-        from .neshan import fetch_distance_matrix
-        data = fetch_distance_matrix(
+        from .neshan import afetch_distance_matrix
+        data = await afetch_distance_matrix(
             origins_raw,
             destinations_raw,
             vehicle_type=vehicle_type,
@@ -1836,23 +1783,12 @@ def places_in_radius(request):
             if t and t in dict(Place.PlaceType.choices):
                 filter_types.append(t)
 
-    try:
-        if filter_types:
-            qs = Place.objects.using(TEAM13_DB).filter(type__in=filter_types).prefetch_related("translations")
-        else:
-            qs = Place.objects.using(TEAM13_DB).prefetch_related("translations")
-        all_places = list(qs)
-    except Exception:
-        all_places = list(Place.objects.using(TEAM13_DB).prefetch_related("translations"))
+    qs = Place.objects.using(TEAM13_DB).prefetch_related("translations")
+    if filter_types:
+        qs = qs.filter(type__in=filter_types)
 
     with_dist = []
-    for p in all_places:
-        try:
-            d = _distance_km(lat, lon, float(p.latitude), float(p.longitude))
-        except (TypeError, ValueError):
-            continue
-        if d > radius_km:
-            continue
+    for p, d in _places_within(qs, lat, lon, radius_km):
         trans_fa = next((t for t in p.translations.all() if t.lang == "fa"), None)
         trans_en = next((t for t in p.translations.all() if t.lang == "en"), None)
         name_fa = (trans_fa.name if trans_fa else "").strip()
@@ -1903,19 +1839,13 @@ def emergency_nearby(request):
 
     emergency_places = []
     try:
-        all_emergency = list(
+        qs = (
             Place.objects.using(TEAM13_DB)
             .filter(type__in=EMERGENCY_PLACE_TYPES)
             .prefetch_related("translations")
         )
         with_dist = []
-        for p in all_emergency:
-            try:
-                d = _distance_km(lat, lon, float(p.latitude), float(p.longitude))
-            except (TypeError, ValueError):
-                continue
-            if d > radius_km:
-                continue
+        for p, d in _places_within(qs, lat, lon, radius_km):
             trans_fa = next((t for t in p.translations.all() if t.lang == "fa"), None)
             trans_en = next((t for t in p.translations.all() if t.lang == "en"), None)
             name_fa = (trans_fa.name if trans_fa else "").strip()
@@ -6,5 +6,5 @@ class Team2Config(AppConfig):
     name = 'team2'
 
     def ready(self):
-        from .tasks.indexing import index_all_articles
-        index_all_articles.apply_async(countdown=15)
+        from .tasks.indexing import schedule_startup_indexing
+        schedule_startup_indexing()
@@ -10,3 +10,9 @@ app.conf.include = [
     'team2.tasks.tasks',
     'team2.tasks.indexing',
 ]
+app.conf.beat_schedule = {
+    'team2-index-updated-articles': {
+        'task': 'team2.tasks.indexing.index_updated_articles',
+        'schedule': 5 * 60,
+    },
+}
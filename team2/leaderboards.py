@@ -0,0 +1,49 @@
+"""
+Cached article leaderboards.
+
+top_articles_by_tag() ranks the articles of every tag in one window-function query and is
+memoized until invalidate(), which votes, publishes and indexing (after tagging and
+summarizing) call.
+"""
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from core.cache import invalidate_tags, memoize
+from .models import Article
+
+TOP_BY_TAG_SIZE = 3
+TOP_BY_TAG_TIMEOUT = 10 * 60
+CACHE_TAG = "team2:leaderboards"
+
+
+@memoize(timeout=TOP_BY_TAG_TIMEOUT, tags=[CACHE_TAG])
+def top_articles_by_tag():
+    """The TOP_BY_TAG_SIZE highest-scored articles for each tag of their current version."""
+    ranked = Article.objects.filter(
+        current_version__isnull=False,
+        current_version__tags__isnull=False,
+    ).annotate(
+        tag_name=F('current_version__tags__name'),
+        rank=Window(
+            RowNumber(),
+            partition_by=F('current_version__tags__name'),
+            order_by=[F('score').desc(), F('name').asc()],
+        ),
+    ).filter(rank__lte=TOP_BY_TAG_SIZE).order_by('tag_name', 'rank').values(
+        'tag_name', 'name', 'score', 'current_version__summary',
+    )
+
+    result = []
+    for row in ranked:
+        if not result or result[-1]["tag"] != row['tag_name']:
+            result.append({"tag": row['tag_name'], "articles": []})
+        result[-1]["articles"].append({
+            "name": row['name'],
+            "summary": row['current_version__summary'] or "",
+            "score": row['score'],
+        })
+    return result
+
+
+def invalidate():
+    invalidate_tags(CACHE_TAG)
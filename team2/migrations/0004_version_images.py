@@ -0,0 +1,39 @@
+# Generated manually
+
+import re
+
+from django.db import migrations, models
+
+# Frozen copy of team2.models.IMAGE_PATTERN as of this migration.
+IMAGE_PATTERN = re.compile(r'!\[.*?\]\((https?://\S+?)\)')
+
+
+def fill_images(apps, schema_editor):
+    Version = apps.get_model('team2', 'Version')
+    db = schema_editor.connection.alias
+    versions = Version.objects.using(db).only('name', 'content')
+    changed = []
+    for version in versions.iterator(chunk_size=500):
+        version.images = IMAGE_PATTERN.findall(version.content or '')
+        if version.images:
+            changed.append(version)
+        if len(changed) >= 500:
+            Version.objects.using(db).bulk_update(changed, ['images'])
+            changed = []
+    Version.objects.using(db).bulk_update(changed, ['images'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team2', '0003_publishrequest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='version',
+            name='images',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(fill_images, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,14 @@
+import re
+
 from django.db import models
 
+IMAGE_PATTERN = re.compile(r'!\[.*?\]\((https?://\S+?)\)')
+
+
+def extract_images(content):
+    """URLs of the markdown images in `content`, in order."""
+    return IMAGE_PATTERN.findall(content or '')
+
 
 class Tag(models.Model):
     name = models.CharField(max_length=255, primary_key=True)
@@ -31,6 +40,8 @@ class Version(models.Model):
     summary = models.TextField(blank=True, default='')
     editor_id = models.UUIDField()
     tags = models.ManyToManyField(Tag, blank=True, related_name='versions')
+    # extract_images(content), kept up to date by save()
+    images = models.JSONField(default=list, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
@@ -38,6 +49,14 @@ class Version(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            self.images = extract_images(self.content)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'images'}
+        super().save(*args, **kwargs)
+
 
 class PublishRequest(models.Model):
     STATUS_CHOICES = [
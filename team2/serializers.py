@@ -65,3 +65,9 @@ class PublishRequestSerializer(serializers.ModelSerializer):
 
 class CreatePublishRequestSerializer(serializers.Serializer):
     version_name = serializers.CharField(max_length=255)
+
+
+class WikiContentBatchSerializer(serializers.Serializer):
+    contents = serializers.ListField(
+        child=serializers.CharField(max_length=255), allow_empty=False, max_length=50,
+    )
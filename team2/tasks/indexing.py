@@ -1,13 +1,60 @@
+"""
+Elasticsearch indexing of team2 articles.
+
+INDEX_NAME is an alias. index_all_articles() rebuilds into a fresh physical index with
+chunked NDJSON bulk requests and then swaps the alias over atomically, so searches never see
+a half-built index. index_updated_articles() re-sends only the articles changed since the
+last run (Article.updated_at, or the current version's), and falls back to a rebuild when
+there is no checkpoint yet. Both runs hold a lock in the Celery broker's Redis, renewed while
+the run is alive, so at most one runs at a time across workers. The checkpoint and the
+startup marker live there too: the default cache may be a per-process LocMemCache.
+
+Search results are cached per normalized query and size under the core.cache tag
+SEARCH_CACHE_TAG, which every write to the index invalidates.
+
+Functions taking `es` accept any client with the bulk()/indices API used here, which is how
+the tests run them against an in-memory stand-in (and _redis() against another).
+"""
+import hashlib
+import json
 import logging
+import threading
+from contextlib import contextmanager, suppress
+from datetime import timedelta
 
 from celery import shared_task
 from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from kombu.exceptions import OperationalError
+from redis.exceptions import LockError, RedisError
+
+from core.cache import invalidate_tags, tag_version
+from team2 import leaderboards
 from team2.models import Article, Version
 
 logger = logging.getLogger(__name__)
 
 INDEX_NAME = "articles"
+BULK_CHUNK_SIZE = 500
+BULK_MAX_CHUNK_BYTES = 10 * 1024 * 1024
+
+LOCK_KEY = "team2:indexing:lock"
+# Renewed every LOCK_TIMEOUT / 3 while held, so it only lapses when the worker dies.
+LOCK_TIMEOUT = 5 * 60
+CHECKPOINT_KEY = "team2:indexing:checkpoint"
+# Changes are re-read this far before the checkpoint, to cover clock skew between processes.
+CHECKPOINT_OVERLAP = timedelta(minutes=1)
+STARTUP_KEY = "team2:indexing:startup"
+STARTUP_WINDOW = 10 * 60
+SEARCH_CACHE_TAG = "team2:search"
+SEARCH_CACHE_TIMEOUT = 10 * 60
+
 _ES = None
+_REDIS = None
 
 
 def _get_es():
@@ -18,52 +65,228 @@ def _get_es():
     return _ES
 
 
-@shared_task(bind=True, max_retries=2, default_retry_delay=10)
-def index_article_version(self, results, version_name):
-    version = Version.objects.get(name=version_name)
-    body = {
-        "article_name": version.article.name,
+def _redis():
+    """The Celery broker's Redis, shared by every web and worker process."""
+    global _REDIS
+    if _REDIS is None:
+        url = settings.CELERY_BROKER_URL
+        if not url.startswith(("redis://", "rediss://", "unix://")):
+            raise ImproperlyConfigured(
+                f"team2 indexing keeps its lock in the Celery broker's Redis; CELERY_BROKER_URL={url!r} is not Redis."
+            )
+        import redis
+        _REDIS = redis.Redis.from_url(url, decode_responses=True)
+    return _REDIS
+
+
+def article_document(article, version):
+    return {
+        "article_name": article.name,
         "version_name": version.name,
         "content": version.content,
         "summary": version.summary,
         "tags": [tag.name for tag in version.tags.all()],
     }
 
+
+def indexed_articles():
+    """Articles with a current version, with the version and its tags loaded in bulk."""
+    return Article.objects.filter(
+        current_version__isnull=False
+    ).select_related('current_version').prefetch_related('current_version__tags').order_by('name')
+
+
+def _bulk_chunks(articles, index, chunk_size, max_chunk_bytes):
+    """NDJSON bodies of at most chunk_size documents / about max_chunk_bytes each."""
+    lines, count, size = [], 0, 0
+    for article in articles:
+        action = json.dumps({"index": {"_index": index, "_id": article.name}})
+        source = json.dumps(article_document(article, article.current_version), ensure_ascii=False)
+        entry_size = len(action.encode()) + len(source.encode()) + 2
+        if count and (count >= chunk_size or size + entry_size > max_chunk_bytes):
+            yield "\n".join(lines) + "\n", count
+            lines, count, size = [], 0, 0
+        lines += (action, source)
+        count += 1
+        size += entry_size
+    if count:
+        yield "\n".join(lines) + "\n", count
+
+
+def bulk_index(es, articles, index=INDEX_NAME, chunk_size=BULK_CHUNK_SIZE, max_chunk_bytes=BULK_MAX_CHUNK_BYTES,
+               refresh=False):
+    """
+    Index `articles` (from indexed_articles()) into `index` in bulk requests.
+    Returns (indexed, failed); documents rejected by Elasticsearch are logged and counted,
+    a failed request raises.
+    """
+    indexed = failed = 0
+    for body, count in _bulk_chunks(articles, index, chunk_size, max_chunk_bytes):
+        resp = es.bulk(operations=body, refresh=refresh)
+        errors = 0
+        if resp["errors"]:
+            for item in resp["items"]:
+                result = next(iter(item.values()))
+                if result.get("error"):
+                    errors += 1
+                    logger.error("Failed to index article %s: %s", result.get("_id"), result["error"])
+        indexed += count - errors
+        failed += errors
+    if indexed:
+        invalidate_tags(SEARCH_CACHE_TAG)
+    return indexed, failed
+
+
+def _swap_alias(es, new_index):
+    """Point INDEX_NAME at new_index only; returns the indexes it pointed at before."""
+    actions = [{"add": {"index": new_index, "alias": INDEX_NAME}}]
+    old_indexes = []
+    if es.indices.exists_alias(name=INDEX_NAME):
+        old_indexes = [name for name in es.indices.get_alias(name=INDEX_NAME) if name != new_index]
+        actions = [{"remove": {"index": name, "alias": INDEX_NAME}} for name in old_indexes] + actions
+    elif es.indices.exists(index=INDEX_NAME):
+        # A plain index under the alias' name, created by es.index() before the first rebuild.
+        actions.insert(0, {"remove_index": {"index": INDEX_NAME}})
+    es.indices.update_aliases(actions=actions)
+    return old_indexes
+
+
+def rebuild_index(es):
+    """Index every article into a new index and swap INDEX_NAME over to it. Returns (indexed, failed)."""
+    started = timezone.now()
+    new_index = f"{INDEX_NAME}-{started:%Y%m%d%H%M%S%f}"
+    es.indices.create(index=new_index, settings={"refresh_interval": "-1"})
     try:
-        _get_es().index(index=INDEX_NAME, id=version.article.name, document=body)
+        indexed, failed = bulk_index(es, indexed_articles().iterator(chunk_size=BULK_CHUNK_SIZE), new_index)
+        es.indices.put_settings(index=new_index, settings={"refresh_interval": None})
+        es.indices.refresh(index=new_index)
+        old_indexes = _swap_alias(es, new_index)
+    except Exception:
+        es.indices.delete(index=new_index, ignore_unavailable=True)
+        raise
+    invalidate_tags(SEARCH_CACHE_TAG)
+    for name in old_indexes:
+        es.indices.delete(index=name, ignore_unavailable=True)
+    # Publishes during the rebuild were written to the old index.
+    caught_up, caught_up_failed = index_changed_since(es, started)
+    _redis().set(CHECKPOINT_KEY, started.isoformat())
+    return indexed + caught_up, failed + caught_up_failed
+
+
+def index_changed_since(es, since):
+    """Re-index the articles changed after `since` (minus CHECKPOINT_OVERLAP). Returns (indexed, failed)."""
+    since = since - CHECKPOINT_OVERLAP
+    articles = indexed_articles().filter(Q(updated_at__gt=since) | Q(current_version__updated_at__gt=since))
+    # wait_for: the search cache is dropped afterwards, so the changes must be searchable by then
+    return bulk_index(es, articles.iterator(chunk_size=BULK_CHUNK_SIZE), refresh="wait_for")
+
+
+@contextmanager
+def indexing_lock():
+    """Yields True if this process got the indexing lock, False if another run holds it."""
+    lock = _redis().lock(LOCK_KEY, timeout=LOCK_TIMEOUT)
+    if not lock.acquire(blocking=False):
+        yield False
+        return
+    stop = threading.Event()
+    renewer = threading.Thread(target=_renew_lock, args=(lock, stop), daemon=True)
+    renewer.start()
+    try:
+        yield True
+    finally:
+        stop.set()
+        renewer.join()
+        try:
+            lock.release()
+        except LockError:
+            logger.warning("Indexing lock lapsed before the run finished.")
+
+
+def _renew_lock(lock, stop):
+    while not stop.wait(LOCK_TIMEOUT / 3):
+        try:
+            lock.reacquire()
+        except (LockError, RedisError) as exc:
+            logger.error("Could not renew the indexing lock: %s", exc)
+            return
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=10)
+def index_article_version(self, results, version_name):
+    version = Version.objects.select_related('article').prefetch_related('tags').get(name=version_name)
+    body = article_document(version.article, version)
+
+    try:
+        _get_es().index(index=INDEX_NAME, id=version.article.name, document=body, refresh="wait_for")
     except Exception as exc:
         raise self.retry(exc=exc)
+    invalidate_tags(SEARCH_CACHE_TAG)
+    # tag_article/summarize_article ran before this callback: the by-tag leaderboard changed too
+    leaderboards.invalidate()
 
 
 @shared_task(bind=True, max_retries=1, default_retry_delay=30)
 def index_all_articles(self):
-    es = _get_es()
-    articles = Article.objects.filter(
-        current_version__isnull=False
-    ).select_related('current_version')
+    with indexing_lock() as acquired:
+        if not acquired:
+            logger.info("Article indexing already running; skipped full reindex.")
+            return None
+        try:
+            indexed, failed = rebuild_index(_get_es())
+        except Exception as exc:
+            raise self.retry(exc=exc)
 
-    indexed = 0
-    for article in articles:
-        version = article.current_version
-        body = {
-            "article_name": article.name,
-            "version_name": version.name,
-            "content": version.content,
-            "summary": version.summary,
-            "tags": [tag.name for tag in version.tags.all()],
-        }
+    logger.info("Full reindex complete: %d articles indexed, %d failed.", indexed, failed)
+    return indexed
+
+
+@shared_task(bind=True, max_retries=1, default_retry_delay=30)
+def index_updated_articles(self):
+    with indexing_lock() as acquired:
+        if not acquired:
+            logger.info("Article indexing already running; skipped incremental run.")
+            return None
+        es = _get_es()
+        checkpoint = _redis().get(CHECKPOINT_KEY)
         try:
-            es.index(index=INDEX_NAME, id=article.name, document=body)
-            indexed += 1
-        except Exception:
-            logger.exception("Failed to index article %s", article.name)
+            if checkpoint is None or not es.indices.exists_alias(name=INDEX_NAME):
+                indexed, failed = rebuild_index(es)
+            else:
+                started = timezone.now()
+                indexed, failed = index_changed_since(es, parse_datetime(checkpoint))
+                _redis().set(CHECKPOINT_KEY, started.isoformat())
+        except Exception as exc:
+            raise self.retry(exc=exc)
 
-    logger.info("Startup indexing complete: %d articles indexed.", indexed)
+    logger.info("Incremental indexing complete: %d articles indexed, %d failed.", indexed, failed)
     return indexed
 
 
-def search_articles_semantic(query, size=10):
-    search_body = {
+def schedule_startup_indexing():
+    """Queue one index_updated_articles run per STARTUP_WINDOW, however many processes start."""
+    try:
+        if not _redis().set(STARTUP_KEY, 1, nx=True, ex=STARTUP_WINDOW):
+            return
+        index_updated_articles.apply_async(countdown=15)
+    except (RedisError, OperationalError) as exc:
+        # Startup must not fail with the broker down; the next process or beat run retries.
+        with suppress(RedisError):
+            _redis().delete(STARTUP_KEY)
+        logger.warning("Could not queue startup indexing: %s", exc)
+
+
+def normalize_query(query):
+    """Search results are cached per normalized query: case-folded, whitespace collapsed."""
+    return " ".join(query.split()).casefold()
+
+
+def _search_key(version, query, size):
+    digest = hashlib.sha1(repr((query, size)).encode()).hexdigest()
+    return f"team2:search:{version}:{digest}"
+
+
+def _search_body(query, size):
+    return {
         "query": {
             "multi_match": {
                 "query": query,
@@ -74,7 +297,8 @@ def search_articles_semantic(query, size=10):
         "size": size
     }
 
-    resp = _get_es().search(index=INDEX_NAME, body=search_body)
+
+def _search_results(resp):
     results = []
 
     for hit in resp["hits"]["hits"]:
@@ -87,3 +311,39 @@ def search_articles_semantic(query, size=10):
         })
 
     return results
+
+
+def search_articles_semantic_many(queries, size=10):
+    """
+    Results for each of `queries`, keyed by normalize_query(query). Cached results are
+    reused; the rest are fetched in one msearch request.
+    """
+    cache = caches['default']
+    version = tag_version(SEARCH_CACHE_TAG)
+    keys = {normalize_query(query): None for query in queries}
+    keys = {query: _search_key(version, query, size) for query in keys}
+    cached = cache.get_many(list(keys.values()))
+    found = {query: cached[key] for query, key in keys.items() if key in cached}
+    missing = [query for query in keys if query not in found]
+
+    if len(missing) == 1:
+        responses = [_get_es().search(index=INDEX_NAME, body=_search_body(missing[0], size))]
+    elif missing:
+        searches = []
+        for query in missing:
+            searches += ({"index": INDEX_NAME}, _search_body(query, size))
+        responses = _get_es().msearch(searches=searches)["responses"]
+    else:
+        responses = []
+
+    fetched = {}
+    for query, resp in zip(missing, responses):
+        if "error" in resp:
+            raise RuntimeError(resp["error"])
+        fetched[_search_key(version, query, size)] = found[query] = _search_results(resp)
+    cache.set_many(fetched, SEARCH_CACHE_TIMEOUT)
+    return found
+
+
+def search_articles_semantic(query, size=10):
+    return search_articles_semantic_many([query], size)[normalize_query(query)]
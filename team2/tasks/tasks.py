@@ -1,17 +1,31 @@
-import copy
+import hashlib
 import json
 import logging
 import re
-import sys
 
 from celery import shared_task
 from django.conf import settings
-from team2.models import Article, Tag, Version
-from team2.models import Article, Version
+from django.core.cache import caches
+from django.db.models import Count
+
+from core.cache import invalidate_tags, memoize
+from team2.models import Article, Tag
+
+logger = logging.getLogger(__name__)
 
 MODEL_NAME = "gemini-2.5-flash"
 _CLIENT = None
 
+# Gemini outputs are cached by a hash of the content they were generated from, so
+# republishing unchanged content (e.g. a version copied by create_version_from_version)
+# makes no remote call.
+LLM_CACHE_TIMEOUT = 30 * 24 * 60 * 60
+# Existing tags offered to the tagging prompt: those that occur in the article first, then
+# the most used ones, TAG_CANDIDATE_LIMIT in all, picked from the TAG_VOCABULARY_SIZE most used.
+TAG_CANDIDATE_LIMIT = 100
+TAG_VOCABULARY_SIZE = 2000
+TAG_VOCABULARY_CACHE_TAG = "team2:tag-vocabulary"
+
 
 def _get_client():
     global _CLIENT
@@ -21,17 +35,59 @@ def _get_client():
     return _CLIENT
 
 
-@shared_task(bind=True, max_retries=2, default_retry_delay=10)
-def tag_article(self, article_name):
-    article = Article.objects.get(name=article_name)
-    version_name = article.current_version
-    if version_name is None:
-        return None
-
-    version = Version.objects.get(name=version_name)
-    content = version.content
-
-    existing_tags = list(Tag.objects.values_list("name", flat=True))
+def _llm_cache_key(kind, content):
+    digest = hashlib.sha256(content.encode()).hexdigest()
+    return f"team2:llm:{kind}:{MODEL_NAME}:{digest}"
+
+
+def _llm_output(kind, content, from_sibling, generate):
+    """
+    Gemini output `kind` for `content`: from the cache, else reused from a version with the
+    same content (from_sibling() -> output or None), else generate(). Cached either way.
+    """
+    cache = caches['default']
+    key = _llm_cache_key(kind, content)
+    output = cache.get(key)
+    if output is None:
+        output = from_sibling()
+        if output is None:
+            output = generate()
+        else:
+            logger.info("Reused %s of an identical version instead of calling Gemini.", kind)
+        cache.set(key, output, LLM_CACHE_TIMEOUT)
+    return output
+
+
+def _identical_versions(version):
+    return version.article.versions.filter(content=version.content).exclude(pk=version.pk)
+
+
+@memoize(timeout=60 * 60, tags=[TAG_VOCABULARY_CACHE_TAG])
+def tag_vocabulary():
+    """Names of the TAG_VOCABULARY_SIZE most used tags, most used first."""
+    return list(
+        Tag.objects.filter(deleted_at__isnull=True)
+        .annotate(uses=Count('versions'))
+        .order_by('-uses', 'name')
+        .values_list('name', flat=True)[:TAG_VOCABULARY_SIZE]
+    )
+
+
+def tag_candidates(content):
+    """At most TAG_CANDIDATE_LIMIT existing tag names for the tagging prompt."""
+    vocabulary = tag_vocabulary()
+    text = content.casefold()
+    mentioned = [name for name in vocabulary if name.casefold() in text]
+    candidates = dict.fromkeys(mentioned[:TAG_CANDIDATE_LIMIT])
+    for name in vocabulary:
+        if len(candidates) >= TAG_CANDIDATE_LIMIT:
+            break
+        candidates.setdefault(name)
+    return list(candidates)
+
+
+def _suggest_tags(content):
+    existing_tags = tag_candidates(content)
 
     prompt = f"""You are a content classification assistant. Your ONLY output must be a single valid JSON object with no extra text, no markdown fences, no explanation.
 
@@ -45,51 +101,24 @@ EXISTING TAGS: {existing_tags}
 ARTICLE:
 {content}"""
 
-    try:
-        response = _get_client().models.generate_content(model=MODEL_NAME, contents=prompt)
-        
-        text = response.text.strip()
-        if text.startswith("```"):
-            text = re.sub(r'^```(?:json)?\s*', '', text)
-            text = re.sub(r'```\s*$', '', text)
-        match = re.search(r'\{[^{}]*\}', text, re.DOTALL)
-        if match:
-            text = match.group(0)
-        data = json.loads(text)
-
-        selected_existing = data.get("selected_existing_tags", [])
-        new_tags = data.get("new_tags", [])
-    except Exception as exc:
-        raise self.retry(exc=exc)
+    response = _get_client().models.generate_content(model=MODEL_NAME, contents=prompt)
 
-    for tag_name in selected_existing:
-        try:
-            tag = Tag.objects.get(name=tag_name)
-            version.tags.add(tag)
-        except Tag.DoesNotExist:
-            continue
-
-    for tag_name in new_tags:
-        tag, _ = Tag.objects.get_or_create(name=tag_name.lower())
-        version.tags.add(tag)
+    text = response.text.strip()
+    if text.startswith("```"):
+        text = re.sub(r'^```(?:json)?\s*', '', text)
+        text = re.sub(r'```\s*$', '', text)
+    match = re.search(r'\{[^{}]*\}', text, re.DOTALL)
+    if match:
+        text = match.group(0)
+    data = json.loads(text)
 
     return {
-        "selected_existing_tags": selected_existing,
-        "new_tags": new_tags,
+        "selected_existing_tags": data.get("selected_existing_tags", []),
+        "new_tags": data.get("new_tags", []),
     }
 
 
-@shared_task(bind=True, max_retries=2, default_retry_delay=10)
-def summarize_article(self, article_name):
-    article = Article.objects.get(name=article_name)
-    version_name = article.current_version
-
-    if version_name is None:
-        return
-
-    version = Version.objects.get(name=version_name)
-    content = version.content
-
+def _summarize(content):
     prompt = f"""
 You are an assistant that writes concise, neutral summaries.
 
@@ -103,12 +132,63 @@ ARTICLE:
 \"\"\"
 """
 
+    response = _get_client().models.generate_content(model=MODEL_NAME, contents=prompt)
+    return response.text.strip()
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=10)
+def tag_article(self, article_name):
+    article = Article.objects.select_related('current_version').get(name=article_name)
+    version = article.current_version
+    if version is None:
+        return None
+
+    def from_sibling():
+        sibling = _identical_versions(version).filter(tags__isnull=False).first()
+        if sibling is None:
+            return None
+        return {"selected_existing_tags": [tag.name for tag in sibling.tags.all()], "new_tags": []}
+
     try:
-        response = _get_client().models.generate_content(model=MODEL_NAME, contents=prompt)
+        data = _llm_output("tags", version.content, from_sibling, lambda: _suggest_tags(version.content))
     except Exception as exc:
         raise self.retry(exc=exc)
 
-    summary = response.text.strip()
+    selected_existing = data["selected_existing_tags"]
+    new_tags = data["new_tags"]
+
+    version.tags.add(*Tag.objects.filter(name__in=selected_existing))
+
+    created_any = False
+    for tag_name in new_tags:
+        tag, created = Tag.objects.get_or_create(name=tag_name.lower())
+        created_any |= created
+        version.tags.add(tag)
+    if created_any:
+        invalidate_tags(TAG_VOCABULARY_CACHE_TAG)
+
+    return {
+        "selected_existing_tags": selected_existing,
+        "new_tags": new_tags,
+    }
+
+
+@shared_task(bind=True, max_retries=2, default_retry_delay=10)
+def summarize_article(self, article_name):
+    article = Article.objects.select_related('current_version').get(name=article_name)
+    version = article.current_version
+
+    if version is None:
+        return
+
+    def from_sibling():
+        sibling = _identical_versions(version).exclude(summary='').first()
+        return sibling.summary if sibling else None
+
+    try:
+        summary = _llm_output("summary", version.content, from_sibling, lambda: _summarize(version.content))
+    except Exception as exc:
+        raise self.retry(exc=exc)
 
     version.summary = summary
     version.save(update_fields=["summary"])
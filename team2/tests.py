@@ -1,6 +1,397 @@
-from django.test import TestCase
+import json
+import time
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from . import leaderboards
+from .models import Article, Tag, Version, Vote, extract_images
+from .tasks import indexing
+from .tasks import tasks as llm_tasks
+
 
 class TeamPingTests(TestCase):
     def test_ping_requires_auth(self):
         res = self.client.get("/team2/ping/")
         self.assertEqual(res.status_code, 401)
+
+
+class FakeIndices:
+    def __init__(self):
+        self.indexes = {}
+        self.aliases = {}
+
+    def resolve(self, name):
+        targets = self.aliases.get(name)
+        return next(iter(targets)) if targets else name
+
+    def create(self, index, settings=None):
+        self.indexes[index] = {}
+
+    def put_settings(self, index, settings):
+        pass
+
+    def refresh(self, index):
+        pass
+
+    def exists(self, index):
+        return index in self.indexes
+
+    def exists_alias(self, name):
+        return bool(self.aliases.get(name))
+
+    def get_alias(self, name):
+        return {index: {"aliases": {name: {}}} for index in self.aliases.get(name, ())}
+
+    def update_aliases(self, actions):
+        for action in actions:
+            (kind, spec), = action.items()
+            if kind == "add":
+                self.aliases.setdefault(spec["alias"], set()).add(spec["index"])
+            elif kind == "remove":
+                self.aliases[spec["alias"]].discard(spec["index"])
+            elif kind == "remove_index":
+                del self.indexes[spec["index"]]
+
+    def delete(self, index, ignore_unavailable=False):
+        self.indexes.pop(index, None)
+
+
+class FakeElasticsearch:
+    """In-memory stand-in for the client calls made by team2.tasks.indexing."""
+
+    def __init__(self):
+        self.indices = FakeIndices()
+        self.bulk_bodies = []
+        self.searches = []
+
+    def index(self, index, id, document, refresh=False):
+        self.indices.indexes.setdefault(self.indices.resolve(index), {})[id] = document
+
+    def search(self, index, body):
+        self.searches.append(body["query"]["multi_match"]["query"])
+        query = body["query"]["multi_match"]["query"]
+        docs = self.indices.indexes.get(self.indices.resolve(index), {})
+        hits = [
+            {"_score": 1.0, "_source": doc} for _, doc in sorted(docs.items()) if query in doc["content"].casefold()
+        ]
+        return {"hits": {"hits": hits[:body["size"]]}}
+
+    def msearch(self, searches):
+        return {"responses": [self.search(header["index"], body) for header, body in zip(searches[::2], searches[1::2])]}
+
+    def bulk(self, operations, refresh=False):
+        self.bulk_bodies.append(operations)
+        lines = operations.splitlines()
+        items = []
+        for action, source in zip(lines[::2], lines[1::2]):
+            meta = json.loads(action)["index"]
+            self.index(meta["_index"], meta["_id"], json.loads(source))
+            items.append({"index": {"_id": meta["_id"], "status": 201}})
+        return {"errors": False, "items": items}
+
+    def documents(self):
+        return self.indices.indexes[self.indices.resolve(indexing.INDEX_NAME)]
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis calls made by team2.tasks.indexing (keys never expire)."""
+
+    def __init__(self):
+        self.values = {}
+        self.renewals = 0
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = str(value)
+        return True
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+    def lock(self, name, timeout):
+        return FakeLock(self, name)
+
+
+class FakeLock:
+    def __init__(self, redis, name):
+        self.redis, self.name, self.token = redis, name, uuid.uuid4().hex
+
+    def acquire(self, blocking=True):
+        return bool(self.redis.set(self.name, self.token, nx=True))
+
+    def reacquire(self):
+        self.redis.renewals += 1
+
+    def release(self):
+        if self.redis.get(self.name) == self.token:
+            self.redis.delete(self.name)
+
+
+class BulkIndexingTests(TestCase):
+    databases = {"default", "team2"}
+
+    @classmethod
+    def setUpTestData(cls):
+        tag = Tag.objects.create(name="history")
+        for i in range(5):
+            article = Article.objects.create(name=f"article-{i}", creator_id=uuid.uuid4())
+            version = Version.objects.create(
+                name=f"article-{i}-v1", article=article, content=f"content {i}", editor_id=uuid.uuid4(),
+            )
+            version.tags.add(tag)
+            article.current_version = version
+            article.save()
+        Article.objects.create(name="draft", creator_id=uuid.uuid4())
+
+    def setUp(self):
+        caches["default"].clear()
+        self.es = FakeElasticsearch()
+        self.redis = FakeRedis()
+        patcher = mock.patch.object(indexing, "_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_bulk_index_in_chunks(self):
+        with self.assertNumQueries(2, using="team2"):
+            indexed, failed = indexing.bulk_index(self.es, indexing.indexed_articles(), "target", chunk_size=2)
+        self.assertEqual((indexed, failed), (5, 0))
+        self.assertEqual(len(self.es.bulk_bodies), 3)
+        self.assertEqual(self.es.indices.indexes["target"]["article-3"]["tags"], ["history"])
+
+    def test_rebuild_swaps_alias(self):
+        self.es.index(indexing.INDEX_NAME, "stale", {})  # plain index from before the alias
+        indexing.rebuild_index(self.es)
+        first = self.es.indices.resolve(indexing.INDEX_NAME)
+        self.assertNotEqual(first, indexing.INDEX_NAME)
+        self.assertEqual(sorted(self.es.documents()), [f"article-{i}" for i in range(5)])
+
+        indexing.rebuild_index(self.es)
+        self.assertNotIn(first, self.es.indices.indexes)
+        self.assertEqual(len(self.es.indices.indexes), 1)
+
+    def test_incremental_sends_changed_articles_only(self):
+        Article.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        Version.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        Version.objects.filter(name="article-2-v1").update(content="edited", updated_at=timezone.now())
+
+        indexed, _ = indexing.index_changed_since(self.es, timezone.now() - timedelta(minutes=5))
+        self.assertEqual(indexed, 1)
+        self.assertEqual(self.es.documents()["article-2"]["content"], "edited")
+
+    def test_lock_allows_one_run(self):
+        with indexing.indexing_lock() as first:
+            with indexing.indexing_lock() as second:
+                self.assertEqual((first, second), (True, False))
+        with indexing.indexing_lock() as again:
+            self.assertTrue(again)
+
+    def test_lock_renewed_while_held(self):
+        with mock.patch.object(indexing, "LOCK_TIMEOUT", 0.03):
+            with indexing.indexing_lock():
+                time.sleep(0.1)
+        self.assertGreater(self.redis.renewals, 0)
+        self.assertNotIn(indexing.LOCK_KEY, self.redis.values)
+
+    def test_startup_queued_once(self):
+        with mock.patch.object(indexing.index_updated_articles, "apply_async") as apply_async:
+            indexing.schedule_startup_indexing()
+            indexing.schedule_startup_indexing()
+        self.assertEqual(apply_async.call_count, 1)
+
+
+class IndexingBrokerTests(SimpleTestCase):
+    def test_lock_requires_redis_broker(self):
+        with self.settings(CELERY_BROKER_URL="memory://"), mock.patch.object(indexing, "_REDIS", None):
+            with self.assertRaises(ImproperlyConfigured):
+                indexing._redis()
+
+
+class SearchCacheTests(TestCase):
+    databases = {"default", "team2"}
+
+    @classmethod
+    def setUpTestData(cls):
+        for name, content in [("tehran", "Tehran ![tower](https://img.example/milad.jpg)"), ("shiraz", "Shiraz")]:
+            article = Article.objects.create(name=name, creator_id=uuid.uuid4())
+            article.current_version = Version.objects.create(
+                name=f"{name}-v1", article=article, content=content, editor_id=uuid.uuid4(),
+            )
+            article.save()
+
+    def setUp(self):
+        caches["default"].clear()
+        self.es = FakeElasticsearch()
+        indexing.bulk_index(self.es, indexing.indexed_articles())
+        self.addCleanup(setattr, indexing, "_ES", indexing._ES)
+        indexing._ES = self.es
+
+    def test_images_stored_with_version(self):
+        version = Version.objects.get(name="tehran-v1")
+        self.assertEqual(version.images, ["https://img.example/milad.jpg"])
+        self.assertEqual(extract_images("![a](https://x.example/1.png) text ![b](ftp://no)"), ["https://x.example/1.png"])
+
+        version.content = "no images"
+        version.save(update_fields=["content"])
+        version.refresh_from_db()
+        self.assertEqual(version.images, [])
+
+    def test_results_cached_until_reindex(self):
+        self.assertEqual(indexing.search_articles_semantic("Tehran")[0]["article_name"], "tehran")
+        indexing.search_articles_semantic("  tehran ")
+        self.assertEqual(self.es.searches, ["tehran"])
+
+        indexing.bulk_index(self.es, indexing.indexed_articles())
+        indexing.search_articles_semantic("tehran")
+        self.assertEqual(len(self.es.searches), 2)
+
+    def test_wiki_batch(self):
+        res = self.client.post(
+            "/team2/api/wiki/batch/", {"contents": ["Tehran", "shiraz", "Isfahan"]}, content_type="application/json",
+        )
+        self.assertEqual(res.status_code, 200)
+        tehran, shiraz, isfahan = res.json()["results"]
+        self.assertEqual((tehran["url"], tehran["images"]), ("/articles/tehran", ["https://img.example/milad.jpg"]))
+        self.assertEqual(shiraz["content"], "shiraz")
+        self.assertEqual(isfahan["detail"], "No results found.")
+
+        res = self.client.get("/team2/api/wiki/", {"content": "TEHRAN"})
+        self.assertEqual(res.json()["description"], tehran["description"])
+        self.assertEqual(len(self.es.searches), 3)
+
+
+class TopArticlesByTagTests(TestCase):
+    databases = {"default", "team2"}
+
+    @classmethod
+    def setUpTestData(cls):
+        history, food = Tag.objects.create(name="history"), Tag.objects.create(name="food")
+        for i, (score, tags) in enumerate([(5, [history]), (9, [history, food]), (1, [history]), (7, [history]), (3, [food])]):
+            article = Article.objects.create(name=f"article-{i}", creator_id=uuid.uuid4(), score=score)
+            version = Version.objects.create(name=f"article-{i}-v1", article=article, summary=f"summary {i}", editor_id=uuid.uuid4())
+            version.tags.set(tags)
+            article.current_version = version
+            article.save()
+
+    def setUp(self):
+        caches["default"].clear()
+
+    def test_ranked_in_one_query_and_cached(self):
+        with self.assertNumQueries(1, using="team2"):
+            res = self.client.get("/team2/api/articles/top-by-tag/")
+        self.assertEqual(
+            [(group["tag"], [a["name"] for a in group["articles"]]) for group in res.json()],
+            [("food", ["article-1", "article-4"]), ("history", ["article-1", "article-3", "article-0"])],
+        )
+        self.assertEqual(res.json()[0]["articles"][0], {"name": "article-1", "summary": "summary 1", "score": 9})
+
+        Article.objects.filter(name="article-2").update(score=100)
+        with self.assertNumQueries(0, using="team2"):
+            self.client.get("/team2/api/articles/top-by-tag/")
+        leaderboards.invalidate()
+        res = self.client.get("/team2/api/articles/top-by-tag/")
+        self.assertEqual(res.json()[1]["articles"][0]["name"], "article-2")
+
+
+class VoteTests(TestCase):
+    databases = {"default", "team2"}
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        from core.jwt_utils import create_access_token
+
+        caches["default"].clear()
+        self.user = get_user_model().objects.create_user(email="voter2@test.com", password="x-Strong-pass-42")
+        self.client.cookies["access_token"] = create_access_token(self.user)
+        self.article = Article.objects.create(name="tehran", creator_id=uuid.uuid4(), score=10)
+        self.updated_at = self.article.updated_at
+
+    def vote(self, value):
+        return self.client.post("/team2/api/vote/", {"article_name": "tehran", "value": value}, content_type="application/json")
+
+    def test_vote_change_and_repeat(self):
+        res = self.vote(1)
+        self.assertEqual(res.json(), {"article": "tehran", "score": 11, "your_vote": 1})
+        self.assertEqual(self.vote(1).status_code, 400)
+        self.assertEqual(self.vote(-1).json()["score"], 9)
+
+        article = Article.objects.get(name="tehran")
+        self.assertEqual((article.score, article.updated_at), (9, self.updated_at))
+        self.assertEqual(list(Vote.objects.values_list("value", flat=True)), [-1])
+
+    def test_score_updated_in_sql(self):
+        # Another vote landing between the request's read and write is kept.
+        Article.objects.filter(name="tehran").update(score=50)
+        self.assertEqual(self.vote(-1).json()["score"], 49)
+
+
+class FakeGemini:
+    def __init__(self, text):
+        self.text = text
+        self.prompts = []
+        self.models = self
+
+    def generate_content(self, model, contents):
+        self.prompts.append(contents)
+        return type("Response", (), {"text": self.text})()
+
+
+class GeminiCacheTests(TestCase):
+    databases = {"default", "team2"}
+
+    def setUp(self):
+        caches["default"].clear()
+        self.article = Article.objects.create(name="yazd", creator_id=uuid.uuid4())
+
+    def publish(self, name, content, summary=""):
+        version = Version.objects.create(
+            name=name, article=self.article, content=content, summary=summary, editor_id=uuid.uuid4(),
+        )
+        self.article.current_version = version
+        self.article.save()
+        return version
+
+    def test_unchanged_content_skips_gemini(self):
+        gemini = FakeGemini("خلاصه")
+        with mock.patch.object(llm_tasks, "_get_client", return_value=gemini):
+            self.publish("yazd-v1", "Yazd windcatchers")
+            self.assertEqual(llm_tasks.summarize_article("yazd"), "خلاصه")
+            self.publish("yazd-v2", "Yazd windcatchers")
+            self.assertEqual(llm_tasks.summarize_article("yazd"), "خلاصه")
+            self.assertEqual(len(gemini.prompts), 1)
+
+            # Cache lost: the summary of an identical version is reused.
+            caches["default"].clear()
+            self.publish("yazd-v3", "Yazd windcatchers")
+            llm_tasks.summarize_article("yazd")
+            self.assertEqual(len(gemini.prompts), 1)
+
+            self.publish("yazd-v4", "Yazd windcatchers and qanats")
+            llm_tasks.summarize_article("yazd")
+            self.assertEqual(len(gemini.prompts), 2)
+        self.assertEqual(Version.objects.get(name="yazd-v3").summary, "خلاصه")
+
+    def test_tags_cached_and_candidates_bounded(self):
+        Tag.objects.bulk_create([Tag(name=f"tag{i:03}") for i in range(150)] + [Tag(name="qanat")])
+        candidates = llm_tasks.tag_candidates("a qanat in Yazd")
+        self.assertEqual((len(candidates), candidates[0]), (llm_tasks.TAG_CANDIDATE_LIMIT, "qanat"))
+
+        gemini = FakeGemini('```json\n{"selected_existing_tags": ["qanat"], "new_tags": ["Desert"]}\n```')
+        with mock.patch.object(llm_tasks, "_get_client", return_value=gemini):
+            self.publish("yazd-v1", "a qanat in Yazd")
+            llm_tasks.tag_article("yazd")
+            version = self.publish("yazd-v2", "a qanat in Yazd")
+            llm_tasks.tag_article("yazd")
+        self.assertEqual(len(gemini.prompts), 1)
+        self.assertEqual(sorted(version.tags.values_list("name", flat=True)), ["desert", "qanat"])
+        self.assertIn("desert", llm_tasks.tag_vocabulary())
@@ -1,4 +1,3 @@
-import re
 import time
 import logging
 
@@ -13,16 +12,20 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from core.auth import api_login_required
 from .authentication import JWTMiddlewareAuthentication
-from django.db.models import Prefetch
-from .models import Article, Version, Vote, PublishRequest, Tag
+from django.db.models import F, Prefetch
+from django.utils import timezone
+from . import leaderboards
+from .models import Article, Version, Vote, PublishRequest
 from celery import chord
 from .serializers import (
     ArticleSerializer, VersionSerializer, CreateArticleSerializer,
     CreateVersionFromVersionSerializer, CreateEmptyVersionSerializer, VoteSerializer,
-    PublishRequestSerializer, CreatePublishRequestSerializer,
+    PublishRequestSerializer, CreatePublishRequestSerializer, WikiContentBatchSerializer,
 )
 from .tasks.tasks import summarize_article, tag_article
-from .tasks.indexing import index_article_version, search_articles_semantic
+from .tasks.indexing import (
+    index_article_version, normalize_query, search_articles_semantic, search_articles_semantic_many,
+)
 
 TEAM_NAME = "team2"
 
@@ -130,29 +133,34 @@ def vote(request):
     article_name = serializer.validated_data['article_name']
     value = serializer.validated_data['value']
 
-    article = get_object_or_404(Article, name=article_name)
+    article = get_object_or_404(Article.objects.only('name'), name=article_name)
     user_id = request.user.id
 
-    with transaction.atomic():
-        existing_vote = Vote.objects.filter(user_id=user_id, article=article).first()
+    with transaction.atomic(using=TEAM_NAME):
+        # Locks this user's vote row (or inserts it); concurrent votes by the same user queue here.
+        existing_vote, created = Vote.objects.select_for_update().get_or_create(
+            user_id=user_id, article=article, defaults={'value': value},
+        )
 
-        if existing_vote:
+        if created:
+            delta = value
+        else:
             if existing_vote.value == value:
                 return Response(
                     {"detail": "You have already voted this way."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            old_value = existing_vote.value
-            existing_vote.value = value
-            existing_vote.save()
-            article.score += value - old_value
-        else:
-            Vote.objects.create(user_id=user_id, article=article, value=value)
-            article.score += value
+            delta = value - existing_vote.value
+            Vote.objects.filter(pk=existing_vote.pk).update(value=value, updated_at=timezone.now())
 
-        article.save()
+        # Incremented in SQL, so concurrent voters do not overwrite each other; update()
+        # leaves updated_at alone, which keeps votes from reordering newest_articles.
+        articles = Article.objects.filter(pk=article.pk)
+        articles.update(score=F('score') + delta)
+        score = articles.values_list('score', flat=True).get()
 
-    return Response({"article": article.name, "score": article.score, "your_vote": value})
+    leaderboards.invalidate()
+    return Response({"article": article.name, "score": score, "your_vote": value})
 
 
 @api_view(['PATCH'])
@@ -185,6 +193,7 @@ def publish_version(request, version_name):
     chord(
         [tag_article.s(article.name), summarize_article.s(article.name)]
     )(index_article_version.s(version.name))
+    leaderboards.invalidate()
 
     return Response(ArticleSerializer(article).data)
 
@@ -253,6 +262,37 @@ def search_articles(request):
     return resp
 
 
+def _wiki_entries(contents):
+    """
+    wiki_content payloads for `contents`, keyed by normalized content (None when nothing
+    matched): one search round trip for the uncached queries and one article query.
+    """
+    hits = {
+        query: results[0] if results else None
+        for query, results in search_articles_semantic_many(contents, size=1).items()
+    }
+    articles = Article.objects.select_related('current_version').in_bulk(
+        {hit["article_name"] for hit in hits.values() if hit}
+    )
+
+    entries = {}
+    for query, hit in hits.items():
+        article = articles.get(hit["article_name"]) if hit else None
+        if article is None:
+            entries[query] = None
+            continue
+        version = article.current_version
+        entries[query] = {
+            "tags": hit.get("tags", []),
+            "summary": version.summary if version else "",
+            "description": version.content if version else "",
+            "images": version.images if version else [],
+            "url": f"/articles/{article.name}",
+            "updated_at": article.updated_at.isoformat() if article.updated_at else None,
+        }
+    return entries
+
+
 @api_view(['GET'])
 @authentication_classes(AUTH_CLASSES)
 @permission_classes([AllowAny])
@@ -262,39 +302,43 @@ def wiki_content(request):
         return Response({"detail": "Query parameter 'content' is required."}, status=400)
 
     try:
-        results = search_articles_semantic(content, size=1)
+        entry = _wiki_entries([content])[normalize_query(content)]
     except Exception as e:
         return Response(
             {"detail": f"Search service unavailable: {e}"},
             status=status.HTTP_503_SERVICE_UNAVAILABLE,
         )
 
-    if not results:
+    if entry is None:
         return Response({"detail": "No results found."}, status=404)
 
-    hit = results[0]
-    article_name = hit["article_name"]
+    return Response(entry)
 
-    try:
-        article = Article.objects.select_related('current_version').get(name=article_name)
-    except Article.DoesNotExist:
-        return Response({"detail": "Article not found."}, status=404)
 
-    version = article.current_version
-    content = version.content if version else ""
-    summary = version.summary if version else ""
-    tags = hit.get("tags", [])
+@api_view(['POST'])
+@authentication_classes(AUTH_CLASSES)
+@permission_classes([AllowAny])
+def wiki_content_batch(request):
+    serializer = WikiContentBatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    contents = serializer.validated_data['contents']
 
-    images = re.findall(r'!\[.*?\]\((https?://\S+?)\)', content)
+    try:
+        entries = _wiki_entries(contents)
+    except Exception as e:
+        return Response(
+            {"detail": f"Search service unavailable: {e}"},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
 
-    return Response({
-        "tags": tags,
-        "summary": summary,
-        "description": content,
-        "images": images,
-        "url": f"/articles/{article_name}",
-        "updated_at": article.updated_at.isoformat() if article.updated_at else None,
-    })
+    results = []
+    for content in contents:
+        entry = entries[normalize_query(content)]
+        if entry is None:
+            results.append({"content": content, "detail": "No results found."})
+        else:
+            results.append({"content": content, **entry})
+    return Response({"results": results})
 
 
 @api_view(['POST'])
@@ -386,6 +430,7 @@ def approve_publish_request(request, pk):
     chord(
         [tag_article.s(article.name), summarize_article.s(article.name)]
     )(index_article_version.s(version.name))
+    leaderboards.invalidate()
 
     return Response(PublishRequestSerializer(pub_request).data)
 
@@ -457,30 +502,4 @@ def top_rated_articles(request):
 @authentication_classes(AUTH_CLASSES)
 @permission_classes([AllowAny])
 def top_articles_by_tag(request):
-    tags = Tag.objects.all()
-    result = []
-
-    for tag in tags:
-        articles = Article.objects.filter(
-            current_version__isnull=False,
-            current_version__tags=tag,
-        ).select_related('current_version').order_by('-score')[:3]
-
-        if not articles:
-            continue
-
-        items = []
-        for a in articles:
-            v = a.current_version
-            items.append({
-                "name": a.name,
-                "summary": v.summary if v else "",
-                "score": a.score,
-            })
-
-        result.append({
-            "tag": tag.name,
-            "articles": items,
-        })
-
-    return Response(result)
+    return Response(leaderboards.top_articles_by_tag())
@@ -4,6 +4,7 @@ from team4.models import (
     Facility, FacilityAmenity, Pricing, Image,
     Favorite, Review
 )
+from team4.services import ratings
 
 
 # =====================================================
@@ -162,14 +163,16 @@ class ReviewAdmin(admin.ModelAdmin):
     actions = ['approve_reviews', 'disapprove_reviews']
     
     def approve_reviews(self, request, queryset):
-        queryset.update(is_approved=True)
-        for review in queryset:
-            review.update_facility_rating()
+        self._set_approval(queryset, True)
     approve_reviews.short_description = "تایید نظرات انتخاب شده"
     
     def disapprove_reviews(self, request, queryset):
-        queryset.update(is_approved=False)
-        for review in queryset:
-            review.update_facility_rating()
+        self._set_approval(queryset, False)
     disapprove_reviews.short_description = "رد نظرات انتخاب شده"
+    
+    def _set_approval(self, queryset, approved):
+        # update() از Review.save رد می‌شود؛ امتیاز هر مکان درگیر یک بار از نو محاسبه می‌شود
+        facility_ids = set(queryset.values_list('facility_id', flat=True))
+        queryset.update(is_approved=approved)
+        ratings.recalculate(queryset.db, facility_ids)
 
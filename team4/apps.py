@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class Team4Config(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'team4'
+
+    def ready(self):
+        from .fields import register_sqlite_functions
+        from . import reference_cache
+        from .services import facility_service, region_service, search_index  # noqa: F401 - registers the name indexes
+
+        connection_created.connect(register_sqlite_functions, dispatch_uid='team4_sqlite_functions')
+        search_index.connect_signals()
+        reference_cache.connect_signals()
@@ -1,7 +1,13 @@
+import struct
+
 from django.db import models
 from django.core.exceptions import ValidationError
-from django.db.models import Func, Value
-import math
+from django.db.models import FloatField, Func, Lookup, Value
+
+from core.geo import EARTH_RADIUS_KM, bounding_box, haversine_km
+
+EARTH_RADIUS_M = EARTH_RADIUS_KM * 1000
+_WKB_POINT = 1
 
 
 class Point:
@@ -32,24 +38,68 @@ class Point:
         """
         if not isinstance(other, Point):
             raise TypeError("other must be a Point object")
-        
-        # Convert to radians
-        lat1 = math.radians(self.latitude)
-        lat2 = math.radians(other.latitude)
-        lon1 = math.radians(self.longitude)
-        lon2 = math.radians(other.longitude)
-        
-        # Haversine formula
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        
-        # Earth radius in kilometers
-        r = 6371
-        
-        return c * r
+        return haversine_km(self.latitude, self.longitude, other.latitude, other.longitude)
+
+
+def point_to_wkb(longitude, latitude):
+    """Little-endian WKB of POINT(longitude latitude)."""
+    return struct.pack('<BIdd', 1, _WKB_POINT, longitude, latitude)
+
+
+def point_from_wkb(value):
+    """
+    Point from WKB (ST_AsBinary) or MySQL's internal format (4-byte SRID + WKB).
+    """
+    value = bytes(value)
+    if len(value) == 25:
+        value = value[4:]
+    order = '<' if value[0] == 1 else '>'
+    geom_type, longitude, latitude = struct.unpack(order + 'Idd', value[1:21])
+    if geom_type != _WKB_POINT:
+        raise ValueError(f"expected a WKB point, got geometry type {geom_type}")
+    return Point(longitude, latitude)
+
+
+def point_from_wkt(value):
+    """Point from WKT "POINT(lon lat)"."""
+    coords = value.strip()[len('POINT('):-1].split()
+    return Point(float(coords[0]), float(coords[1]))
+
+
+def _sqlite_geometry(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return point_from_wkt(value)
+    return point_from_wkb(value)
+
+
+def _sqlite_distance_sphere(g1, g2, radius_m=EARTH_RADIUS_M):
+    p1, p2 = _sqlite_geometry(g1), _sqlite_geometry(g2)
+    if p1 is None or p2 is None:
+        return None
+    return haversine_km(p1.latitude, p1.longitude, p2.latitude, p2.longitude) * radius_m / EARTH_RADIUS_KM
+
+
+def register_sqlite_functions(sender, connection, **kwargs):
+    """
+    SQLite has no spatial functions. Register Python versions of the ones PointField and its
+    lookups use, storing points as WKB like MySQL (tests, offline benchmarks). Rows written as
+    WKT text by older versions still read back.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    create = connection.connection.create_function
+
+    def as_binary(geom):
+        point = _sqlite_geometry(geom)
+        return None if point is None else point_to_wkb(point.longitude, point.latitude)
+
+    create('ST_GeomFromText', 1, lambda wkt: as_binary(wkt), deterministic=True)
+    create('ST_AsBinary', 1, as_binary, deterministic=True)
+    create('ST_X', 1, lambda geom: getattr(_sqlite_geometry(geom), 'longitude', None), deterministic=True)
+    create('ST_Y', 1, lambda geom: getattr(_sqlite_geometry(geom), 'latitude', None), deterministic=True)
+    create('ST_Distance_Sphere', 3, _sqlite_distance_sphere, deterministic=True)
 
 
 class PointField(models.Field):
@@ -68,23 +118,12 @@ class PointField(models.Field):
         return 'POINT'
     
     def from_db_value(self, value, expression, connection):
-        """Convert from MySQL POINT to Python Point object"""
+        """Convert the WKB selected by select_format to a Python Point object"""
         if value is None:
             return None
-        
-        # With ST_AsText, MySQL returns as string "POINT(lon lat)"
         if isinstance(value, str):
-            if value.startswith('POINT('):
-                coords = value.replace('POINT(', '').replace(')', '').split()
-                return Point(float(coords[0]), float(coords[1]))
-        
-        # If it's bytes, parse WKB format
-        if isinstance(value, bytes):
-            import struct
-            lon, lat = struct.unpack('<dd', value[5:])
-            return Point(lon, lat)
-        
-        return value
+            return point_from_wkt(value)
+        return point_from_wkb(value)
     
     def to_python(self, value):
         """Convert to Python Point object"""
@@ -100,11 +139,8 @@ class PointField(models.Field):
         if isinstance(value, dict):
             return Point(value['longitude'], value['latitude'])
         
-        if isinstance(value, str):
-            # Parse WKT: "POINT(lon lat)"
-            if value.startswith('POINT('):
-                coords = value.replace('POINT(', '').replace(')', '').split()
-                return Point(float(coords[0]), float(coords[1]))
+        if isinstance(value, str) and value.startswith('POINT('):
+            return point_from_wkt(value)
         
         return value
     
@@ -134,6 +170,9 @@ class PointField(models.Field):
         """Prepare value for saving to database - return raw SQL expression"""
         if value is None:
             return None
+        if hasattr(value, 'as_sql'):
+            # عبارت‌ها (مثلاً Case در bulk_update) خودشان کامپایل می‌شوند
+            return value
             
         # Prepare the value first
         value = self.get_prep_value(value)
@@ -158,13 +197,14 @@ class PointField(models.Field):
     def get_placeholder(self, value, compiler, connection):
         """Return placeholder for SQL query"""
         # For MySQL/MariaDB POINT type, use ST_GeomFromText
+        if hasattr(value, 'as_sql'):
+            # already a geometry: Value()s inside it carry their own ST_GeomFromText
+            return "%s"
         return "ST_GeomFromText(%s)"
     
     def select_format(self, compiler, sql, params):
-        """Format SELECT to return location as binary data that can be parsed"""
-        # Return as-is, MySQL will return as WKB binary
-        # Or use ST_AsText for text format
-        return f"ST_AsText({sql})", params
+        """Select the location as standard WKB (decoded with struct, no string parsing)"""
+        return f"ST_AsBinary({sql})", params
     
     def value_to_string(self, obj):
         """Serialize for fixtures"""
@@ -174,3 +214,79 @@ class PointField(models.Field):
         if isinstance(value, Point):
             return f"{value.longitude},{value.latitude}"
         return str(value)
+
+
+def _center_and_radius(value):
+    """(Point, radius_km) from (lng, lat, radius_km) or (Point, radius_km)."""
+    if isinstance(value, (tuple, list)):
+        if len(value) == 3:
+            return Point(value[0], value[1]), float(value[2])
+        if len(value) == 2 and isinstance(value[0], Point):
+            return value[0], float(value[1])
+    raise ValueError("within_km expects (lng, lat, radius_km) or (Point, radius_km)")
+
+
+@PointField.register_lookup
+class WithinKm(Lookup):
+    """
+    location__within_km=(lng, lat, radius_km): points within radius_km on the sphere.
+
+    On MySQL/MariaDB an MBRContains test against the bounding box lets the spatial index
+    pick the candidates and ST_Distance_Sphere refines them. Elsewhere (SQLite) the box is
+    compared on ST_X/ST_Y and the refine runs in Python through the registered functions.
+    """
+
+    lookup_name = 'within_km'
+    prepare_rhs = False
+
+    def get_prep_lookup(self):
+        return _center_and_radius(self.rhs)
+
+    def _refine(self, lhs, lhs_params):
+        center, radius_km = self.rhs
+        sql = f"ST_Distance_Sphere({lhs}, ST_GeomFromText(%s), %s) <= %s"
+        params = [*lhs_params, f"POINT({center.longitude} {center.latitude})", EARTH_RADIUS_M, radius_km * 1000]
+        return sql, params
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        center, radius_km = self.rhs
+        min_lat, max_lat, min_lng, max_lng = bounding_box(center.latitude, center.longitude, radius_km)
+        refine_sql, refine_params = self._refine(lhs, lhs_params)
+        sql = f"(ST_Y({lhs}) BETWEEN %s AND %s AND ST_X({lhs}) BETWEEN %s AND %s AND {refine_sql})"
+        return sql, [*lhs_params, min_lat, max_lat, *lhs_params, min_lng, max_lng, *refine_params]
+
+    def as_mysql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        center, radius_km = self.rhs
+        min_lat, max_lat, min_lng, max_lng = bounding_box(center.latitude, center.longitude, radius_km)
+        box = (
+            f"POLYGON(({min_lng} {min_lat}, {max_lng} {min_lat}, {max_lng} {max_lat}, "
+            f"{min_lng} {max_lat}, {min_lng} {min_lat}))"
+        )
+        refine_sql, refine_params = self._refine(lhs, lhs_params)
+        return f"(MBRContains(ST_GeomFromText(%s), {lhs}) AND {refine_sql})", [box, *lhs_params, *refine_params]
+
+
+class Distance(Func):
+    """
+    Great-circle distance in kilometres from a PointField to a fixed point:
+    Facility.objects.annotate(distance_km=Distance('location', Point(lng, lat))).
+    """
+
+    function = 'ST_Distance_Sphere'
+    output_field = FloatField()
+
+    def __init__(self, expression, point, **extra):
+        if isinstance(point, (tuple, list)):
+            point = Point(point[0], point[1])
+        super().__init__(
+            expression,
+            Func(Value(f"POINT({point.longitude} {point.latitude})"), function='ST_GeomFromText'),
+            Value(EARTH_RADIUS_M),
+            **extra,
+        )
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = super().as_sql(compiler, connection, **extra_context)
+        return f"({sql} / 1000)", params
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from team4.services import city_distance
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes every facility's stored distance_to_city_center_km from its location and its "
+        "city's location, one UPDATE per city"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', type=str, default='team4')
+        parser.add_argument('--missing-only', action='store_true', help='Only fill facilities without a stored distance')
+        parser.add_argument('--city', type=int, action='append', dest='city_ids', help='Limit to this city id (repeatable)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        updated = city_distance.refresh(
+            options['database'], city_ids=options['city_ids'], missing_only=options['missing_only']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{updated} facilities updated in {time.perf_counter() - started:.2f}s'
+        ))
@@ -1,12 +1,20 @@
-import os
+import time
 from django.core.management import BaseCommand, call_command
+from team4.management.fixture_loader import DEFAULT_BATCH_SIZE
 from team4.models import Facility
 
+# دستوراتی که با fixture_loader به صورت دسته‌ای می‌نویسند و --batch-size می‌پذیرند
+BATCHED_COMMANDS = {'load_villages', 'load_hospitals', 'load_hotels', 'load_restaurants', 'load_museums'}
+
 class Command(BaseCommand):
     help = 'Cleans the DB and runs all load commands, showing only final counts'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
     def handle(self, *args, **options):
         db = 'team4'
+        started = time.perf_counter()
 
         # ۱. پاکسازی Facility
         self.stdout.write(self.style.WARNING('🗑️  In progress: Clearing Facility table...'))
@@ -29,10 +37,13 @@ class Command(BaseCommand):
         self.stdout.write(self.style.MIGRATE_HEADING('\n🚀 Starting Data Import...'))
 
         for cmd in commands_to_run:
+            options_for_cmd = {'batch_size': options['batch_size']} if cmd in BATCHED_COMMANDS else {}
+            cmd_started = time.perf_counter()
             try:
                 # اجرای دستور بدون چاپ جزییات داخلی (Silent execution)
-                call_command(cmd, database=db)
-                self.stdout.write(self.style.SUCCESS(f'✔ {cmd}: Completed successfully.'))
+                call_command(cmd, database=db, **options_for_cmd)
+                elapsed = time.perf_counter() - cmd_started
+                self.stdout.write(self.style.SUCCESS(f'✔ {cmd}: Completed successfully ({elapsed:.2f}s).'))
             except Exception:
                 # در صورت بروز خطا فقط نام دستور را نمایش می‌دهد
                 self.stdout.write(self.style.ERROR(f'✘ {cmd}: Encountered some issues during import.'))
@@ -45,4 +56,5 @@ class Command(BaseCommand):
         except Exception:
             self.stdout.write(self.style.ERROR('Could not retrieve final stats.'))
 
-        self.stdout.write(self.style.SUCCESS('\n✨ Full process finished.'))
\ No newline at end of file
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'\n✨ Full process finished in {elapsed:.1f}s.'))
\ No newline at end of file
@@ -1,21 +1,30 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from team4.management.fixture_loader import LoadStats, iter_json_array, point_from
 from team4.models import City, Province
-from team4.fields import Point
-import json
 
 class Command(BaseCommand):
     help = 'Load cities with location data'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--database', type=str, default='team4')
+
     def handle(self, *args, **options):
+        db = options['database']
         fixture_path = 'team4/fixtures/cities.json'
         
-        with open(fixture_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        province_ids = set(Province.objects.using(db).values_list('province_id', flat=True))
+        stats = LoadStats()
         
-        updated_count = 0
-        created_count = 0
-        skipped_count = 0
+        # یک تراکنش برای کل فایل به جای commit بعد از هر شهر
+        with transaction.atomic(using=db):
+            self.load(db, iter_json_array(fixture_path), province_ids, stats)
         
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ Complete: {stats.created} created, {stats.updated} updated, {stats.skipped} skipped - {stats.summary()}'
+        ))
+
+    def load(self, db, data, province_ids, stats):
         for item in data:
             city_id = item['city_id']
             name_fa = item['name_fa']
@@ -24,24 +33,19 @@ class Command(BaseCommand):
             province_data = item.get('province', {})
             p_id = province_data.get('province_id')
             
-            try:
-                province = Province.objects.using('team4').get(province_id=p_id)
-            except Province.DoesNotExist:
-                skipped_count += 1
+            if p_id not in province_ids:
+                stats.skipped += 1
                 continue
             
-            location = None
-            loc_data = item.get('location', {})
-            if loc_data.get('latitude') and loc_data.get('longitude'):
-                location = Point(float(loc_data['longitude']), float(loc_data['latitude']))
+            location = point_from(item.get('location'))
             
             # --- FIX: Use update_or_create to handle Unique Constraints ---
             try:
                 # We identify the city by its English Name and Province
                 # This bypasses the Duplicate Entry error
-                city, created = City.objects.using('team4').update_or_create(
+                city, created = City.objects.using(db).update_or_create(
                     name_en=name_en,
-                    province=province,
+                    province_id=p_id,
                     defaults={
                         'city_id': city_id, # Sync the ID
                         'name_fa': name_fa,
@@ -50,14 +54,11 @@ class Command(BaseCommand):
                 )
                 
                 if created:
-                    created_count += 1
+                    stats.created += 1
                 else:
-                    updated_count += 1
+                    stats.updated += 1
                     
             except Exception as e:
+                # update_or_create runs in its own savepoint, so the outer transaction survives
                 self.stdout.write(self.style.ERROR(f'❌ Error with {name_en}: {e}'))
-                skipped_count += 1
-        
-        self.stdout.write(self.style.SUCCESS(
-            f'\n✅ Complete: {created_count} created, {updated_count} updated, {skipped_count} skipped'
-        ))
\ No newline at end of file
+                stats.skipped += 1
\ No newline at end of file
@@ -6,7 +6,11 @@ import json
 class Command(BaseCommand):
     help = 'Load provinces with location data'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--database', type=str, default='team4')
+
     def handle(self, *args, **options):
+        db = options['database']
         fixture_path = 'team4/fixtures/province.json'
         
         with open(fixture_path, 'r', encoding='utf-8') as f:
@@ -30,7 +34,7 @@ class Command(BaseCommand):
                 location = Point(lng, lat)
             
             # Use update_or_create to simplify the logic
-            province, created = Province.objects.using('team4').update_or_create(
+            province, created = Province.objects.using(db).update_or_create(
                 province_id=p_id,
                 defaults={
                     'name_fa': name_fa,
@@ -1,70 +1,83 @@
+import os
+
 from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from team4.management.fixture_loader import DEFAULT_BATCH_SIZE, LoadStats, fixture_path, iter_json_array, point_from
 from team4.models import Village, City
-from team4.fields import Point # Ensure this matches your PointField's helper
-import json
+from team4 import reference_cache
+from team4.services import search_index
+
 
 class Command(BaseCommand):
     help = 'Load villages from JSON fixture'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--database', type=str, default='team4')
+        parser.add_argument('--file', type=str, default='villages.json')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
     def handle(self, *args, **options):
-        fixture_path = 'team4/fixtures/villages.json'
-        
+        db = options['database']
+        batch_size = max(1, options['batch_size'])
+        path = fixture_path(options['file'])
+
+        if not os.path.exists(path):
+            self.stdout.write(self.style.ERROR(f'File not found at {path}'))
+            return
+
         # Clear existing data to avoid UniqueTogether errors
         self.stdout.write("Cleaning existing villages...")
-        Village.objects.using('team4').all().delete()
-        
-        try:
-            with open(fixture_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except FileNotFoundError:
-            self.stdout.write(self.style.ERROR(f'File not found at {fixture_path}'))
-            return
+        Village.objects.using(db).all().delete()
 
-        created_count = 0
-        skipped_count = 0
+        city_ids = set(City.objects.using(db).values_list('city_id', flat=True))
+        seen = set()
+        stats = LoadStats()
+        batch = []
 
-        for item in data:
-            village_id = item['village_id']
+        def flush():
+            with transaction.atomic(using=db):
+                Village.objects.using(db).bulk_create(batch)
+            stats.created += len(batch)
+            batch.clear()
+
+        for item in iter_json_array(path):
             name_fa = item['name_fa']
             name_en = item['name_en']
-            
-            # Your model only links to City. 
-            # We extract city_id from the nested JSON object.
-            city_data = item.get('city', {})
-            city_id = city_data.get('city_id')
 
-            try:
-                city = City.objects.using('team4').get(city_id=city_id)
-            except City.DoesNotExist:
+            # Your model only links to City.
+            # We extract city_id from the nested JSON object.
+            city_id = (item.get('city') or {}).get('city_id')
+            if city_id not in city_ids:
                 self.stdout.write(self.style.WARNING(
                     f'⚠ Skipping {name_fa}: City {city_id} not found'
                 ))
-                skipped_count += 1
+                stats.skipped += 1
                 continue
+            if (city_id, name_en) in seen:
+                self.stdout.write(self.style.WARNING(
+                    f'⚠ Skipping {name_fa}: duplicate name_en {name_en} in city {city_id}'
+                ))
+                stats.skipped += 1
+                continue
+            seen.add((city_id, name_en))
 
-            # Process Location
-            location_data = item.get('location', {})
-            location = None
-            if location_data.get('latitude') and location_data.get('longitude'):
-                lat = float(location_data['latitude'])
-                lng = float(location_data['longitude'])
-                # Using Point class to match your PointField requirements
-                location = Point(lng, lat)
-
-            # Create the record
-            # We use village_id=village_id because you have it in your JSON
-            Village.objects.using('team4').create(
-                village_id=village_id,
+            batch.append(Village(
+                village_id=item['village_id'],
                 name_fa=name_fa,
                 name_en=name_en,
-                city=city,
-                location=location
-            )
-            created_count += 1
-
-            if created_count % 500 == 0:
-                self.stdout.write(f'... Created {created_count} villages')
+                city_id=city_id,
+                location=point_from(item.get('location')),
+            ))
+            if len(batch) >= batch_size:
+                flush()
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'... {stats.summary()}')
+        if batch:
+            flush()
+        search_index.invalidate('village')
+        reference_cache.invalidate('regions')
 
         self.stdout.write(self.style.SUCCESS(
-            f'\n✅ Done: {created_count} villages created, {skipped_count} skipped'
-        ))
\ No newline at end of file
+            f'\n✅ Done: {stats.created} villages created, {stats.skipped} skipped - {stats.summary()}'
+        ))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from team4.services import ratings
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes every facility's avg_rating, review_count and rating_sum from approved reviews "
+        "in bulk and reports the facilities whose stored values had drifted"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', type=str, default='team4')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing fixes')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--show', type=int, default=20, help='How many drifted facilities to list')
+
+    def handle(self, *args, **options):
+        drift = ratings.recalculate(
+            options['database'], dry_run=options['dry_run'], batch_size=options['batch_size']
+        )
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('No drift: all facility ratings match their reviews'))
+            return
+
+        count_drift = sum(abs(stored[0] - expected[0]) for _, stored, expected in drift)
+        avg_drift = max(abs(stored[2] - expected[2]) for _, stored, expected in drift)
+        for fac_id, stored, expected in drift[:options['show']]:
+            self.stdout.write(
+                f' facility {fac_id:>8} | reviews {stored[0]:>5} -> {expected[0]:<5} '
+                f'| stars {stored[1]:>6} -> {expected[1]:<6} | avg {stored[2]} -> {expected[2]}'
+            )
+        if len(drift) > options['show']:
+            self.stdout.write(f' ... and {len(drift) - options["show"]} more')
+
+        verb = 'would be fixed' if options['dry_run'] else 'fixed'
+        self.stdout.write(self.style.WARNING(
+            f'{len(drift)} facilities drifted ({verb}); review count off by {count_drift} in total, '
+            f'largest avg_rating error {avg_drift}'
+        ))
@@ -0,0 +1,342 @@
+"""
+Shared machinery for the team4 fixture loaders (load_hotels, load_hospitals, load_museums,
+load_restaurants, load_villages).
+
+Fixtures are top-level JSON arrays of several megabytes. iter_json_array() decodes them one
+element at a time from fixed-size chunks instead of json.load()ing the whole file, and
+FacilityFixtureCommand resolves cities and categories from maps built once, then writes in
+batches: one transaction per batch with bulk_create/bulk_update and two lookup queries.
+
+bulk_create/bulk_update skip Facility.save() and model signals, so the loader fills what those
+would: the grid cell (services/spatial_index), the distance to the city center
+(services/city_distance), rating_sum (services/ratings), updated_at, and invalidates the name
+search index (services/search_index) once at the end.
+"""
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from team4.fields import Point
+from team4.models import Amenity, Category, City, Facility, FacilityAmenity
+from team4.services import city_distance, search_index
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fixtures')
+DEFAULT_BATCH_SIZE = 500
+
+_WHITESPACE = ' \t\n\r'
+
+
+def fixture_path(filename):
+    """`filename` as given if it exists, otherwise inside team4/fixtures."""
+    if os.path.exists(filename):
+        return filename
+    return os.path.join(FIXTURES_DIR, filename)
+
+
+def iter_json_array(path, chunk_size=64 * 1024):
+    """Yield the elements of the top-level JSON array in `path`, reading chunk_size characters at a time."""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer, pos, eof = '', 0, False
+
+        def skip(chars):
+            nonlocal pos
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+
+        def fill():
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            return not eof
+
+        fill()
+        skip(_WHITESPACE)
+        if buffer[pos:pos + 1] != '[':
+            raise ValueError(f'{path}: expected a JSON array')
+        pos += 1
+        while True:
+            skip(_WHITESPACE + ',')
+            if pos == len(buffer):
+                if not fill():
+                    raise ValueError(f'{path}: unterminated JSON array')
+                continue
+            if buffer[pos] == ']':
+                return
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if fill():
+                    continue
+                raise
+            # A scalar at the end of the buffer may continue in the next chunk ("12" of "123").
+            if end == len(buffer) and not eof and fill():
+                continue
+            pos = end
+            yield value
+
+
+def point_from(location):
+    """Point from a fixture's {"latitude": .., "longitude": ..}, or None."""
+    location = location or {}
+    if location.get('latitude') and location.get('longitude'):
+        return Point(float(location['longitude']), float(location['latitude']))
+    return None
+
+
+class LoadStats:
+    def __init__(self):
+        self.created = self.updated = self.unchanged = self.skipped = 0
+        self.started = time.perf_counter()
+
+    @property
+    def rows(self):
+        return self.created + self.updated + self.unchanged + self.skipped
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        rate = self.rows / elapsed if elapsed else 0
+        return f'{self.rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)'
+
+
+class FacilityFixtureCommand(BaseCommand):
+    """
+    Base for commands loading one facility fixture. A row updates the facility with the same
+    name_fa in the same city, or creates one; subclasses set the fixture and category and
+    implement type_fields().
+    """
+    fixture = None
+    # Category of rows whose category_id is missing or unknown: the first whose name_fa contains this.
+    category_name_fa = None
+    # Category of every row, ignoring the fixture's category_id (None: use the fixture's).
+    category_id = None
+    # name_en is unique per city: rename a clashing row to "name_en (id)" instead of skipping it.
+    rename_duplicates = False
+
+    UPDATE_FIELDS = [
+        'name_en', 'category', 'address', 'location', 'grid_row', 'grid_col', 'distance_to_city_center_km',
+        'phone', 'email', 'website', 'description_fa', 'description_en', 'avg_rating', 'review_count',
+        'rating_sum', 'status', 'is_24_hour', 'price_tier', 'updated_at',
+    ]
+    COMPARED_FIELDS = [name for name in UPDATE_FIELDS if name != 'updated_at']
+
+    def type_fields(self, item):
+        """status, is_24_hour and price_tier of the row, with this facility type's defaults."""
+        raise NotImplementedError
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', type=str, default='team4')
+        parser.add_argument('--file', type=str, default=self.fixture)
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        self.db = options['database']
+        batch_size = max(1, options['batch_size'])
+        path = fixture_path(options['file'])
+        if not os.path.exists(path):
+            self.stdout.write(self.style.ERROR(f'❌ فایل یافت نشد: {path}'))
+            return
+
+        self.load_maps()
+        self.stats = LoadStats()
+        batch = []
+        for item in iter_json_array(path):
+            row = self.build(item)
+            if row is None:
+                self.stats.skipped += 1
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                self.flush(batch)
+                batch = []
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'... {self.stats.summary()}')
+        if batch:
+            self.flush(batch)
+        search_index.invalidate('facilities')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ {self.fixture}: {self.stats.created} ایجاد، {self.stats.updated} بروزرسانی، '
+            f'{self.stats.unchanged} بدون تغییر، {self.stats.skipped} پرش - {self.stats.summary()}'
+        ))
+
+    def load_maps(self):
+        cities = City.objects.using(self.db).values_list('city_id', 'name_fa', 'location').order_by('city_id')
+        self.city_locations, self.city_by_name = {}, {}
+        for city_id, name_fa, location in cities:
+            self.city_locations[city_id] = location
+            self.city_by_name.setdefault(name_fa, city_id)
+
+        categories = Category.objects.using(self.db).values_list('category_id', 'name_fa').order_by('category_id')
+        self.categories, self.default_category = set(), None
+        for category_id, name_fa in categories:
+            self.categories.add(category_id)
+            if self.default_category is None and self.category_name_fa and self.category_name_fa in (name_fa or ''):
+                self.default_category = category_id
+        if self.category_id is not None and self.category_id in self.categories:
+            self.default_category = self.category_id
+
+        self.amenity_ids = set(Amenity.objects.using(self.db).values_list('amenity_id', flat=True))
+
+    def resolve_city(self, item):
+        city_id = item.get('city_id')
+        if city_id in self.city_locations:
+            return city_id
+        return self.city_by_name.get(item.get('city_name_fa'))
+
+    def build(self, item):
+        """(Facility, amenity ids, fixture id) for one fixture row, or None to skip it."""
+        name_fa = item.get('name_fa')
+        if not name_fa:
+            return None
+
+        city_id = self.resolve_city(item)
+        if city_id is None:
+            self.stdout.write(self.style.WARNING(
+                f'⚠ شهر یافت نشد: {item.get("city_name_fa")} (ID: {item.get("city_id")}) برای {name_fa}'
+            ))
+            return None
+
+        category_id = self.default_category
+        if self.category_id is None and item.get('category_id') in self.categories:
+            category_id = item['category_id']
+        if category_id is None:
+            return None
+
+        location = point_from(item.get('location'))
+        if location is None:
+            self.stdout.write(self.style.WARNING(f'⚠ موقعیت جغرافیایی ندارد: {name_fa}'))
+            return None
+
+        avg_rating = item.get('avg_rating', 0.0) or 0.0
+        review_count = item.get('review_count', 0) or 0
+        facility = Facility(
+            name_fa=name_fa,
+            name_en=item.get('name_en', ""),
+            category_id=category_id,
+            city_id=city_id,
+            address=item.get('address', ""),
+            location=location,
+            phone=item.get('phone', ""),
+            email=item.get('email', ""),
+            website=item.get('website', ""),
+            description_fa=item.get('description_fa', ""),
+            description_en=item.get('description_en', ""),
+            avg_rating=avg_rating,
+            review_count=review_count,
+            # فیکسچرها نظر ندارند؛ مجموع امتیاز از میانگین بازسازی می‌شود تا نظرات بعدی درست جمع شوند
+            rating_sum=round(float(avg_rating) * review_count),
+            **self.type_fields(item),
+        )
+        facility.update_grid_cell()
+        facility.distance_to_city_center_km = city_distance.distance_km(location, self.city_locations[city_id])
+        amenities = [a for a in item.get('amenities') or () if a in self.amenity_ids]
+        return facility, amenities, item.get('id', name_fa)
+
+    def flush(self, batch):
+        try:
+            with transaction.atomic(using=self.db):
+                self.write(batch)
+        except DatabaseError as e:
+            if len(batch) == 1:
+                self.stdout.write(self.style.ERROR(f'❌ خطا در ذخیره {batch[0][0].name_fa}: {e}'))
+                self.stats.skipped += 1
+                return
+            # Isolate the failing rows; the others are still written.
+            for row in batch:
+                self.flush([row])
+
+    def write(self, batch):
+        facilities = Facility.objects.using(self.db)
+        links = FacilityAmenity.objects.using(self.db)
+        city_ids = {facility.city_id for facility, _, _ in batch}
+        names_fa = {facility.name_fa for facility, _, _ in batch}
+        names_en = {facility.name_en for facility, _, _ in batch}
+        existing = {
+            (facility.name_fa, facility.city_id): facility
+            for facility in facilities.filter(city_id__in=city_ids, name_fa__in=names_fa)
+            .only('fac_id', 'name_fa', 'city_id', *self.COMPARED_FIELDS)
+        }
+        taken = {
+            (name_en, city_id): fac_id
+            for fac_id, name_en, city_id in facilities.filter(city_id__in=city_ids, name_en__in=names_en)
+            .values_list('fac_id', 'name_en', 'city_id')
+        }
+        current_amenities = {}
+        for facility_id, amenity_id in links.filter(
+            facility_id__in=[facility.pk for facility in existing.values()]
+        ).values_list('facility_id', 'amenity_id'):
+            current_amenities.setdefault(facility_id, set()).add(amenity_id)
+
+        # Later rows for the same (name_fa, city) win, as with update_or_create row by row.
+        rows = {}
+        for facility, amenities, fixture_id in batch:
+            key = (facility.name_fa, facility.city_id)
+            if key in rows:
+                self.stats.updated += 1
+            rows[key] = (facility, amenities, fixture_id)
+
+        created, updated, now = [], [], timezone.now()
+        for key, (facility, amenities, fixture_id) in list(rows.items()):
+            stored = existing.get(key)
+            facility.pk = stored.pk if stored else None
+            owner = taken.get((facility.name_en, facility.city_id), facility.pk or key)
+            if owner != (facility.pk or key) and self.rename_duplicates:
+                facility.name_en = f'{facility.name_en} ({fixture_id})'
+                owner = taken.get((facility.name_en, facility.city_id), facility.pk or key)
+            if owner != (facility.pk or key):
+                self.stdout.write(self.style.WARNING(f'⚠ نام انگلیسی تکراری در شهر: {facility.name_en}'))
+                self.stats.skipped += 1
+                del rows[key]
+                continue
+            taken[(facility.name_en, facility.city_id)] = facility.pk or key
+            if stored is None:
+                created.append(facility)
+            elif self.snapshot(facility) != self.snapshot(stored):
+                facility.updated_at = now
+                updated.append(facility)
+            else:
+                self.stats.unchanged += 1
+
+        facilities.bulk_create(created)
+        # bulk_update is one CASE per field over the whole batch; rows equal to the stored ones are left out.
+        facilities.bulk_update(updated, self.UPDATE_FIELDS)
+        self.stats.created += len(created)
+        self.stats.updated += len(updated)
+
+        if any(facility.pk is None for facility in created):
+            # Backends that do not return ids from bulk inserts (MySQL).
+            ids = {
+                (name_fa, city_id): fac_id
+                for fac_id, name_fa, city_id in facilities.filter(
+                    city_id__in={f.city_id for f in created}, name_fa__in={f.name_fa for f in created}
+                ).values_list('fac_id', 'name_fa', 'city_id')
+            }
+            for facility in created:
+                facility.pk = ids[(facility.name_fa, facility.city_id)]
+
+        # Like amenities.set(): only rows listing amenities replace them, and only when they differ.
+        relinked = [
+            (facility, amenities) for facility, amenities, _ in rows.values()
+            if amenities and set(amenities) != current_amenities.get(facility.pk, set())
+        ]
+        if relinked:
+            links.filter(facility_id__in=[facility.pk for facility, _ in relinked]).delete()
+            links.bulk_create([
+                FacilityAmenity(facility_id=facility.pk, amenity_id=amenity_id)
+                for facility, amenities in relinked
+                for amenity_id in dict.fromkeys(amenities)
+            ])
+
+    def snapshot(self, facility):
+        values = []
+        for name in self.COMPARED_FIELDS:
+            field = Facility._meta.get_field(name)
+            value = field.to_python(getattr(facility, field.attname))
+            values.append(tuple(value) if isinstance(value, Point) else value)
+        return values
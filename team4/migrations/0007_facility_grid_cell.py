@@ -0,0 +1,56 @@
+# Generated by Django 4.2.27 on 2026-10-18 06:02
+
+import math
+
+from django.db import migrations, models
+
+# Frozen copy of team4.services.spatial_index.CELL_DEGREES / cell_of() as of this migration.
+CELL_DEGREES = 0.05
+
+
+def cell_of(latitude, longitude):
+    return (
+        int(math.floor((float(latitude) + 90.0) / CELL_DEGREES)),
+        int(math.floor((float(longitude) + 180.0) / CELL_DEGREES)),
+    )
+
+
+def backfill_grid_cells(apps, schema_editor):
+    Facility = apps.get_model('team4', 'Facility')
+    db = schema_editor.connection.alias
+    batch = []
+    for facility in Facility.objects.using(db).only('fac_id', 'location').iterator(chunk_size=2000):
+        if facility.location is None:
+            continue
+        facility.grid_row, facility.grid_col = cell_of(facility.location.latitude, facility.location.longitude)
+        batch.append(facility)
+        if len(batch) >= 2000:
+            Facility.objects.using(db).bulk_update(batch, ['grid_row', 'grid_col'])
+            batch = []
+    if batch:
+        Facility.objects.using(db).bulk_update(batch, ['grid_row', 'grid_col'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team4', '0006_facility_price_tier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facility',
+            name='grid_col',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='facility',
+            name='grid_row',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='facility',
+            index=models.Index(fields=['grid_row', 'grid_col'], name='idx_facility_grid'),
+        ),
+        migrations.RunPython(backfill_grid_cells, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# Django has no portable spatial index; location__within_km relies on this one on MySQL/MariaDB.
+# MySQL 8 only uses a spatial index on a column restricted to one SRID: points are written by
+# ST_GeomFromText without an SRID, i.e. SRID 0. MariaDB has no column SRID attribute.
+
+
+def add_spatial_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'mysql':
+        return
+    table = schema_editor.quote_name('facilities_facility')
+    if not connection.mysql_is_mariadb:
+        schema_editor.execute(f"ALTER TABLE {table} MODIFY `location` POINT NOT NULL SRID 0")
+    schema_editor.execute(f"ALTER TABLE {table} ADD SPATIAL INDEX `idx_facility_location` (`location`)")
+
+
+def drop_spatial_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'mysql':
+        return
+    table = schema_editor.quote_name('facilities_facility')
+    schema_editor.execute(f"ALTER TABLE {table} DROP INDEX `idx_facility_location`")
+    if not connection.mysql_is_mariadb:
+        schema_editor.execute(f"ALTER TABLE {table} MODIFY `location` POINT NOT NULL")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team4', '0007_facility_grid_cell'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_spatial_index, drop_spatial_index),
+    ]
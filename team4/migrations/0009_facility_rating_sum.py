@@ -0,0 +1,38 @@
+# Generated by Django 4.2.27 on 2026-10-18 06:17
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_rating_sums(apps, schema_editor):
+    Facility = apps.get_model('team4', 'Facility')
+    Review = apps.get_model('team4', 'Review')
+    db = schema_editor.connection.alias
+    rows = (
+        Review.objects.using(db).filter(is_approved=True)
+        .values('facility_id').annotate(total=Sum('rating')).order_by()
+    )
+    batch = []
+    for row in rows.iterator(chunk_size=2000):
+        batch.append(Facility(fac_id=row['facility_id'], rating_sum=row['total']))
+        if len(batch) >= 2000:
+            Facility.objects.using(db).bulk_update(batch, ['rating_sum'])
+            batch = []
+    if batch:
+        Facility.objects.using(db).bulk_update(batch, ['rating_sum'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team4', '0008_facility_location_spatial_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facility',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_rating_sums, migrations.RunPython.noop),
+    ]
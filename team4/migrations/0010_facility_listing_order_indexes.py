@@ -0,0 +1,21 @@
+# Generated by Django 4.2.27 on 2026-10-18 06:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team4', '0009_facility_rating_sum'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='facility',
+            index=models.Index(fields=['status', 'avg_rating', 'review_count', 'fac_id'], name='idx_facility_rating_order'),
+        ),
+        migrations.AddIndex(
+            model_name='facility',
+            index=models.Index(fields=['status', 'review_count', 'fac_id'], name='idx_facility_reviews_order'),
+        ),
+    ]
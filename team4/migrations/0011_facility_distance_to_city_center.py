@@ -0,0 +1,36 @@
+# Generated by Django 4.2.27 on 2026-10-18 06:32
+
+from django.db import migrations, models
+
+import team4.fields
+
+
+def backfill_city_distances(apps, schema_editor):
+    City = apps.get_model('team4', 'City')
+    Facility = apps.get_model('team4', 'Facility')
+    db = schema_editor.connection.alias
+    for city in City.objects.using(db).only('city_id', 'location').iterator():
+        if city.location is not None:
+            Facility.objects.using(db).filter(city_id=city.city_id).update(
+                distance_to_city_center_km=team4.fields.Distance('location', city.location)
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('team4', '0010_facility_listing_order_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facility',
+            name='distance_to_city_center_km',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='facility',
+            index=models.Index(fields=['status', 'distance_to_city_center_km', 'fac_id'], name='idx_facility_distance_order'),
+        ),
+        migrations.RunPython(backfill_city_distances, migrations.RunPython.noop),
+    ]
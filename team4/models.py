@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator, EmailValidator
 from django.core.exceptions import ValidationError
 from django.conf import settings
@@ -87,6 +87,31 @@ class City(models.Model):
     def __str__(self):
         return f"{self.name_fa} ({self.province.name_fa})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'location' in field_names:
+            instance._stored_location = instance._location_key()
+        return instance
+
+    def _location_key(self):
+        location = self._meta.get_field('location').to_python(self.location)
+        return tuple(location) if isinstance(location, Point) else None
+
+    def save(self, *args, **kwargs):
+        moved = not self._state.adding and getattr(self, '_stored_location', ()) != self._location_key()
+        using = kwargs.get('using') or router.db_for_write(City, instance=self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'location' not in update_fields:
+            moved = False
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            if moved:
+                # فاصلهٔ ذخیره‌شدهٔ مکان‌های این شهر تا مرکز آن (services/city_distance)
+                from .services import city_distance
+                city_distance.refresh(using, city_ids=[self.pk])
+        self._stored_location = self._location_key()
+
     def get_coordinates(self):
         if self.location:
             return (self.location.longitude, self.location.latitude)
@@ -213,6 +238,11 @@ class Facility(models.Model):
     
     address = models.TextField(verbose_name="آدرس")
     location = PointField(verbose_name="موقعیت جغرافیایی") 
+    # سلول شبکهٔ جغرافیایی (services/spatial_index) برای جستجوی نزدیک‌ترین‌ها؛ در save پر می‌شود
+    grid_row = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    grid_col = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    # فاصله تا مرکز شهر خود مکان (کیلومتر) برای مرتب‌سازی بر اساس فاصله (services/city_distance)
+    distance_to_city_center_km = models.FloatField(null=True, blank=True, editable=False)
     phone = models.CharField(max_length=20, blank=True, verbose_name="تلفن")
     email = models.EmailField(blank=True, validators=[EmailValidator()], verbose_name="ایمیل")
     website = models.URLField(max_length=200, blank=True, verbose_name="وبسایت")
@@ -230,6 +260,8 @@ class Facility(models.Model):
         validators=[MinValueValidator(0)],
         verbose_name="تعداد نظرات"
     )
+    # مجموع امتیاز نظرات تایید شده؛ avg_rating = rating_sum / review_count (services/ratings)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
     
     status = models.BooleanField(default=True, verbose_name="وضعیت فعال")
     is_24_hour = models.BooleanField(default=False, verbose_name="24 ساعته")
@@ -261,11 +293,63 @@ class Facility(models.Model):
             models.Index(fields=['category'], name='idx_facility_category'),
             models.Index(fields=['city'], name='idx_facility_city'),
             models.Index(fields=['status'], name='idx_facility_status'),
+            models.Index(fields=['grid_row', 'grid_col'], name='idx_facility_grid'),
+            # ترتیب‌های لیست مکان‌ها (views._apply_sorting) برای صفحه‌بندی keyset
+            models.Index(fields=['status', 'avg_rating', 'review_count', 'fac_id'], name='idx_facility_rating_order'),
+            models.Index(fields=['status', 'review_count', 'fac_id'], name='idx_facility_reviews_order'),
+            models.Index(fields=['status', 'distance_to_city_center_km', 'fac_id'], name='idx_facility_distance_order'),
         ]
 
     def __str__(self):
         return f"{self.name_fa} - {self.city.name_fa}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if {'city_id', 'location'}.issubset(field_names):
+            instance._measured_from = instance._placement()
+        return instance
+
+    def _placement(self):
+        location = self._meta.get_field('location').to_python(self.location)
+        return self.city_id, tuple(location) if isinstance(location, Point) else None
+
+    def save(self, *args, **kwargs):
+        self.update_grid_cell()
+        if getattr(self, '_measured_from', None) != self._placement():
+            self.update_city_distance(kwargs.get('using') or router.db_for_write(Facility, instance=self))
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'location' in update_fields:
+            update_fields = {*update_fields, 'grid_row', 'grid_col'}
+        if update_fields is not None and {'location', 'city'} & set(update_fields):
+            update_fields = {*update_fields, 'distance_to_city_center_km'}
+        if update_fields is not None:
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+        self._measured_from = self._placement()
+
+    def update_city_distance(self, using):
+        from .services.city_distance import distance_km
+
+        if self.city_id is None:
+            self.distance_to_city_center_km = None
+            return
+        if Facility.city.is_cached(self) and self.city.pk == self.city_id:
+            city_location = self.city.location
+        else:
+            city_location = City.objects.using(using).filter(pk=self.city_id).values_list('location', flat=True).first()
+        location = self._meta.get_field('location').to_python(self.location)
+        self.distance_to_city_center_km = distance_km(location, city_location)
+
+    def update_grid_cell(self):
+        from .services.spatial_index import cell_of
+
+        location = self._meta.get_field('location').to_python(self.location)
+        if isinstance(location, Point):
+            self.grid_row, self.grid_col = cell_of(location.latitude, location.longitude)
+        else:
+            self.grid_row = self.grid_col = None
+
     def get_coordinates(self):
         if self.location:
             return (self.location.longitude, self.location.latitude)
@@ -298,11 +382,20 @@ class Facility(models.Model):
         # محاسبه فاصله با استفاده از Haversine formula
         return self.location.distance(point)
 
+    def _is_prefetched(self, relation):
+        return relation in getattr(self, '_prefetched_objects_cache', {})
+
     def get_primary_image(self):
+        # با prefetch_related('images') از حافظه خوانده می‌شود، بدون کوئری جدا برای هر مکان
+        if self._is_prefetched('images'):
+            primary = [image for image in self.images.all() if image.is_primary]
+            return min(primary, key=lambda image: image.pk, default=None)
         return self.images.filter(is_primary=True).first()
 
     def get_min_price(self):
         """دریافت کمترین قیمت - اگر قیمت دقیق نداشت، بر اساس tier تخمین میزنه"""
+        if self._is_prefetched('pricing_set'):
+            return min((p.price for p in self.pricing_set.all() if p.status), default=None)
         pricing = self.pricing_set.filter(status=True).order_by('price').first()
         if pricing:
             return pricing.price
@@ -504,31 +597,65 @@ class Review(models.Model):
         if self.rating < 1 or self.rating > 5:
             raise ValidationError("امتیاز باید بین 1 تا 5 باشد")
 
+    def _current_rating(self):
+        """(facility_id, rating) اگر این نظر در امتیاز مکان شمرده می‌شود، وگرنه None"""
+        return (self.facility_id, self.rating) if self.is_approved else None
+
+    def _stored_rating(self, using):
+        """
+        وضعیت ذخیره‌شدهٔ نظر در دیتابیس، به همان شکل _current_rating. ردیف قفل می‌شود تا
+        ویرایش‌های هم‌زمان یک نظر هر کدام تغییر را نسبت به مقدار واقعی قبلی حساب کنند
+        (نه نسبت به نسخهٔ کهنهٔ بارگذاری‌شده). باید داخل تراکنش صدا زده شود.
+        """
+        if self._state.adding or self.pk is None:
+            return None
+        row = (
+            Review.objects.using(using).select_for_update().filter(pk=self.pk)
+            .values_list('facility_id', 'rating', 'is_approved').first()
+        )
+        return (row[0], row[1]) if row and row[2] else None
+
     def save(self, *args, **kwargs):
-        self.full_clean()
-        super().save(*args, **kwargs)
-        # بروزرسانی امتیاز میانگین و تعداد نظرات مکان
-        self.update_facility_rating()
+        # full_clean بدون validate_unique و بررسی وجود کاربر/مکان که هر کدام یک کوئری بودند؛
+        # تکراری نبودن نظر را ReviewCreateSerializer و قید یکتای جدول تضمین می‌کنند
+        self.clean_fields(exclude=['user', 'facility'])
+        self.clean()
+        using = kwargs.get('using') or router.db_for_write(Review, instance=self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not {'rating', 'is_approved', 'facility'} & set(update_fields):
+            super().save(*args, **kwargs)
+            return
+        with transaction.atomic(using=using):
+            before = self._stored_rating(using)
+            super().save(*args, **kwargs)
+            after = self._current_rating()
+            self._shift_facility_rating(before, after, using)
 
     def delete(self, *args, **kwargs):
-        super().delete(*args, **kwargs)
-        # بروزرسانی امتیاز میانگین و تعداد نظرات مکان
-        self.update_facility_rating()
+        using = kwargs.get('using') or router.db_for_write(Review, instance=self)
+        with transaction.atomic(using=using):
+            before = self._stored_rating(using)
+            result = super().delete(*args, **kwargs)
+            self._shift_facility_rating(before, None, using)
+        return result
+
+    @staticmethod
+    def _shift_facility_rating(before, after, using):
+        """بروزرسانی افزایشی امتیاز میانگین و تعداد نظرات مکان با F()، بدون تجمیع دوبارهٔ نظرات"""
+        from .services import ratings
+
+        if before == after:
+            return
+        if before and after and before[0] == after[0]:
+            ratings.shift(after[0], 0, after[1] - before[1], using)
+            return
+        if before:
+            ratings.shift(before[0], -1, -before[1], using)
+        if after:
+            ratings.shift(after[0], 1, after[1], using)
 
     def update_facility_rating(self):
-        """بروزرسانی امتیاز میانگین و تعداد نظرات مکان"""
-        from django.db.models import Avg, Count
-        
-        # محاسبه امتیاز میانگین و تعداد نظرات تایید شده
-        stats = Review.objects.filter(
-            facility=self.facility,
-            is_approved=True
-        ).aggregate(
-            avg_rating=Avg('rating'),
-            review_count=Count('review_id')
-        )
-        
-        # بروزرسانی مکان
-        self.facility.avg_rating = stats['avg_rating'] or 0.00
-        self.facility.review_count = stats['review_count'] or 0
-        self.facility.save(update_fields=['avg_rating', 'review_count'])
+        """محاسبهٔ دوبارهٔ کامل امتیاز میانگین و تعداد نظرات مکان از روی نظرات تایید شده"""
+        from .services import ratings
+
+        ratings.recalculate(self._state.db or router.db_for_write(Review, instance=self), [self.facility_id])
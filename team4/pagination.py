@@ -0,0 +1,216 @@
+"""
+Pagination for the team4 APIs.
+
+By default pages are numbered (?page=N&page_size=M), with an exact count. Sending ?cursor=
+(empty for the first page) switches to keyset pagination instead: each page is filtered to
+rows after the previous page's last row on the queryset's ordering, so deep pages cost the
+same as the first and no COUNT is needed. The response's `next` link carries the cursor.
+Keyset mode needs a queryset ordered on plain fields or annotations; fac_id/pk is appended
+as the tie-breaker when missing. Nullable fields are ordered NULLs last in either direction,
+so a cursor on a NULL value picks up the remaining NULL rows. Other orderings and lists fall
+back to numbered pages.
+
+?count=exact|approx|none picks the count: exact (default for numbered pages), approximate
+(an exact count cached for APPROX_COUNT_TIMEOUT seconds per query) or none (default in
+keyset mode). Counts run as COUNT over the distinct primary keys of the filtered queryset,
+not over the full joined rows that distinct() would otherwise compare.
+"""
+import base64
+import binascii
+import hashlib
+import json
+
+from django.core.cache import caches
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q, QuerySet
+from django.db.models.expressions import OrderBy
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+APPROX_COUNT_TIMEOUT = 60
+_COUNT_KEY = 'team4:count:{}'
+
+
+def count_rows(queryset, approximate=False):
+    """Number of rows in `queryset`; with approximate=True possibly up to APPROX_COUNT_TIMEOUT seconds old."""
+    if not isinstance(queryset, QuerySet):
+        return len(queryset)
+    # distinct() keeps applying, but to the primary key only
+    keys = queryset.order_by().values('pk')
+    if not approximate:
+        return keys.count()
+    sql, params = keys.query.sql_with_params()
+    key = _COUNT_KEY.format(hashlib.sha1(repr((keys.db, sql, params)).encode()).hexdigest())
+    cache = caches['default']
+    count = cache.get(key)
+    if count is None:
+        count = keys.count()
+        cache.set(key, count, APPROX_COUNT_TIMEOUT)
+    return count
+
+
+def _nullable(model, name):
+    if name == 'pk':
+        return False
+    try:
+        return model._meta.get_field(name).null
+    except FieldDoesNotExist:
+        # an annotation; it may be NULL
+        return True
+
+
+def _plain_field(field):
+    """'name' / '-name' for a plain-field ordering entry, else None."""
+    if isinstance(field, OrderBy) and isinstance(field.expression, F) and not field.nulls_first:
+        field = ('-' if field.descending else '') + field.expression.name
+    if not isinstance(field, str) or '__' in field or field == '?':
+        return None
+    return field
+
+
+def _nulls_last(field):
+    if field.startswith('-'):
+        return F(field[1:]).desc(nulls_last=True)
+    return F(field).asc(nulls_last=True)
+
+
+def keyset_ordering(queryset):
+    """
+    (queryset, ordering, nullable) with the primary key appended to make the ordering total
+    and the `nullable` fields ordered NULLs last, or None when the ordering cannot be used
+    for keyset pagination.
+    """
+    ordering = [_plain_field(f) for f in list(queryset.query.order_by) or list(queryset.model._meta.ordering)]
+    if not ordering or None in ordering:
+        return None
+    pk_name = queryset.model._meta.pk.name
+    if not {'pk', pk_name} & {f.lstrip('-') for f in ordering}:
+        ordering.append(('-' if ordering[-1].startswith('-') else '') + pk_name)
+    nullable = {f.lstrip('-') for f in ordering if _nullable(queryset.model, f.lstrip('-'))}
+    queryset = queryset.order_by(*(_nulls_last(f) if f.lstrip('-') in nullable else f for f in ordering))
+    return queryset, ordering, nullable
+
+
+def rows_after(ordering, values, nullable=frozenset()):
+    """
+    Q for the rows that come after the row with `values` in `ordering`, where the `nullable`
+    fields sort NULLs last.
+    """
+    condition, equal = Q(), Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        if value is None:
+            # NULL sorts last: only rows also NULL here can follow
+            equal &= Q(**{f'{name}__isnull': True})
+            continue
+        after = Q(**{f"{name}__{'lt' if field.startswith('-') else 'gt'}": value})
+        if name in nullable:
+            after |= Q(**{f'{name}__isnull': True})
+        condition |= equal & after
+        equal &= Q(**{name: value})
+    return condition
+
+
+def encode_cursor(ordering, obj):
+    values = [getattr(obj, field.lstrip('-')) for field in ordering]
+    raw = json.dumps([ordering, values], cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        ordering, values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise ValueError('invalid cursor')
+    if not isinstance(ordering, list) or not isinstance(values, list) or len(ordering) != len(values):
+        raise ValueError('invalid cursor')
+    return ordering, values
+
+
+class CountingPaginator(Paginator):
+    approximate = False
+
+    @cached_property
+    def count(self):
+        return count_rows(self.object_list, self.approximate)
+
+
+class StandardResultsSetPagination(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def django_paginator_class(self, object_list, per_page):
+        paginator = CountingPaginator(object_list, per_page)
+        paginator.approximate = self.count_mode == 'approx'
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.keyset = False
+        count_mode = request.query_params.get(self.count_query_param)
+        use_keyset = self.cursor_query_param in request.query_params and isinstance(queryset, QuerySet)
+        prepared = keyset_ordering(queryset) if use_keyset else None
+        if prepared is None:
+            self.count_mode = count_mode if count_mode in ('exact', 'approx') else 'exact'
+            return super().paginate_queryset(queryset, request, view)
+
+        self.count_mode = count_mode if count_mode in ('exact', 'approx') else None
+        queryset, ordering, nullable = prepared
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        self.count = count_rows(queryset, self.count_mode == 'approx') if self.count_mode else None
+
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            try:
+                cursor_ordering, values = decode_cursor(cursor)
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+            if cursor_ordering != ordering:
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(rows_after(ordering, values, nullable))
+
+        rows = list(queryset[:page_size + 1])
+        self.keyset = True
+        self.next_cursor = encode_cursor(ordering, rows[page_size - 1]) if len(rows) > page_size else None
+        return rows[:page_size]
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            response = super().get_paginated_response(data)
+            if self.count_mode == 'approx':
+                response.data['count_is_approximate'] = True
+            return response
+
+        body = {
+            'next': self.get_next_link(), 'previous': None, 'next_cursor': self.next_cursor, 'results': data,
+        }
+        if self.count is not None:
+            body['count'] = self.count
+            if self.count_mode == 'approx':
+                body['count_is_approximate'] = True
+        return Response(body)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if self.next_cursor is None:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_previous_link(self):
+        # کرسر فقط رو به جلو است
+        if self.keyset:
+            return None
+        return super().get_previous_link()
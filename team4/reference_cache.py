@@ -0,0 +1,92 @@
+"""
+Versioned response caching for the team4 reference endpoints (categories, amenities, cities,
+region search).
+
+Each dataset is a core.cache tag, "team4:reference:<dataset>". Saving or deleting one of its
+models (signals connected in Team4Config.ready) invalidates it; writes that bypass signals
+(bulk_create, queryset.update()) must call invalidate(). Responses carry ETag
+"<dataset>-<version>" and Last-Modified from the tag version, so clients revalidate with
+If-None-Match / If-Modified-Since and get a 304 while nothing changed. List and detail
+payloads are memoized under the tag, so each one is built once per version; free-text region
+searches are not stored (the name index answers them directly), only revalidated.
+"""
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from core.cache import invalidate_tags, invalidate_tags_on_change, memoize, tag_version
+from team4.models import Amenity, Category, City, Province, Village
+
+PAYLOAD_TIMEOUT = 24 * 60 * 60
+_TAG = 'team4:reference:{}'
+
+DATASETS = {
+    'categories': (Category,),
+    'amenities': (Amenity,),
+    'cities': (City, Province),
+    'regions': (Province, City, Village),
+}
+
+
+def current_version(name):
+    return tag_version(_TAG.format(name))
+
+
+def invalidate(*names):
+    """Mark datasets (default: all) changed in every process."""
+    invalidate_tags(*(_TAG.format(name) for name in names or list(DATASETS)))
+
+
+@memoize(
+    timeout=PAYLOAD_TIMEOUT,
+    tags=lambda name, variant, build: [_TAG.format(name)],
+    key=lambda name, variant, build: (name, variant),
+)
+def payload(name, variant, build):
+    """build() for `variant` of dataset `name`, computed once per version of the dataset."""
+    return build()
+
+
+def cached_response(request, name, build, variant=None):
+    """
+    Response with build()'s payload for dataset `name`, or a 304 when the client's
+    If-None-Match / If-Modified-Since shows it already has the current version. The payload
+    is stored per `variant`; with variant=None it is built for each request.
+    """
+    version = current_version(name)
+    etag = f'"{name}-{version}"'
+    last_modified = version // 10 ** 9
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = Response(build() if variant is None else payload(name, variant, build))
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(last_modified)
+    # کلاینت هر بار اعتبارسنجی کند؛ پاسخ 304 ارزان است
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+class ReferenceCacheMixin:
+    """list/retrieve of a read-only viewset served through cached_response()."""
+    reference_dataset = None
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(request, self.reference_dataset, lambda: self.get_serializer(
+            self.filter_queryset(self.get_queryset()), many=True,
+        ).data, variant='list')
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        return cached_response(
+            request, self.reference_dataset, lambda: self.get_serializer(self.get_object()).data,
+            variant=('detail', lookup),
+        )
+
+
+def _tags_for(model):
+    return [_TAG.format(name) for name, models in DATASETS.items() if model in models]
+
+
+def connect_signals():
+    models = {model for models in DATASETS.values() for model in models}
+    invalidate_tags_on_change(models, _tags_for, dispatch_uid='team4_reference_cache')
@@ -1,3 +1,5 @@
+from django.db.models import prefetch_related_objects
+from django.db.models.manager import BaseManager
 from rest_framework import serializers
 from .fields import Point
 from team4.models import (
@@ -73,6 +75,31 @@ class ImageSerializer(serializers.ModelSerializer):
 
 
 
+# روابطی که FacilityListSerializer برای هر مکان می‌خواند
+FACILITY_LIST_RELATED = ('category', 'city__province', 'amenities', 'pricing_set', 'images')
+
+
+class FacilityPageSerializer(serializers.ListSerializer):
+    """
+    Serializes a page of facilities after loading FACILITY_LIST_RELATED for all of them at
+    once (one query per relation, skipped when already select/prefetch-related), so the
+    per-facility fields read from memory. `facility_key` names where each item keeps its
+    facility when items are not facilities themselves.
+    """
+
+    facility_key = None
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, BaseManager) else data)
+        facilities = items if self.facility_key is None else [item[self.facility_key] for item in items]
+        prefetch_related_objects(facilities, *FACILITY_LIST_RELATED)
+        return super().to_representation(items)
+
+
+class NearbyPageSerializer(FacilityPageSerializer):
+    facility_key = 'facility'
+
+
 class FacilityListSerializer(serializers.ModelSerializer):
     category = serializers.CharField(source='category.name_en', read_only=True)
     city = serializers.CharField(source='city.name_fa', read_only=True)
@@ -93,6 +120,7 @@ class FacilityListSerializer(serializers.ModelSerializer):
             'primary_image', 'price_from', 'price_tier', 'price_tier_display',
             'is_24_hour', 'amenities'
         ]
+        list_serializer_class = FacilityPageSerializer
     
     def get_location(self, obj):
         if obj.location:
@@ -169,12 +197,18 @@ class FacilityNearbySerializer(serializers.Serializer):
     walking_time_minutes = serializers.IntegerField()
     driving_time_minutes = serializers.IntegerField(allow_null=True)
 
+    class Meta:
+        list_serializer_class = NearbyPageSerializer
+
 
 class NearbyPlaceSerializer(serializers.Serializer):
     """Serializer for nearby places with distance in meters"""
     place = FacilityListSerializer(source='facility')
     distance_meters = serializers.FloatField()
 
+    class Meta:
+        list_serializer_class = NearbyPageSerializer
+
 
 class FacilityComparisonSerializer(serializers.Serializer):
     fac_id = serializers.IntegerField()
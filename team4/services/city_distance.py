@@ -0,0 +1,38 @@
+"""
+Facility.distance_to_city_center_km: the great-circle distance from each facility to its
+city's location, stored so that sorting by distance is an indexed ORDER BY.
+
+Facility.save() fills it when the facility's location or city changes, and City.save()
+calls refresh() for the city's facilities when the city moves. Writes that bypass save()
+(queryset.update(), raw SQL) are repaired by the backfill_city_distances command.
+"""
+from ..fields import Distance, Point
+
+
+def distance_km(location, city_location):
+    """Distance between two points (Point or (lng, lat)), or None if either is missing."""
+    if location is None or city_location is None:
+        return None
+    return Point(*location).distance(Point(*city_location))
+
+
+def refresh(using, city_ids=None, missing_only=False):
+    """
+    Recompute the stored distance of the facilities of all cities (or of city_ids), one
+    UPDATE per city computed in the database. Returns the number of facilities updated.
+    """
+    from ..models import City, Facility
+
+    cities = City.objects.using(using).only('city_id', 'location').order_by('city_id')
+    if city_ids is not None:
+        cities = cities.filter(city_id__in=city_ids)
+    updated = 0
+    for city in cities.iterator():
+        facilities = Facility.objects.using(using).filter(city_id=city.city_id)
+        if missing_only:
+            facilities = facilities.filter(distance_to_city_center_km__isnull=True)
+        if city.location is None:
+            updated += facilities.update(distance_to_city_center_km=None)
+        else:
+            updated += facilities.update(distance_to_city_center_km=Distance('location', city.location))
+    return updated
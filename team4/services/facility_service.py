@@ -1,9 +1,19 @@
 from django.db.models import Q, F, Count, Min, Avg
 from django.core.exceptions import ObjectDoesNotExist
 from ..fields import Point
+from . import search_index, spatial_index
+from .region_service import RegionService
 from team4.models import Facility, City, Category, Amenity, Pricing
 
 
+def _load_facilities():
+    for fac_id, name_fa, name_en in Facility.objects.values_list('fac_id', 'name_fa', 'name_en'):
+        yield fac_id, (name_fa, name_en), fac_id
+
+
+search_index.register('facilities', _load_facilities, [Facility])
+
+
 class FacilityService:
     
     @staticmethod
@@ -12,10 +22,7 @@ class FacilityService:
         
         # فیلتر شهر
         if city_name:
-            queryset = queryset.filter(
-                Q(city__name_fa__icontains=city_name) | 
-                Q(city__name_en__icontains=city_name)
-            )
+            queryset = queryset.filter(city_id__in=RegionService.matching_city_ids(city_name, 'city'))
         
         # فیلتر دسته‌بندی
         if category_name:
@@ -72,7 +79,7 @@ class FacilityService:
     def sort_by_distance(facilities, reference_point):
         # تبدیل به Point اگر tuple است
         if isinstance(reference_point, (tuple, list)):
-            reference_point = Point(reference_point[0], reference_point[1], srid=4326)
+            reference_point = Point(reference_point[0], reference_point[1])
         
         facilities_with_distance = []
         
@@ -124,7 +131,7 @@ class FacilityService:
         if not center_facility.location:
             return center_facility, []
         
-        # دریافت تمام امکانات (به جز خود مکان مرجع)
+        # فقط امکانات سلول‌های شبکهٔ اطراف مکان مرجع خوانده می‌شوند (به جز خود مکان مرجع)
         nearby = Facility.objects.filter(status=True).exclude(fac_id=fac_id)
         
         # فیلتر دسته‌بندی
@@ -139,13 +146,8 @@ class FacilityService:
         # محاسبه فاصله و فیلتر
         nearby_with_distance = []
         
-        for facility in nearby:
-            if not facility.location:
-                continue
-                
-            distance = facility.calculate_distance_to(center_facility.location)
-            
-            if distance and distance <= radius_km:
+        for facility, distance in spatial_index.within_radius(nearby, center_facility.location, radius_km):
+            if distance:
                 # محاسبه زمان پیاده‌روی (فرض: 5 km/h)
                 walking_time = round((distance / 5) * 60)  # دقیقه
                 
@@ -192,9 +194,9 @@ class FacilityService:
         most_amenities_count = 0
         
         for facility in facilities:
-            # دریافت کمترین قیمت
-            min_price_obj = facility.pricing_set.filter(status=True).order_by('price').first()
-            min_price = float(min_price_obj.price) if min_price_obj else 0
+            # دریافت کمترین قیمت (از pricing_set پیش‌واکشی‌شده)
+            min_price = facility.get_min_price()
+            min_price = float(min_price) if min_price else 0
             
             # آپدیت کمترین قیمت
             if min_price > 0 and min_price < lowest_price:
@@ -207,8 +209,8 @@ class FacilityService:
                 highest_rating_id = facility.fac_id
             
             # دریافت امکانات
-            facility_amenities = facility.amenities.all()
-            amenity_count = facility_amenities.count()
+            facility_amenities = list(facility.amenities.all())
+            amenity_count = len(facility_amenities)
             
             if amenity_count > most_amenities_count:
                 most_amenities_count = amenity_count
@@ -218,18 +220,22 @@ class FacilityService:
             for amenity in facility_amenities:
                 all_amenities.add(amenity.name_en)
             
-            # محاسبه فاصله از مرکز شهر
-            distance_from_center = 0
-            if facility.city.location and facility.location:
-                distance_from_center = facility.calculate_distance_to(facility.city.location)
+            # فاصله از مرکز شهر: مقدار ذخیره‌شده (services/city_distance)، وگرنه محاسبه
+            distance_from_center = facility.distance_to_city_center_km
+            if distance_from_center is None:
+                distance_from_center = 0
+                if facility.city.location and facility.location:
+                    distance_from_center = facility.calculate_distance_to(facility.city.location)
             
             # ساخت دیکشنری امکانات
             amenities_dict = {amenity.name_en: True for amenity in facility_amenities}
             
+            primary_image = facility.get_primary_image()
+            
             comparison_data.append({
                 'fac_id': facility.fac_id,
                 'name_fa': facility.name_fa,
-                'image_url': facility.get_primary_image().image_url if facility.get_primary_image() else None,
+                'image_url': primary_image.image_url if primary_image else None,
                 'avg_rating': float(facility.avg_rating),
                 'price_per_night': min_price,
                 'distance_from_center_km': round(distance_from_center, 2),
@@ -249,29 +255,6 @@ class FacilityService:
             }
         }
     
-    @staticmethod
-    def sort_by_city_distance(facilities, city_name):
-        """
-        مرتب‌سازی امکانات بر اساس فاصله از مرکز شهر
-        
-        Args:
-            facilities: QuerySet یا لیست امکانات
-            city_name: نام شهر
-            
-        Returns:
-            list یا None: لیست امکانات مرتب شده یا None اگر شهر یافت نشد
-        """
-        city = City.objects.filter(
-            Q(name_fa__icontains=city_name) | 
-            Q(name_en__icontains=city_name)
-        ).first()
-        
-        if not city or not city.location:
-            return None
-        
-        facilities_list = list(facilities)
-        return FacilityService.sort_by_distance(facilities_list, city.location)
-    
     @staticmethod
     def validate_radius(radius_value):
         """
@@ -0,0 +1,79 @@
+"""
+Facility rating aggregates: avg_rating, review_count and rating_sum over approved reviews.
+
+Review.save()/delete() keep them current with shift(), a single UPDATE of the facility row
+by the change in count and rating sum, instead of re-aggregating every review of the
+facility. Writes that bypass the model (queryset.update()/delete(), raw SQL, imports) are
+repaired by recalculate(), which the reconcile_facility_ratings command runs periodically.
+"""
+from decimal import Decimal
+
+from django.db.models import Case, Count, DecimalField, F, FloatField, Sum, Value, When
+from django.db.models.functions import Cast
+
+AVG_QUANTUM = Decimal('0.01')
+
+
+def shift(facility_id, count_delta, sum_delta, using):
+    """Add count_delta approved reviews with sum_delta total stars to the facility's aggregates."""
+    from ..models import Facility
+
+    if not count_delta and not sum_delta:
+        return
+    Facility.objects.using(using).filter(pk=facility_id).update(
+        # avg_rating goes first: MySQL evaluates SET assignments left to right and would
+        # otherwise see the already-updated review_count and rating_sum.
+        avg_rating=Case(
+            When(
+                review_count__gt=-count_delta,
+                then=Cast(F('rating_sum') + sum_delta, FloatField()) / (F('review_count') + count_delta),
+            ),
+            default=Value(0.0),
+            output_field=DecimalField(max_digits=3, decimal_places=2),
+        ),
+        review_count=F('review_count') + count_delta,
+        rating_sum=F('rating_sum') + sum_delta,
+    )
+
+
+def expected_average(count, total):
+    return (Decimal(total) / count).quantize(AVG_QUANTUM) if count else Decimal('0.00')
+
+
+def recalculate(using, facility_ids=None, dry_run=False, batch_size=1000):
+    """
+    Recompute the aggregates of all facilities (or of facility_ids) from their approved reviews
+    in one grouped query and write back the ones that drifted, in batches.
+
+    Returns [(fac_id, stored, expected)], both as (review_count, rating_sum, avg_rating).
+    An avg_rating that differs only by rounding is not drift.
+    """
+    from ..models import Facility, Review
+
+    reviews = Review.objects.using(using).filter(is_approved=True)
+    facilities = Facility.objects.using(using).only('fac_id', 'avg_rating', 'review_count', 'rating_sum')
+    if facility_ids is not None:
+        reviews = reviews.filter(facility_id__in=facility_ids)
+        facilities = facilities.filter(fac_id__in=facility_ids)
+    stats = {
+        row['facility_id']: (row['count'], row['total'])
+        for row in reviews.values('facility_id').annotate(count=Count('review_id'), total=Sum('rating')).order_by()
+    }
+
+    drift, batch = [], []
+    for facility in facilities.order_by('fac_id').iterator(chunk_size=batch_size):
+        count, total = stats.get(facility.fac_id, (0, 0))
+        average = expected_average(count, total)
+        stored = (facility.review_count, facility.rating_sum, facility.avg_rating)
+        if (count, total) == stored[:2] and abs(average - stored[2]) < AVG_QUANTUM:
+            continue
+        drift.append((facility.fac_id, stored, (count, total, average)))
+        facility.review_count, facility.rating_sum, facility.avg_rating = count, total, average
+        batch.append(facility)
+        if len(batch) >= batch_size:
+            if not dry_run:
+                Facility.objects.using(using).bulk_update(batch, ['review_count', 'rating_sum', 'avg_rating'])
+            batch = []
+    if batch and not dry_run:
+        Facility.objects.using(using).bulk_update(batch, ['review_count', 'rating_sum', 'avg_rating'])
+    return drift
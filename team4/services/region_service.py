@@ -1,18 +1,42 @@
-from django.db.models import Q
 from team4.models import Province, City, Village
+from . import search_index
+
+
+def _load_provinces():
+    for province_id, name_fa, name_en in Province.objects.values_list('province_id', 'name_fa', 'name_en'):
+        yield province_id, (name_fa, name_en), (province_id, name_fa, None, None)
+
+
+def _load_cities():
+    rows = City.objects.values_list('city_id', 'name_fa', 'name_en', 'province_id', 'province__name_fa')
+    for city_id, name_fa, name_en, province_id, province_name in rows:
+        yield city_id, (name_fa, name_en), (city_id, name_fa, province_id, province_name)
+
+
+def _load_villages():
+    rows = Village.objects.values_list('village_id', 'name_fa', 'name_en', 'city_id', 'city__name_fa')
+    for village_id, name_fa, name_en, city_id, city_name in rows:
+        yield village_id, (name_fa, name_en), (village_id, name_fa, city_id, city_name)
+
+
+# payload هر سند: (id, name, parent_region_id, parent_region_name)
+search_index.register('province', _load_provinces, [Province])
+search_index.register('city', _load_cities, [City, Province])
+search_index.register('village', _load_villages, [Village, City])
 
 
 class RegionService:
     """سرویس برای مدیریت جستجوی مناطق (استان، شهر، روستا)"""
     
     @staticmethod
-    def search_regions(query, region_type=None):
+    def search_regions(query, region_type=None, limit=None):
         """
         جستجوی مناطق بر اساس نوع
         
         Args:
             query: متن جستجو
             region_type: نوع منطقه - 'province', 'city', 'village' (اختیاری)
+            limit: حداکثر تعداد نتیجه برای هر نوع منطقه (اختیاری)
             
         Returns:
             list: لیست دیکشنری‌های حاوی اطلاعات منطقه
@@ -22,64 +46,35 @@ class RegionService:
         
         results = []
         
-        # جستجو در استان‌ها
-        if not region_type or region_type == 'province':
-            results.extend(RegionService._search_provinces(query))
-        
-        # جستجو در شهرها
-        if not region_type or region_type == 'city':
-            results.extend(RegionService._search_cities(query))
-        
-        # جستجو در روستاها
-        if not region_type or region_type == 'village':
-            results.extend(RegionService._search_villages(query))
+        # جستجو در استان‌ها، شهرها و روستاها با ایندکس نام (services/search_index)
+        for name in ('province', 'city', 'village'):
+            if not region_type or region_type == name:
+                results.extend(
+                    {
+                        'id': str(region_id),
+                        'name': region_name,
+                        'parent_region_id': str(parent_id) if parent_id is not None else None,
+                        'parent_region_name': parent_name
+                    }
+                    for region_id, region_name, parent_id, parent_name in search_index.get(name).search(query, limit)
+                )
         
         return results
     
     @staticmethod
-    def _search_provinces(query):
-        """جستجوی استان‌ها"""
-        provinces = Province.objects.filter(
-            Q(name_fa__icontains=query) | 
-            Q(name_en__icontains=query)
-        )
-        
-        return [{
-            'id': str(province.province_id),
-            'name': province.name_fa,
-            'parent_region_id': None,
-            'parent_region_name': None
-        } for province in provinces]
-    
-    @staticmethod
-    def _search_cities(query):
-        """جستجوی شهرها"""
-        cities = City.objects.select_related('province').filter(
-            Q(name_fa__icontains=query) | 
-            Q(name_en__icontains=query)
-        )
-        
-        return [{
-            'id': str(city.city_id),
-            'name': city.name_fa,
-            'parent_region_id': str(city.province.province_id),
-            'parent_region_name': city.province.name_fa
-        } for city in cities]
-    
-    @staticmethod
-    def _search_villages(query):
-        """جستجوی روستاها"""
-        villages = Village.objects.select_related('city', 'city__province').filter(
-            Q(name_fa__icontains=query) | 
-            Q(name_en__icontains=query)
-        )
-        
-        return [{
-            'id': str(village.village_id),
-            'name': village.name_fa,
-            'parent_region_id': str(village.city.city_id),
-            'parent_region_name': village.city.name_fa
-        } for village in villages]
+    def matching_city_ids(query, region_type):
+        """
+        شناسهٔ شهرهایی که فیلتر منطقه (استان، شهر یا روستا) روی آن‌ها می‌افتد.
+        برای روستا، شهر والد آن برگردانده می‌شود چون مکان‌ها فقط به شهر متصل‌اند.
+        """
+        if region_type == 'city':
+            return search_index.get('city').match(query)
+        if region_type == 'village':
+            return sorted({city_id for _, _, city_id, _ in search_index.get('village').search(query)})
+        if region_type == 'province':
+            province_ids = search_index.get('province').match(query)
+            return list(City.objects.filter(province_id__in=province_ids).values_list('city_id', flat=True))
+        return []
     
     @staticmethod
     def validate_region_type(region_type):
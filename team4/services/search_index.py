@@ -0,0 +1,166 @@
+"""
+In-process name search for team4 regions and facilities.
+
+Names are normalized before indexing and querying (normalize()): Arabic yeh/kaf and other
+letter variants map to their Persian forms, diacritics and tatweel are dropped, digits become
+ASCII and Latin text is case-folded. Matching ignores spaces and ZWNJ, so "می‌خانه", "می خانه"
+and "میخانه" all find each other.
+
+Each index keeps, per document, its names without spaces plus the sorted list of its words:
+- queries of 3+ characters intersect trigram postings, then check the substring (icontains);
+- shorter queries match word prefixes by bisecting the sorted words.
+Results are ranked: exact name, name prefix, word prefix, anywhere; then by id.
+
+Indexes are built lazily from the database on first use, per process, and tagged with the
+core.cache tag "team4:search-index:<name>". Saving or deleting one of an index's models
+(signals connected in Team4Config.ready) invalidates the tag; other processes see the new
+version within the cache's local timeout and rebuild on their next search. Writes that
+bypass signals (queryset.update(), bulk_create) must call invalidate().
+"""
+import bisect
+import re
+import threading
+from array import array
+
+from core.cache import invalidate_tags, invalidate_tags_on_change, tag_version
+
+_LETTERS = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ك': 'ک', 'ة': 'ه', 'ۀ': 'ه',
+    'أ': 'ا', 'إ': 'ا', 'ٱ': 'ا', 'ؤ': 'و',
+    **{chr(0x06F0 + d): str(d) for d in range(10)},  # ۰-۹
+    **{chr(0x0660 + d): str(d) for d in range(10)},  # ٠-٩
+    '\u200c': ' ', '\u200d': ' ',  # ZWNJ, ZWJ
+})
+# Diacritics (fatha, kasra, tanwin, shadda, sukun, ...), superscript alef and tatweel.
+_DROP = re.compile('[\u064b-\u065f\u0670\u0640]')
+_NON_WORD = re.compile(r'[^\w]+')
+
+_TAG = 'team4:search-index:{}'
+_EXACT, _NAME_PREFIX, _WORD_PREFIX, _ANYWHERE = range(4)
+
+
+def normalize(text):
+    """Persian-normalized, case-folded words of `text`, separated by single spaces."""
+    text = _DROP.sub('', (text or '').translate(_LETTERS)).casefold()
+    return ' '.join(_NON_WORD.sub(' ', text).split())
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class NameIndex:
+    """Immutable index over documents (key, names, payload); search() returns payloads."""
+
+    def __init__(self, documents, version=None):
+        self.version = version
+        self._keys, self._payloads, self._compact = [], [], []
+        words, postings = [], {}
+        for doc, (key, names, payload) in enumerate(documents):
+            normalized = [normalize(name) for name in names if name]
+            self._keys.append(key)
+            self._payloads.append(payload)
+            # One string per document; the separator keeps substrings from spanning two names.
+            compact = '\x00'.join(name.replace(' ', '') for name in normalized)
+            self._compact.append(compact)
+            for word in {w for name in normalized for w in name.split()}:
+                words.append((word, doc))
+            for gram in _trigrams(compact):
+                postings.setdefault(gram, []).append(doc)
+        words.sort()
+        self._words = [w for w, _ in words]
+        self._word_docs = array('I', (d for _, d in words))
+        self._postings = {gram: array('I', docs) for gram, docs in postings.items()}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _word_prefix_docs(self, prefix):
+        lo = bisect.bisect_left(self._words, prefix)
+        hi = bisect.bisect_left(self._words, prefix + '\U0010ffff', lo)
+        return set(self._word_docs[lo:hi])
+
+    def _rank(self, doc, query, words):
+        names = self._compact[doc].split('\x00')
+        if query in names:
+            return _EXACT
+        if any(name.startswith(query) for name in names):
+            return _NAME_PREFIX
+        if words and doc in words:
+            return _WORD_PREFIX
+        return _ANYWHERE
+
+    def match(self, query):
+        """Keys of the documents matching `query`, best first."""
+        return [self._keys[doc] for doc in self._match(query)]
+
+    def search(self, query, limit=None):
+        """Payloads of the documents matching `query`, best first."""
+        docs = self._match(query)
+        return [self._payloads[doc] for doc in (docs if limit is None else docs[:limit])]
+
+    def _match(self, query):
+        normalized = normalize(query)
+        compact = normalized.replace(' ', '')
+        if not compact:
+            return []
+        first_word = normalized.split()[0]
+        words = self._word_prefix_docs(first_word)
+        if len(compact) < 3:
+            docs = {doc for doc in words if compact in self._compact[doc]}
+        else:
+            grams = sorted((self._postings.get(g, ()) for g in _trigrams(compact)), key=len)
+            docs = set(grams[0]) if grams else set()
+            for posting in grams[1:]:
+                if not docs:
+                    break
+                docs.intersection_update(posting)
+            docs = {doc for doc in docs if compact in self._compact[doc]}
+        return sorted(docs, key=lambda doc: (self._rank(doc, compact, words), self._keys[doc]))
+
+
+class _Registered:
+    def __init__(self, name, loader, models):
+        self.name = name
+        self.loader = loader
+        self.models = models
+        self.index = None
+        self.lock = threading.Lock()
+
+
+_registry = {}
+
+
+def register(name, loader, models):
+    """
+    Declare index `name`, built from loader() -> iterable of (key, (name, ...), payload) and
+    invalidated whenever an instance of one of `models` is saved or deleted.
+    """
+    _registry[name] = _Registered(name, loader, tuple(models))
+
+
+def get(name):
+    """The up-to-date index `name`, building it if needed."""
+    entry = _registry[name]
+    version = tag_version(_TAG.format(name))
+    index = entry.index
+    if index is not None and index.version == version:
+        return index
+    with entry.lock:
+        if entry.index is None or entry.index.version != version:
+            entry.index = NameIndex(entry.loader(), version)
+        return entry.index
+
+
+def invalidate(*names):
+    """Mark indexes (default: all) stale in every process."""
+    invalidate_tags(*(_TAG.format(name) for name in names or list(_registry)))
+
+
+def _tags_for(model):
+    return [_TAG.format(name) for name, entry in _registry.items() if model in entry.models]
+
+
+def connect_signals():
+    models = {model for entry in _registry.values() for model in entry.models}
+    invalidate_tags_on_change(models, _tags_for, dispatch_uid='team4_search_index')
@@ -0,0 +1,89 @@
+"""
+Grid index for facility proximity queries.
+
+Every facility stores the cell of a fixed lat/lng grid it falls in (grid_row, grid_col; set in
+Facility.save()). A radius query turns the search circle into the block of cells covering its
+bounding box, lets the database return only facilities in those cells (composite index on
+grid_row, grid_col), then refines the candidates with the exact Haversine distance, computed
+for all of them at once by core.geo.
+
+On MySQL/MariaDB within_radius instead lets the database answer with the location__within_km
+lookup (spatial index + ST_Distance_Sphere) and the Distance annotation; the grid is the
+bounding-box prefilter everywhere else (SQLite).
+
+Cells do not wrap at the antimeridian; all facilities are in Iran.
+"""
+import math
+
+from django.db import connections
+
+from core.geo import bounding_box, distances_km
+
+from ..fields import Distance, Point
+
+# 0.05° ≈ 5.5 km of latitude: a few cells cover a typical city-scale radius.
+CELL_DEGREES = 0.05
+
+
+def cell_of(latitude, longitude):
+    """(row, col) of the grid cell containing the point."""
+    return (
+        int(math.floor((float(latitude) + 90.0) / CELL_DEGREES)),
+        int(math.floor((float(longitude) + 180.0) / CELL_DEGREES)),
+    )
+
+
+def cell_range(latitude, longitude, radius_km):
+    """((row_min, row_max), (col_min, col_max)) of the cells covering the circle."""
+    min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+    row_min, col_min = cell_of(min_lat, min_lng)
+    row_max, col_max = cell_of(max_lat, max_lng)
+    return (row_min, row_max), (col_min, col_max)
+
+
+def filter_cells(queryset, center, radius_km):
+    """Narrow a Facility queryset to the cells that may contain points within radius_km."""
+    rows, cols = cell_range(center.latitude, center.longitude, radius_km)
+    return queryset.filter(grid_row__range=rows, grid_col__range=cols)
+
+
+def within_radius(queryset, center, radius_km):
+    """
+    Facilities of `queryset` within radius_km of `center`, nearest first,
+    as a list of (facility, distance_km).
+    """
+    if isinstance(center, (tuple, list)):
+        center = Point(center[0], center[1])
+    if connections[queryset.db].vendor == 'mysql':
+        hits = (
+            queryset.filter(location__within_km=(center, radius_km))
+            .annotate(distance_km=Distance('location', center))
+            .order_by('distance_km')
+        )
+        return [(facility, facility.distance_km) for facility in hits]
+    candidates = [f for f in filter_cells(queryset, center, radius_km) if f.location]
+    if not candidates:
+        return []
+    km = distances_km(
+        center.latitude,
+        center.longitude,
+        [f.location.latitude for f in candidates],
+        [f.location.longitude for f in candidates],
+    )
+    hits = [(facility, float(d)) for facility, d in zip(candidates, km) if d <= radius_km]
+    hits.sort(key=lambda hit: hit[1])
+    return hits
+
+
+def nearest(queryset, center, k, start_km=2.0, max_km=500.0):
+    """
+    The k facilities of `queryset` nearest to `center` (within max_km) as (facility, distance_km),
+    searching rings of doubling radius so only nearby cells are read.
+    """
+    radius = start_km
+    while True:
+        hits = within_radius(queryset, center, radius)
+        # Everything within `radius` has been seen, so the first k hits are exact.
+        if len(hits) >= k or radius >= max_km:
+            return hits[:k]
+        radius = min(radius * 2, max_km)
@@ -0,0 +1,64 @@
+"""
+Tests for the stored facility-to-city-center distance
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from team4.fields import Point
+from team4.models import Province, City, Category, Facility
+
+
+class CityDistanceTest(TestCase):
+    """تست فاصلهٔ ذخیره‌شدهٔ مکان تا مرکز شهر"""
+
+    databases = {'default', 'team4'}
+
+    @classmethod
+    def setUpTestData(cls):
+        province = Province.objects.create(name_fa="مازندران", name_en="Mazandaran")
+        cls.sari = City.objects.create(province=province, name_fa="ساری", name_en="Sari", location=Point(53.06, 36.56))
+        cls.babol = City.objects.create(province=province, name_fa="بابل", name_en="Babol", location=Point(52.68, 36.54))
+        cls.category = Category.objects.create(name_fa="هتل", name_en="Hotel")
+
+    def facility(self, name, lng, city=None):
+        return Facility.objects.create(
+            name_fa=name, name_en=name, category=self.category, city=city or self.sari,
+            address="-", location=Point(lng, 36.56),
+        )
+
+    def assertDistance(self, facility, city):
+        facility.refresh_from_db()
+        self.assertAlmostEqual(facility.distance_to_city_center_km, facility.location.distance(city.location), places=6)
+
+    def test_kept_current_on_facility_and_city_changes(self):
+        hotel = self.facility("h1", 53.10)
+        self.assertDistance(hotel, self.sari)
+
+        hotel = Facility.objects.get(pk=hotel.pk)
+        hotel.location = Point(53.20, 36.56)
+        hotel.save(update_fields=['location'])
+        self.assertDistance(hotel, self.sari)
+
+        hotel.city = self.babol
+        hotel.save()
+        self.assertDistance(hotel, self.babol)
+
+        babol = City.objects.get(pk=self.babol.pk)
+        babol.location = Point(52.70, 36.50)
+        babol.save()
+        self.assertDistance(hotel, babol)
+
+    def test_distance_sort_and_backfill(self):
+        far, near, middle = self.facility("far", 53.30), self.facility("near", 53.07), self.facility("mid", 53.15)
+        Facility.objects.update(distance_to_city_center_km=None)
+
+        out = StringIO()
+        call_command('backfill_city_distances', '--missing-only', stdout=out)
+        self.assertIn('3 facilities updated', out.getvalue())
+        for facility in (far, near, middle):
+            self.assertDistance(facility, self.sari)
+
+        res = self.client.get('/team4/api/facilities/', {'sort': 'distance'})
+        self.assertEqual([f['fac_id'] for f in res.data['results']], [near.pk, middle.pk, far.pk])
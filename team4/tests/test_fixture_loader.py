@@ -0,0 +1,95 @@
+"""
+Tests for the batched team4 fixture loaders
+"""
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from team4.fields import Point
+from team4.management.fixture_loader import iter_json_array
+from team4.models import Province, City, Category, Amenity, Facility
+
+
+def write_fixture(test, data, text=None):
+    fd, path = tempfile.mkstemp(suffix='.json')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(text if text is not None else json.dumps(data, ensure_ascii=False, indent=2))
+    test.addCleanup(os.remove, path)
+    return path
+
+
+class IterJsonArrayTest(SimpleTestCase):
+    """تست خواندن تدریجی آرایهٔ JSON"""
+
+    def test_elements_across_chunk_boundaries(self):
+        data = [{'name_fa': 'هتل ۱', 'tags': [1, 2, {'a': '[]'}]}, 12345, "x, ]", None, [], {'n': 1.5e3}]
+        path = write_fixture(self, data)
+        for chunk_size in (1, 2, 7, 64 * 1024):
+            self.assertEqual(list(iter_json_array(path, chunk_size=chunk_size)), data)
+
+    def test_empty_and_invalid(self):
+        self.assertEqual(list(iter_json_array(write_fixture(self, [], text=' [ ] '))), [])
+        with self.assertRaises(ValueError):
+            list(iter_json_array(write_fixture(self, None, text='{"a": 1}')))
+        with self.assertRaises(ValueError):
+            list(iter_json_array(write_fixture(self, None, text='[{"a": 1}, {"b"')))
+
+
+class LoadHotelsTest(TestCase):
+    """تست بارگذاری دسته‌ای هتل‌ها"""
+
+    databases = {'default', 'team4'}
+
+    @classmethod
+    def setUpTestData(cls):
+        province = Province.objects.create(name_fa="یزد", name_en="Yazd")
+        cls.city = City.objects.create(province=province, name_fa="یزد", name_en="Yazd", location=Point(54.36, 31.89))
+        cls.category = Category.objects.create(name_fa="هتل", name_en="Hotel")
+        cls.wifi = Amenity.objects.create(name_fa="وای‌فای", name_en="WiFi")
+
+    def hotel(self, name_fa, name_en, **extra):
+        return {
+            'name_fa': name_fa, 'name_en': name_en, 'city_id': self.city.city_id,
+            'category_id': self.category.category_id, 'address': '-',
+            'location': {'latitude': 31.89, 'longitude': 54.36},
+            'avg_rating': 4.5, 'review_count': 10, **extra,
+        }
+
+    def load(self, data, batch_size=2):
+        out = StringIO()
+        call_command('load_hotels', file=write_fixture(self, data), batch_size=batch_size, stdout=out)
+        return out.getvalue()
+
+    def test_create_update_and_skip(self):
+        out = self.load([
+            self.hotel("هتل داد", "Dad Hotel", amenities=[self.wifi.amenity_id, 999]),
+            self.hotel("هتل موزه", "Moshir Hotel"),
+            {**self.hotel("هتل بی‌شهر", "Nowhere"), 'city_id': 0, 'city_name_fa': "ناکجا"},
+            self.hotel("هتل کاروانسرا", "Dad Hotel"),  # name_en تکراری در همان شهر
+            self.hotel("هتل موزه", "Moshir Garden Hotel", price_tier='high'),
+        ])
+        self.assertIn('rows/s', out)
+
+        hotels = {f.name_fa: f for f in Facility.objects.all()}
+        self.assertEqual(set(hotels), {"هتل داد", "هتل موزه"})
+        dad = hotels["هتل داد"]
+        self.assertEqual((dad.rating_sum, dad.review_count), (45, 10))
+        self.assertIsNotNone(dad.grid_row)
+        self.assertEqual(list(dad.amenities.values_list('name_en', flat=True)), ["WiFi"])
+        self.assertEqual((hotels["هتل موزه"].name_en, hotels["هتل موزه"].price_tier), ("Moshir Garden Hotel", 'high'))
+
+    def test_reload_writes_only_changes(self):
+        data = [self.hotel("هتل داد", "Dad Hotel", amenities=[self.wifi.amenity_id]), self.hotel("هتل موزه", "Moshir Hotel")]
+        self.load(data)
+        first = Facility.objects.get(name_fa="هتل موزه")
+
+        data[1]['avg_rating'] = 3.0
+        out = self.load(data)
+        self.assertIn('1 بروزرسانی، 1 بدون تغییر', out)
+        self.assertEqual(Facility.objects.count(), 2)
+        moshir = Facility.objects.get(name_fa="هتل موزه")
+        self.assertEqual((moshir.pk, str(moshir.avg_rating), moshir.rating_sum), (first.pk, '3.00', 30))
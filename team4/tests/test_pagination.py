@@ -0,0 +1,105 @@
+"""
+Tests for keyset pagination and counts of the team4 facility list
+"""
+from urllib.parse import urlencode
+
+from django.test import TestCase
+
+from team4.fields import Point
+from team4.models import Province, City, Category, Amenity, Facility, FacilityAmenity
+from team4.pagination import count_rows
+
+LIST_URL = '/team4/api/facilities/'
+SEARCH_URL = '/team4/api/facilities/search/'
+
+
+class FacilityPaginationTest(TestCase):
+    """تست صفحه‌بندی keyset لیست مکان‌ها"""
+
+    databases = {'default', 'team4'}
+
+    @classmethod
+    def setUpTestData(cls):
+        province = Province.objects.create(name_fa="گیلان", name_en="Gilan")
+        cls.city = City.objects.create(province=province, name_fa="رشت", name_en="Rasht", location=Point(49.58, 37.28))
+        cls.category = Category.objects.create(name_fa="هتل", name_en="Hotel")
+        wifi = Amenity.objects.create(name_fa="وای‌فای", name_en="WiFi")
+        parking = Amenity.objects.create(name_fa="پارکینگ", name_en="Parking")
+        for i in range(11):
+            facility = Facility.objects.create(
+                name_fa=f"هتل {i}", name_en=f"Hotel {i}", category=cls.category, city=cls.city, address="-",
+                # امتیازهای تکراری تا ترتیب به fac_id برسد
+                location=Point(49.58 + (i * 7 % 11) / 100, 37.28), avg_rating=[4.5, 3.0, 4.5][i % 3],
+                review_count=i % 2,
+            )
+            FacilityAmenity.objects.create(facility=facility, amenity=wifi)
+            FacilityAmenity.objects.create(facility=facility, amenity=parking)
+
+    def get(self, url, params=None, body=None):
+        if body is None:
+            return self.client.get(url, params)
+        if params:
+            url = f"{url}?{urlencode(params)}"
+        return self.client.post(url, body, content_type='application/json')
+
+    def walk(self, params, body=None):
+        ids, params = [], {**params, 'cursor': '', 'page_size': 4}
+        url = LIST_URL if body is None else SEARCH_URL
+        while url:
+            res = self.get(url, params, body)
+            self.assertEqual(res.status_code, 200)
+            self.assertIsNone(res.data['previous'])
+            ids.extend(item['fac_id'] for item in res.data['results'])
+            url, params = res.data['next'], None
+        return ids
+
+    def numbered(self, params, body=None):
+        res = self.get(LIST_URL if body is None else SEARCH_URL, {**params, 'page_size': 100}, body)
+        return [item['fac_id'] for item in res.data['results']]
+
+    def test_keyset_pages_match_numbered_order(self):
+        for sort in ('rating', 'review_count'):
+            ids = self.walk({'sort': sort})
+            self.assertEqual(len(ids), 11)
+            self.assertEqual(ids, self.numbered({'sort': sort}))
+
+        expected = Facility.objects.order_by('-avg_rating', '-review_count', '-fac_id').values_list('fac_id', flat=True)
+        self.assertEqual(self.walk({'sort': 'rating'}), list(expected))
+
+    def test_distance_sort_pages_in_sql(self):
+        ids = self.walk({'sort': 'distance'}, {'city': "رشت"})
+        distances = [Facility.objects.get(fac_id=fac_id).location.distance(self.city.location) for fac_id in ids]
+        self.assertEqual(len(ids), 11)
+        self.assertEqual(distances, sorted(distances))
+        self.assertEqual(ids, self.numbered({'sort': 'distance'}, {'city': "رشت"}))
+
+    def test_distance_sort_with_null_distances(self):
+        # بدون موقعیت مرکز شهر فاصله NULL است؛ این ردیف‌ها آخر می‌آیند و کرسر روی آن‌ها کار می‌کند
+        null_ids = list(Facility.objects.order_by('fac_id').values_list('fac_id', flat=True)[2:9])
+        Facility.objects.filter(fac_id__in=null_ids).update(distance_to_city_center_km=None)
+        ids = self.walk({'sort': 'distance'}, {'city': "رشت"})
+        self.assertEqual(len(ids), 11)
+        self.assertEqual(ids[4:], null_ids)
+        self.assertEqual(ids, self.numbered({'sort': 'distance'}, {'city': "رشت"}))
+
+    def test_counts(self):
+        res = self.client.get(LIST_URL, {'cursor': '', 'count': 'exact'})
+        self.assertEqual(res.data['count'], 11)
+
+        res = self.client.get(LIST_URL, {'count': 'approx'})
+        self.assertEqual((res.data['count'], res.data['count_is_approximate']), (11, True))
+        Facility.objects.create(
+            name_fa="هتل تازه", name_en="New Hotel", category=self.category, city=self.city,
+            address="-", location=Point(49.6, 37.3),
+        )
+        self.assertEqual(self.client.get(LIST_URL, {'count': 'approx'}).data['count'], 11)
+        self.assertEqual(self.client.get(LIST_URL).data['count'], 12)
+
+        # distinct() روی join امکانات: هر مکان یک بار شمرده می‌شود
+        joined = Facility.objects.filter(amenities__name_en__in=["WiFi", "Parking"]).distinct()
+        self.assertEqual(count_rows(joined), 11)
+
+    def test_invalid_or_foreign_cursor(self):
+        self.assertEqual(self.client.get(LIST_URL, {'cursor': 'not-a-cursor'}).status_code, 404)
+        cursor = self.client.get(LIST_URL, {'cursor': '', 'sort': 'rating', 'page_size': 2}).data['next_cursor']
+        self.assertEqual(self.client.get(LIST_URL, {'cursor': cursor, 'sort': 'review_count'}).status_code, 404)
@@ -0,0 +1,115 @@
+"""
+Tests for incremental facility rating aggregates
+"""
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase
+
+from team4.fields import Point
+from team4.models import Province, City, Category, Facility, Review
+from team4.services import ratings
+
+User = get_user_model()
+
+
+class FacilityRatingTest(TestCase):
+    """تست بروزرسانی افزایشی امتیاز مکان"""
+
+    databases = {'default', 'team4'}
+
+    @classmethod
+    def setUpClass(cls):
+        # Review.user references core_user, which lives in the default database. Give the team4
+        # test database its own copy so SQLite's foreign key checks accept review rows.
+        connection = connections['team4']
+        if User._meta.db_table not in connection.introspection.table_names():
+            with connection.schema_editor() as editor:
+                editor.create_model(User)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        province = Province.objects.create(name_fa="اصفهان", name_en="Isfahan")
+        city = City.objects.create(province=province, name_fa="اصفهان", name_en="Isfahan", location=Point(51.668, 32.654))
+        category = Category.objects.create(name_fa="هتل", name_en="Hotel")
+        cls.hotel, cls.other = [
+            Facility.objects.create(
+                name_fa=f"هتل {i}", name_en=f"Hotel {i}", category=category, city=city,
+                address="-", location=Point(51.668, 32.654),
+            )
+            for i in range(2)
+        ]
+
+    def review(self, rating, facility=None, approved=True):
+        user = User.objects.using('team4').create(email=f"reviewer{Review.objects.count()}@example.com")
+        return Review.objects.create(user=user, facility=facility or self.hotel, rating=rating, is_approved=approved)
+
+    def assertRating(self, facility, count, total, average):
+        facility.refresh_from_db()
+        self.assertEqual((facility.review_count, facility.rating_sum), (count, total))
+        self.assertEqual(facility.avg_rating, Decimal(average))
+
+    def test_create_edit_approve_move_delete(self):
+        first = self.review(5)
+        second = self.review(4)
+        self.review(1, approved=False)
+        self.assertRating(self.hotel, 2, 9, '4.50')
+
+        second.rating = 2
+        second.save()
+        self.assertRating(self.hotel, 2, 7, '3.50')
+
+        second.is_approved = False
+        second.save()
+        self.assertRating(self.hotel, 1, 5, '5.00')
+
+        second.is_approved = True
+        second.facility = self.other
+        second.save()
+        self.assertRating(self.hotel, 1, 5, '5.00')
+        self.assertRating(self.other, 1, 2, '2.00')
+
+        first.delete()
+        self.assertRating(self.hotel, 0, 0, '0.00')
+
+    def test_edit_is_constant_number_of_queries(self):
+        for rating in (3, 4, 5, 4):
+            self.review(rating)
+        review = Review.objects.get(facility=self.hotel, rating=5)
+        review.rating = 1
+        # savepoint, SELECT ... FOR UPDATE, UPDATE review, UPDATE facility, release savepoint
+        with self.assertNumQueries(5, using='team4'):
+            review.save()
+        self.assertRating(self.hotel, 4, 12, '3.00')
+
+    def test_stale_instances_shift_from_stored_row(self):
+        self.review(4)
+        review = self.review(5)
+        first, second = Review.objects.get(pk=review.pk), Review.objects.get(pk=review.pk)
+        first.rating = 3
+        first.save()
+        # second هنوز امتیاز 5 را دارد؛ تغییر باید نسبت به 3 ذخیره‌شده حساب شود
+        second.rating = 4
+        second.save()
+        self.assertRating(self.hotel, 2, 8, '4.00')
+        second.delete()
+        first.delete()
+        self.assertRating(self.hotel, 1, 4, '4.00')
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        self.review(4)
+        self.review(3)
+        Review.objects.filter(facility=self.hotel).update(rating=5)  # bypasses Review.save
+
+        drift = ratings.recalculate('team4', dry_run=True)
+        self.assertEqual(drift, [(self.hotel.fac_id, (2, 7, Decimal('3.50')), (2, 10, Decimal('5.00')))])
+
+        out = StringIO()
+        call_command('reconcile_facility_ratings', stdout=out)
+        self.assertIn('1 facilities drifted (fixed)', out.getvalue())
+        self.assertRating(self.hotel, 2, 10, '5.00')
+        self.assertEqual(ratings.recalculate('team4'), [])
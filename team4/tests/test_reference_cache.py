@@ -0,0 +1,71 @@
+"""
+Tests for the cached team4 reference endpoints (ETag/Last-Modified)
+"""
+from django.core.cache import caches
+from django.test import TestCase
+
+from team4.fields import Point
+from team4.models import Province, City, Category, Amenity, Village
+
+
+class ReferenceCacheTest(TestCase):
+    """تست کش نسخه‌دار و پاسخ 304 داده‌های مرجع"""
+
+    databases = {'default', 'team4'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.province = Province.objects.create(name_fa="فارس", name_en="Fars")
+        cls.city = City.objects.create(province=cls.province, name_fa="شیراز", name_en="Shiraz", location=Point(52.53, 29.59))
+        Village.objects.create(city=cls.city, name_fa="قلات", name_en="Ghalat", location=Point(52.4, 29.8))
+        cls.category = Category.objects.create(name_fa="هتل", name_en="Hotel")
+        Amenity.objects.create(name_fa="پارکینگ", name_en="Parking")
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_not_modified_until_saved(self):
+        res = self.client.get('/team4/api/categories/')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([c['name_en'] for c in res.json()], ["Hotel"])
+        etag, last_modified = res['ETag'], res['Last-Modified']
+
+        with self.assertNumQueries(0, using='team4'):
+            res = self.client.get('/team4/api/categories/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(self.client.get('/team4/api/categories/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        with self.assertNumQueries(0, using='team4'):
+            self.assertEqual(self.client.get('/team4/api/categories/').status_code, 200)
+
+        self.category.marker_color = 'red'
+        self.category.save()
+        res = self.client.get('/team4/api/categories/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(res.json()[0]['marker_color'], 'red')
+
+    def test_cities_amenities_and_detail(self):
+        res = self.client.get('/team4/api/cities/')
+        self.assertEqual(res.json()[0]['province']['name_en'], "Fars")
+        self.assertEqual(self.client.get('/team4/api/amenities/').json()[0]['name_en'], "Parking")
+        self.assertEqual(self.client.get(f'/team4/api/categories/{self.category.pk}/').json()['name_en'], "Hotel")
+        self.assertEqual(self.client.get('/team4/api/categories/999999/').status_code, 404)
+
+        # تغییر استان نسخهٔ شهرها را عوض می‌کند
+        etag = res['ETag']
+        self.province.name_fa = "استان فارس"
+        self.province.save()
+        res = self.client.get('/team4/api/cities/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((res.status_code, res.json()[0]['province']['name_fa']), (200, "استان فارس"))
+
+    def test_region_search(self):
+        res = self.client.get('/team4/api/regions/search/', {'query': "قلات"})
+        self.assertEqual(res.json()['regions'][0]['parent_region_name'], "شیراز")
+        self.assertEqual(self.client.get('/team4/api/regions/search/').status_code, 400)
+
+        etag = res['ETag']
+        res = self.client.get('/team4/api/regions/search/', {'query': "قلات"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+        Village.objects.create(city=self.city, name_fa="قلات نو", name_en="New Ghalat", location=Point(52.5, 29.8))
+        res = self.client.get('/team4/api/regions/search/', {'query': "قلات"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((res.status_code, res.json()['count']), (200, 2))
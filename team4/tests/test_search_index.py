@@ -0,0 +1,104 @@
+"""
+Tests for the team4 name search index
+"""
+from django.test import TestCase
+
+from team4.fields import Point
+from team4.models import Province, City, Village, Category, Facility
+from team4.services import search_index
+from team4.services.region_service import RegionService
+from team4.services.facility_service import FacilityService
+
+
+class NormalizeTest(TestCase):
+    """تست یکسان‌سازی متن فارسی"""
+
+    def test_arabic_letters_digits_and_diacritics(self):
+        self.assertEqual(search_index.normalize("كرمان"), search_index.normalize("کرمان"))
+        self.assertEqual(search_index.normalize("علي"), "علی")
+        self.assertEqual(search_index.normalize("مَشهَد"), "مشهد")
+        self.assertEqual(search_index.normalize("منطقه ۱۲"), "منطقه 12")
+        self.assertEqual(search_index.normalize("  Tehran-Pars "), "tehran pars")
+
+    def test_zwnj_and_spaces_are_ignored_when_matching(self):
+        index = search_index.NameIndex([(1, ("می‌خانه",), 1), (2, ("میدان",), 2)])
+        self.assertEqual(index.match("میخانه"), [1])
+        self.assertEqual(index.match("می خانه"), [1])
+        self.assertEqual(index.match("می‌خانه"), [1])
+
+    def test_ranking_and_short_queries(self):
+        index = search_index.NameIndex([
+            (1, ("باغ شیراز",), 'a'),
+            (2, ("شیرازه",), 'b'),
+            (3, ("شیراز",), 'c'),
+            (4, ("مشیرازان",), 'd'),
+        ])
+        self.assertEqual(index.search("شیراز"), ['c', 'b', 'a', 'd'])
+        self.assertEqual(index.search("شیراز", limit=2), ['c', 'b'])
+        # زیر سه حرف فقط پیشوند کلمه‌ها جستجو می‌شود
+        self.assertEqual(index.match("شی"), [2, 3, 1])
+        self.assertEqual(index.match(""), [])
+
+
+class SearchIndexTest(TestCase):
+    """تست جستجوی منطقه و مکان با ایندکس نام"""
+
+    databases = {'default', 'team4'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.province = Province.objects.create(name_fa="کرمان", name_en="Kerman")
+        cls.city = City.objects.create(
+            province=cls.province, name_fa="رفسنجان", name_en="Rafsanjan", location=Point(55.99, 30.40),
+        )
+        cls.other_city = City.objects.create(
+            province=cls.province, name_fa="بم", name_en="Bam", location=Point(58.35, 29.10),
+        )
+        cls.village = Village.objects.create(city=cls.city, name_fa="کشكوئیه", name_en="Koshkuiyeh")
+        category = Category.objects.create(name_fa="موزه", name_en="Museum")
+        cls.museum = Facility.objects.create(
+            name_fa="موزه‌ی ریاست جمهوری", name_en="Presidential Museum", category=category,
+            city=cls.city, address="-", location=Point(55.99, 30.40),
+        )
+        cls.citadel = Facility.objects.create(
+            name_fa="ارگ بم", name_en="Arg-e Bam", category=category,
+            city=cls.other_city, address="-", location=Point(58.35, 29.10),
+        )
+
+    def test_region_search_normalizes_query(self):
+        results = RegionService.search_regions("كرمان")
+        self.assertEqual(results, [{
+            'id': str(self.province.province_id),
+            'name': "کرمان",
+            'parent_region_id': None,
+            'parent_region_name': None,
+        }])
+
+        results = RegionService.search_regions("كشكوئيه", region_type='village')
+        self.assertEqual([r['id'] for r in results], [str(self.village.village_id)])
+        self.assertEqual(results[0]['parent_region_name'], "رفسنجان")
+
+    def test_region_filter_ids(self):
+        self.assertEqual(RegionService.matching_city_ids("rafsan", 'city'), [self.city.city_id])
+        self.assertEqual(RegionService.matching_city_ids("کشکوئیه", 'village'), [self.city.city_id])
+        self.assertCountEqual(
+            RegionService.matching_city_ids("کرمان", 'province'), [self.city.city_id, self.other_city.city_id],
+        )
+
+    def test_facility_name_and_city_filters(self):
+        self.assertEqual(search_index.get('facilities').match("موزه ی ریاست"), [self.museum.fac_id])
+        self.assertEqual(list(FacilityService.search_facilities(city_name="بم")), [self.citadel])
+
+    def test_save_and_delete_invalidate(self):
+        self.assertEqual(RegionService.search_regions("زرند"), [])
+        city = City.objects.create(
+            province=self.province, name_fa="زرند", name_en="Zarand", location=Point(56.56, 30.81),
+        )
+        self.assertEqual([r['id'] for r in RegionService.search_regions("زرند")], [str(city.city_id)])
+
+        city.name_fa = "زرند جدید"
+        city.save()
+        self.assertEqual(RegionService.search_regions("زرند")[0]['name'], "زرند جدید")
+
+        city.delete()
+        self.assertEqual(RegionService.search_regions("زرند"), [])
@@ -0,0 +1,67 @@
+"""
+Tests for the facility list serializers' query counts
+"""
+from django.test import TestCase
+
+from team4.fields import Point
+from team4.models import Province, City, Category, Amenity, Facility, FacilityAmenity, Pricing, Image
+from team4.serializers import FacilityListSerializer
+from team4.services.facility_service import FacilityService
+
+
+class FacilityListQueriesTest(TestCase):
+    """تست تعداد کوئری‌های لیست مکان‌ها"""
+
+    databases = {'default', 'team4'}
+
+    @classmethod
+    def setUpTestData(cls):
+        province = Province.objects.create(name_fa="تهران", name_en="Tehran")
+        city = City.objects.create(province=province, name_fa="تهران", name_en="Tehran", location=Point(51.389, 35.6892))
+        hotel = Category.objects.create(name_fa="هتل", name_en="Hotel")
+        wifi = Amenity.objects.create(name_fa="وای‌فای", name_en="WiFi")
+        cls.facilities = []
+        for i in range(12):
+            facility = Facility.objects.create(
+                name_fa=f"هتل {i}", name_en=f"Hotel {i}", category=hotel, city=city,
+                address="-", location=Point(51.389 + i / 1000, 35.6892),
+            )
+            FacilityAmenity.objects.create(facility=facility, amenity=wifi)
+            Pricing.objects.create(facility=facility, price_type='Daily', price=3_000_000 + i, status=True)
+            Pricing.objects.create(facility=facility, price_type='Daily', price=1_000_000 + i, status=False)
+            Pricing.objects.create(facility=facility, price_type='Daily', price=2_000_000 + i, status=True)
+            Image.objects.create(facility=facility, image_url=f"https://example.com/{i}/side.jpg")
+            Image.objects.create(facility=facility, image_url=f"https://example.com/{i}/main.jpg", is_primary=True)
+            cls.facilities.append(facility)
+
+    def test_list_queries_do_not_grow_with_page_size(self):
+        # facilities + category + city + province + amenities + pricing + images
+        with self.assertNumQueries(7, using='team4'):
+            data = FacilityListSerializer(Facility.objects.order_by('fac_id'), many=True).data
+        self.assertEqual(len(data), 12)
+        self.assertEqual(data[3]['primary_image'], "https://example.com/3/main.jpg")
+        self.assertEqual(data[3]['price_from'], {'type': 'exact', 'value': 2_000_003.0})
+        self.assertEqual(data[3]['amenities'][0]['name_en'], "WiFi")
+
+    def test_accessors_agree_with_and_without_prefetch(self):
+        plain = Facility.objects.get(pk=self.facilities[5].pk)
+        prefetched = Facility.objects.prefetch_related('images', 'pricing_set').get(pk=self.facilities[5].pk)
+        self.assertEqual(plain.get_primary_image(), prefetched.get_primary_image())
+        self.assertEqual(plain.get_min_price(), prefetched.get_min_price())
+
+    def test_compare_facilities_queries(self):
+        ids = [f.fac_id for f in self.facilities[:5]]
+        # facilities (with city, category) + amenities + pricing + images
+        with self.assertNumQueries(4, using='team4'):
+            result = FacilityService.compare_facilities(ids)
+        self.assertEqual(len(result['facilities']), 5)
+        self.assertEqual(result['comparison_matrix']['lowest_price'], ids[0])
+
+    def test_nearby_endpoint_queries_independent_of_hits(self):
+        params = {'lat': 35.6892, 'lng': 51.389, 'radius': 3000, 'page_size': 100}
+        # facilities (with city, province, category) + amenities + pricing + images
+        with self.assertNumQueries(4, using='team4'):
+            res = self.client.get('/team4/api/facilities/nearby/', params)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()['count'], 12)
+        self.assertIsNotNone(res.json()['results'][0]['place']['primary_image'])
@@ -0,0 +1,98 @@
+"""
+Tests for the facility grid index
+"""
+import random
+
+from django.test import TestCase
+
+from team4.fields import Distance, Point, point_from_wkb, point_to_wkb
+from team4.models import Province, City, Category, Facility
+from team4.services import spatial_index
+
+
+class SpatialIndexTest(TestCase):
+    """تست شاخص شبکه‌ای مکان‌ها"""
+
+    databases = {'default', 'team4'}
+
+    @classmethod
+    def setUpTestData(cls):
+        province = Province.objects.create(name_fa="تهران", name_en="Tehran")
+        cls.city = City.objects.create(
+            province=province, name_fa="تهران", name_en="Tehran", location=Point(51.389, 35.6892)
+        )
+        cls.hospital = Category.objects.create(name_fa="بیمارستان", name_en="Hospital", is_emergency=True)
+        cls.center = Point(51.389, 35.6892)
+        rng = random.Random(1404)
+        cls.facilities = [
+            Facility.objects.create(
+                name_fa=f"مکان {i}", name_en=f"Place {i}", category=cls.hospital, city=cls.city,
+                address="-", location=Point(51.389 + rng.uniform(-1, 1), 35.6892 + rng.uniform(-1, 1)),
+            )
+            for i in range(200)
+        ]
+
+    def brute_force(self, radius_km):
+        return sorted(
+            (f.fac_id for f in self.facilities if self.center.distance(f.location) <= radius_km),
+        )
+
+    def test_grid_cell_maintained_on_save(self):
+        facility = self.facilities[0]
+        self.assertEqual((facility.grid_row, facility.grid_col), spatial_index.cell_of(facility.latitude, facility.longitude))
+        facility.location = Point(59.6, 36.3)
+        facility.save(update_fields=['location'])
+        facility.refresh_from_db()
+        self.assertEqual((facility.grid_row, facility.grid_col), spatial_index.cell_of(36.3, 59.6))
+
+    def test_within_radius_matches_brute_force(self):
+        for radius_km in (3, 10, 25, 60):
+            hits = spatial_index.within_radius(Facility.objects.all(), self.center, radius_km)
+            self.assertEqual(sorted(f.fac_id for f, _ in hits), self.brute_force(radius_km))
+            distances = [d for _, d in hits]
+            self.assertEqual(distances, sorted(distances))
+
+        candidates = spatial_index.filter_cells(Facility.objects.all(), self.center, 10).count()
+        self.assertLess(candidates, len(self.facilities) / 4)
+
+    def test_within_km_lookup_and_distance(self):
+        for radius_km in (3, 25):
+            qs = Facility.objects.filter(
+                location__within_km=(self.center.longitude, self.center.latitude, radius_km)
+            ).annotate(distance_km=Distance('location', self.center)).order_by('distance_km')
+            self.assertEqual(sorted(f.fac_id for f in qs), self.brute_force(radius_km))
+            for facility in qs:
+                self.assertAlmostEqual(facility.distance_km, self.center.distance(facility.location), places=6)
+
+        self.assertEqual(
+            Facility.objects.filter(location__within_km=(self.center, 25)).count(), len(self.brute_force(25))
+        )
+
+    def test_location_round_trips_as_wkb(self):
+        point = point_from_wkb(point_to_wkb(51.389, 35.6892))
+        self.assertEqual((point.longitude, point.latitude), (51.389, 35.6892))
+        facility = Facility.objects.get(pk=self.facilities[1].pk)
+        self.assertAlmostEqual(facility.location.longitude, self.facilities[1].location.longitude, places=12)
+        self.assertAlmostEqual(facility.location.latitude, self.facilities[1].location.latitude, places=12)
+
+    def test_nearest(self):
+        expected = sorted(self.facilities, key=lambda f: self.center.distance(f.location))[:5]
+        hits = spatial_index.nearest(Facility.objects.all(), self.center, 5)
+        self.assertEqual([f.fac_id for f, _ in hits], [f.fac_id for f in expected])
+
+    def test_nearby_and_emergency_endpoints(self):
+        radius_km = 25
+        res = self.client.get(
+            '/team4/api/facilities/nearby/',
+            {'lat': self.center.latitude, 'lng': self.center.longitude, 'radius': radius_km * 1000, 'page_size': 500},
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()['count'], len(self.brute_force(radius_km)))
+
+        res = self.client.get(
+            '/team4/api/facilities/emergency/',
+            {'lat': self.center.latitude, 'lng': self.center.longitude, 'radius': radius_km, 'page': 2, 'page_size': 2},
+        )
+        self.assertEqual(res.status_code, 200)
+        distances = [item['distance_km'] for item in res.json()['results']]
+        self.assertEqual(distances, sorted(distances))
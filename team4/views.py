@@ -1,17 +1,20 @@
 from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404
-from django.db.models import Q
+from django.db.models import F, Q
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
-from rest_framework.views import APIView
-from rest_framework.pagination import PageNumberPagination
 from django.core.exceptions import ObjectDoesNotExist
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from .fields import Point
+import json
 import os
-import requests
+import httpx
 from dotenv import load_dotenv
 
+from core import http_client
 from core.auth import api_login_required
 from team4.models import Facility, Category, City, Amenity, Province, Village, RegionType, Favorite, Review
 from team4.serializers import (
@@ -24,20 +27,14 @@ from team4.serializers import (
 )
 from team4.services.facility_service import FacilityService
 from team4.services.region_service import RegionService
+from team4.services import search_index, spatial_index
+from team4.pagination import StandardResultsSetPagination
+from team4.reference_cache import ReferenceCacheMixin, cached_response
 
 TEAM_NAME = "team4"
 load_dotenv()
 
 
-# =====================================================
-# Pagination
-# =====================================================
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 100
-
-
 # =====================================================
 # ViewSets
 # =====================================================
@@ -98,33 +95,26 @@ class FacilityViewSet(viewsets.ModelViewSet):
         if not region_name:
             return queryset
         
-        if region_type == 'village':
-            return queryset.filter(
-                Q(village__name_fa__icontains=region_name) |
-                Q(village__name_en__icontains=region_name)
-            )
-        elif region_type == 'city':
-            return queryset.filter(
-                Q(city__name_fa__icontains=region_name) |
-                Q(city__name_en__icontains=region_name)
-            )
-        elif region_type == 'province':
-            return queryset.filter(
-                Q(city__province__name_fa__icontains=region_name) |
-                Q(city__province__name_en__icontains=region_name)
-            )
+        # نام منطقه با ایندکس نام (services/search_index) به شناسهٔ شهرها تبدیل می‌شود؛
+        # مکان‌ها فیلد روستا ندارند و فیلتر روستا روی شهر والد روستاهای منطبق می‌افتد.
+        if region_type in ('village', 'city', 'province'):
+            return queryset.filter(city_id__in=RegionService.matching_city_ids(region_name, region_type))
         return queryset
     
-    def _apply_sorting(self, queryset, sort_by, region_name=None):
-        """Apply sorting to queryset"""
+    def _apply_sorting(self, queryset, sort_by):
+        """
+        Apply sorting to queryset. fac_id breaks ties so that pages (numbered or keyset,
+        see team4/pagination) are stable. Distance is each facility's stored distance to
+        its city's center (services/city_distance), so every sort is an indexed ORDER BY;
+        facilities without one (no city location) come last.
+        """
         if sort_by == 'rating':
-            return queryset.order_by('-avg_rating', '-review_count')
+            return queryset.order_by('-avg_rating', '-review_count', '-fac_id')
         elif sort_by == 'review_count':
-            return queryset.order_by('-review_count')
-        elif sort_by == 'distance' and region_name:
-            sorted_facilities = FacilityService.sort_by_city_distance(queryset, region_name)
-            return sorted_facilities if sorted_facilities else queryset.order_by('-avg_rating')
-        return queryset.order_by('-avg_rating')
+            return queryset.order_by('-review_count', '-fac_id')
+        elif sort_by == 'distance':
+            return queryset.order_by(F('distance_to_city_center_km').asc(nulls_last=True), 'fac_id')
+        return queryset.order_by('-avg_rating', '-fac_id')
     
     def list(self, request):
         """
@@ -179,10 +169,7 @@ class FacilityViewSet(viewsets.ModelViewSet):
         
         # Apply name search filter
         if name_query:
-            facilities = facilities.filter(
-                Q(name_fa__icontains=name_query) |
-                Q(name_en__icontains=name_query)
-            )
+            facilities = facilities.filter(fac_id__in=search_index.get('facilities').match(name_query))
         
         # Apply region filter
         facilities = self._apply_region_filter(facilities, region_type, region_name)
@@ -220,20 +207,7 @@ class FacilityViewSet(viewsets.ModelViewSet):
             facilities = FacilityService.filter_facilities(facilities, filters)
         
         # Apply sorting
-        sorted_result = self._apply_sorting(facilities, sort_by, region_name)
-        
-        # Handle distance sorting special case
-        if sort_by == 'distance' and isinstance(sorted_result, list):
-            page = self.paginate_queryset([f['facility'] for f in sorted_result])
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
-            
-            serializer = self.get_serializer(
-                [f['facility'] for f in sorted_result],
-                many=True
-            )
-            return Response(serializer.data)
+        sorted_result = self._apply_sorting(facilities, sort_by)
         
         # Standard pagination
         page = self.paginate_queryset(sorted_result)
@@ -298,10 +272,7 @@ class FacilityViewSet(viewsets.ModelViewSet):
         
         # Apply name search filter
         if name_query:
-            facilities = facilities.filter(
-                Q(name_fa__icontains=name_query) |
-                Q(name_en__icontains=name_query)
-            )
+            facilities = facilities.filter(fac_id__in=search_index.get('facilities').match(name_query))
         
         # Apply region filter
         facilities = self._apply_region_filter(facilities, region_type, region_name)
@@ -340,20 +311,7 @@ class FacilityViewSet(viewsets.ModelViewSet):
             facilities = FacilityService.filter_facilities(facilities, filters)
         
         # Apply sorting
-        sorted_result = self._apply_sorting(facilities, sort_by, region_name)
-        
-        # Handle distance sorting special case
-        if sort_by == 'distance' and isinstance(sorted_result, list):
-            page = self.paginate_queryset([f['facility'] for f in sorted_result])
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
-            
-            serializer = self.get_serializer(
-                [f['facility'] for f in sorted_result],
-                many=True
-            )
-            return Response(serializer.data)
+        sorted_result = self._apply_sorting(facilities, sort_by)
         
         # Standard pagination
         page = self.paginate_queryset(sorted_result)
@@ -486,7 +444,7 @@ class FacilityViewSet(viewsets.ModelViewSet):
         center_point = Point(lng, lat)
         
         # Start with base queryset
-        facilities = self.queryset
+        facilities = self.queryset.select_related('city__province', 'category')
         
         # Filter by categories
         categories_param = request.query_params.get('categories')
@@ -503,24 +461,11 @@ class FacilityViewSet(viewsets.ModelViewSet):
             tier_list = [t.strip() for t in price_tiers_param.split(',')]
             facilities = facilities.filter(price_tier__in=tier_list)
         
-        # Calculate distances and filter by radius
-        nearby_places = []
-        radius_km = radius_meters / 1000.0
-        
-        for facility in facilities:
-            if facility.location:
-                try:
-                    distance_km = facility.calculate_distance_to(center_point)
-                    if distance_km and distance_km <= radius_km:
-                        nearby_places.append({
-                            'facility': facility,
-                            'distance_meters': distance_km * 1000  # Convert to meters
-                        })
-                except:
-                    continue
-        
-        # Sort by distance
-        nearby_places.sort(key=lambda x: x['distance_meters'])
+        # Only facilities in the grid cells around the circle are loaded, nearest first
+        nearby_places = [
+            {'facility': facility, 'distance_meters': distance_km * 1000}
+            for facility, distance_km in spatial_index.within_radius(facilities, center_point, radius_meters / 1000.0)
+        ]
         
         # Paginate
         page = self.paginate_queryset(nearby_places)
@@ -594,15 +539,12 @@ class FacilityViewSet(viewsets.ModelViewSet):
         When lat/lng provided, returns facilities sorted by distance.
         """
         # Filter emergency facilities
-        facilities = self.queryset.filter(category__is_emergency=True)
+        facilities = self.queryset.filter(category__is_emergency=True).select_related('city__province', 'category')
         
         # Filter by city
         city_name = request.query_params.get('city')
         if city_name:
-            facilities = facilities.filter(
-                Q(city__name_fa__icontains=city_name) |
-                Q(city__name_en__icontains=city_name)
-            )
+            facilities = facilities.filter(city_id__in=RegionService.matching_city_ids(city_name, 'city'))
         
         # Filter by geographic location
         lat = request.query_params.get('lat')
@@ -616,29 +558,22 @@ class FacilityViewSet(viewsets.ModelViewSet):
                 radius = float(radius)
                 
                 from .fields import Point
-                user_location = Point(lng, lat, srid=4326)
-                
-                # Calculate distance and filter
-                facilities_with_distance = []
-                for facility in facilities:
-                    distance = facility.calculate_distance_to(user_location)
-                    if distance and distance <= radius:
-                        facilities_with_distance.append({
-                            'facility': facility,
-                            'distance_km': round(distance, 2)
-                        })
+                user_location = Point(lng, lat)
                 
-                # Sort by distance
-                facilities_with_distance.sort(key=lambda x: x['distance_km'])
+                # Grid-cell candidates around the user, refined by exact distance, nearest first
+                facilities_with_distance = [
+                    {'facility': facility, 'distance_km': round(distance, 2)}
+                    for facility, distance in spatial_index.within_radius(facilities, user_location, radius)
+                ]
                 
                 # Pagination
-                page = self.paginate_queryset([f['facility'] for f in facilities_with_distance])
+                page = self.paginate_queryset(facilities_with_distance)
                 if page is not None:
                     # Add distance to serializer data
-                    serializer = self.get_serializer(page, many=True)
+                    serializer = self.get_serializer([f['facility'] for f in page], many=True)
                     data = serializer.data
                     for i, item in enumerate(data):
-                        item['distance_km'] = facilities_with_distance[i]['distance_km']
+                        item['distance_km'] = page[i]['distance_km']
                     return self.get_paginated_response(data)
                 
                 serializer = self.get_serializer(
@@ -675,7 +610,7 @@ class FacilityViewSet(viewsets.ModelViewSet):
         })
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(ReferenceCacheMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for browsing facility categories.
     
@@ -684,9 +619,46 @@ class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     - GET /api/categories/{id}/ → Retrieve category details
     
     Categories include hotels, restaurants, hospitals, museums, etc.
+    Responses are cached per data version, with ETag/Last-Modified (see reference_cache).
     """
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    reference_dataset = 'categories'
+
+    def get_queryset(self):
+        return FacilityService.get_all_categories()
+
+
+class CityViewSet(ReferenceCacheMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for browsing cities.
+    
+    Endpoints:
+    - GET /api/cities/     → List all cities with their province
+    - GET /api/cities/{id}/ → Retrieve city details
+    """
+    queryset = City.objects.all()
+    serializer_class = CitySerializer
+    reference_dataset = 'cities'
+
+    def get_queryset(self):
+        return FacilityService.get_all_cities()
+
+
+class AmenityViewSet(ReferenceCacheMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for browsing facility amenities.
+    
+    Endpoints:
+    - GET /api/amenities/     → List all amenities
+    - GET /api/amenities/{id}/ → Retrieve amenity details
+    """
+    queryset = Amenity.objects.all()
+    serializer_class = AmenitySerializer
+    reference_dataset = 'amenities'
+
+    def get_queryset(self):
+        return FacilityService.get_all_amenities()
 
 
 @api_login_required
@@ -712,6 +684,7 @@ def search_regions(request):
     - region_type: Filter by type - 'province', 'city', or 'village' (optional)
     
     Returns matching regions with their type and geographic information.
+    Responses carry ETag/Last-Modified of the region data version (see reference_cache).
     """
     query = request.query_params.get('query', '').strip()
     region_type = request.query_params.get('region_type', '').strip().lower()
@@ -731,16 +704,20 @@ def search_regions(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Search via Service
-    results = RegionService.search_regions(query, region_type or None)
-    
-    # Serialize results
-    serializer = RegionSearchResultSerializer(results, many=True)
+    def build():
+        # Search via Service
+        results = RegionService.search_regions(query, region_type or None)
+        
+        # Serialize results
+        serializer = RegionSearchResultSerializer(results, many=True)
+        
+        return {
+            'count': len(results),
+            'regions': serializer.data
+        }
     
-    return Response({
-        'count': len(results),
-        'regions': serializer.data
-    })
+    # Free-text queries: revalidated by ETag but not stored, so user input cannot grow the cache
+    return cached_response(request, 'regions', build)
 
 
 # =====================================================
@@ -769,6 +746,10 @@ class FavoriteViewSet(viewsets.ModelViewSet):
             'facility__category',
             'facility__city',
             'facility__city__province'
+        ).prefetch_related(
+            'facility__amenities',
+            'facility__pricing_set',
+            'facility__images'
         )
     
     def create(self, request):
@@ -995,16 +976,28 @@ class ReviewViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
        
-class RoutingView(APIView):
+@method_decorator(csrf_exempt, name='dispatch')
+class RoutingView(View):
     """
     API View to handle routing requests via an external Map Service.
+
+    Async: the map service call awaits the shared HTTP client (core.http_client), so under
+    ASGI a slow upstream stalls this request's coroutine instead of a whole worker, and a
+    failing one trips the shared Neshan circuit breaker.
     """
 
-    def post(self, request):
-        # Your logic remains exactly the same
-        serializer = RoutingRequestSerializer(data=request.data)
+    async def post(self, request):
+        if request.content_type == 'application/json':
+            try:
+                data = json.loads(request.body or b'{}')
+            except ValueError:
+                return JsonResponse({'detail': 'JSON parse error'}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            data = request.POST
+
+        serializer = RoutingRequestSerializer(data=data)
         if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            return _json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
         origin_point = serializer.validated_data['origin']
         dest_point = serializer.validated_data['destination']
@@ -1025,23 +1018,29 @@ class RoutingView(APIView):
         }
 
         try:
-            response = requests.get(service_url, headers={'Api-Key': api_key}, params=params, timeout=10)
-            result = response.json()
-
-            if response.status_code == 200:
-                result['internal_air_distance_km'] = round(origin_point.distance(dest_point), 3)
-                return Response(result, status=status.HTTP_200_OK)
-            
-            return Response(
-                {
-                    "detail": "خطا در دریافت اطلاعات از سرویس نقشه. لطفا ورودی‌ها را بررسی کنید.",
-                    "service_response": result
-                }, 
-                status=response.status_code
+            response = await http_client.aget(
+                service_url, upstream='neshan', headers={'Api-Key': api_key} if api_key else {},
+                params=params, timeout=10,
             )
-            
-        except requests.exceptions.RequestException:
-            return Response(
+            result = response.json()
+        except (httpx.HTTPError, ValueError):
+            return _json_response(
                 {"detail": "خطا در برقراری ارتباط با سرویس نقشه. لطفاً وضعیت اینترنت را بررسی کنید."}, 
                 status=status.HTTP_503_SERVICE_UNAVAILABLE
-            )
\ No newline at end of file
+            )
+
+        if response.status_code == 200:
+            result['internal_air_distance_km'] = round(origin_point.distance(dest_point), 3)
+            return _json_response(result, status=status.HTTP_200_OK)
+        
+        return _json_response(
+            {
+                "detail": "خطا در دریافت اطلاعات از سرویس نقشه. لطفا ورودی‌ها را بررسی کنید.",
+                "service_response": result
+            }, 
+            status=response.status_code
+        )
+
+
+def _json_response(data, status):
+    return JsonResponse(data, status=status, safe=False, json_dumps_params={'ensure_ascii': False})
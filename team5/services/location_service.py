@@ -2,11 +2,15 @@
 
 from __future__ import annotations
 
-import json
-import math
 from ipaddress import ip_address
-from urllib.error import URLError
-from urllib.request import urlopen
+
+import httpx
+import requests
+
+from core import geo, http_client
+
+GEOLOCATION_URL = "https://ipapi.co/{ip}/json/"
+GEOLOCATION_TIMEOUT = 1.5
 
 
 def get_client_ip(request, *, ip_override: str | None = None) -> str | None:
@@ -39,20 +43,34 @@ def resolve_client_city(
     - source: how city was resolved
     - geo: raw geolocation payload (if available)
     """
-    if client_ip:
-        geo = _geolocate_ip(client_ip)
-        if geo:
-            if geo.get("city"):
-                city = _match_city_name(cities, str(geo["city"]))
-                if city:
-                    return {"city": city, "source": "ip_city_name", "geo": geo}
-
-            latitude = _to_float(geo.get("latitude"))
-            longitude = _to_float(geo.get("longitude"))
-            if latitude is not None and longitude is not None:
-                city = _nearest_city_by_coordinates(cities, latitude=latitude, longitude=longitude)
-                if city:
-                    return {"city": city, "source": "ip_coordinates", "geo": geo}
+    geo = _geolocate_ip(client_ip) if client_ip else None
+    return _resolve_city(cities, geo, preferred_city_id)
+
+
+async def aresolve_client_city(
+    *,
+    cities: list[dict],
+    client_ip: str | None,
+    preferred_city_id: str | None = None,
+) -> dict | None:
+    """Async `resolve_client_city`: the geolocation lookup awaits the shared async HTTP client."""
+    geo = await _ageolocate_ip(client_ip) if client_ip else None
+    return _resolve_city(cities, geo, preferred_city_id)
+
+
+def _resolve_city(cities: list[dict], geo: dict | None, preferred_city_id: str | None) -> dict | None:
+    if geo:
+        if geo.get("city"):
+            city = _match_city_name(cities, str(geo["city"]))
+            if city:
+                return {"city": city, "source": "ip_city_name", "geo": geo}
+
+        latitude = _to_float(geo.get("latitude"))
+        longitude = _to_float(geo.get("longitude"))
+        if latitude is not None and longitude is not None:
+            city = _nearest_city_by_coordinates(cities, latitude=latitude, longitude=longitude)
+            if city:
+                return {"city": city, "source": "ip_coordinates", "geo": geo}
 
     if preferred_city_id:
         city = _match_city_id(cities, preferred_city_id)
@@ -62,6 +80,14 @@ def resolve_client_city(
     return None
 
 
+def _is_public_ip(client_ip: str) -> bool:
+    try:
+        parsed_ip = ip_address(client_ip)
+    except ValueError:
+        return False
+    return not (parsed_ip.is_private or parsed_ip.is_loopback or parsed_ip.is_unspecified)
+
+
 def _geolocate_ip(client_ip: str) -> dict | None:
     """
     Resolve IP to city/coordinates using a public endpoint.
@@ -70,20 +96,37 @@ def _geolocate_ip(client_ip: str) -> dict | None:
     - For private/local addresses, return None to avoid misleading results.
     - Keep timeout short to avoid slowing requests.
     """
+    if not _is_public_ip(client_ip):
+        return None
+
     try:
-        parsed_ip = ip_address(client_ip)
-        if parsed_ip.is_private or parsed_ip.is_loopback or parsed_ip.is_unspecified:
-            return None
-    except ValueError:
+        response = http_client.get(
+            GEOLOCATION_URL.format(ip=client_ip), upstream="ipapi", retries=0, timeout=GEOLOCATION_TIMEOUT
+        )
+        payload = response.json()
+    except (requests.RequestException, ValueError):
+        return None
+
+    return _parse_geolocation(payload)
+
+
+async def _ageolocate_ip(client_ip: str) -> dict | None:
+    """Async `_geolocate_ip` for the async nearest-recommendations view."""
+    if not _is_public_ip(client_ip):
         return None
 
-    url = f"https://ipapi.co/{client_ip}/json/"
     try:
-        with urlopen(url, timeout=1.5) as response:
-            payload = json.loads(response.read().decode("utf-8"))
-    except (URLError, TimeoutError, ValueError, json.JSONDecodeError):
+        response = await http_client.aget(
+            GEOLOCATION_URL.format(ip=client_ip), upstream="ipapi", retries=0, timeout=GEOLOCATION_TIMEOUT
+        )
+        payload = response.json()
+    except (httpx.HTTPError, ValueError):
         return None
 
+    return _parse_geolocation(payload)
+
+
+def _parse_geolocation(payload) -> dict | None:
     if not isinstance(payload, dict):
         return None
 
@@ -115,9 +158,9 @@ def _match_city_name(cities: list[dict], city_name: str) -> dict | None:
 
 
 def _nearest_city_by_coordinates(cities: list[dict], *, latitude: float, longitude: float) -> dict | None:
-    best_city: dict | None = None
-    best_distance_km: float | None = None
-
+    candidates: list[dict] = []
+    lats: list[float] = []
+    lons: list[float] = []
     for city in cities:
         coords = city.get("coordinates") or []
         if len(coords) != 2:
@@ -126,27 +169,13 @@ def _nearest_city_by_coordinates(cities: list[dict], *, latitude: float, longitu
         city_lon = _to_float(coords[1])
         if city_lat is None or city_lon is None:
             continue
-        distance = _haversine_km(latitude, longitude, city_lat, city_lon)
-        if best_distance_km is None or distance < best_distance_km:
-            best_distance_km = distance
-            best_city = city
-
-    return best_city
-
-
-def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    radius_km = 6371.0
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    delta_phi = math.radians(lat2 - lat1)
-    delta_lambda = math.radians(lon2 - lon1)
-
-    a = (
-        math.sin(delta_phi / 2.0) ** 2
-        + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2.0) ** 2
-    )
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    return radius_km * c
+        candidates.append(city)
+        lats.append(city_lat)
+        lons.append(city_lon)
+
+    if not candidates:
+        return None
+    return candidates[int(geo.distances_km(latitude, longitude, lats, lons).argmin())]
 
 
 def _to_float(value) -> float | None:
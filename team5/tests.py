@@ -165,6 +165,21 @@ class Team5RecommendationApiTests(TestCase):
         self.assertIn("items", payload)
         self.assertGreaterEqual(payload["count"], 2)
 
+    def test_registered_users_keyset_pages(self):
+        seen = []
+        cursor = None
+        while True:
+            url = "/team5/api/users/?limit=1" + (f"&cursor={cursor}" if cursor else "")
+            payload = self.client.get(url).json()
+            seen += [item["userId"] for item in payload["items"]]
+            cursor = payload["nextCursor"]
+            if not cursor:
+                break
+        everyone = self.client.get("/team5/api/users/").json()["items"]
+        self.assertEqual(seen, [item["userId"] for item in everyone])
+        self.assertEqual(len(set(seen)), len(seen))
+        self.assertEqual(self.client.get("/team5/api/users/?cursor=bogus").status_code, 400)
+
     def test_user_ratings_endpoint_from_db(self):
         res = self.client.get(f"/team5/api/users/{self.user_main.id}/ratings/")
         self.assertEqual(res.status_code, 200)
@@ -1,16 +1,26 @@
+import base64
+import binascii
+import uuid
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
 from django.http import JsonResponse
 from django.shortcuts import render
 from django.views.decorators.http import require_GET
 from django.contrib.auth import get_user_model
 
 from core.auth import api_login_required
+from core.decorators import async_require_GET
 from .services.contracts import DEFAULT_LIMIT
 from .services.db_provider import DatabaseProvider
-from .services.location_service import get_client_ip, resolve_client_city
+from .services.location_service import aresolve_client_city, get_client_ip
 from .services.recommendation_service import RecommendationService
 
 TEAM_NAME = "team5"
 User = get_user_model()
+USERS_PAGE_LIMIT = 100
+USERS_PAGE_MAX_LIMIT = 500
 provider = DatabaseProvider()
 recommendation_service = RecommendationService(provider)
 
@@ -55,15 +65,16 @@ def get_popular_recommendations(request):
     )
 
 
-@require_GET
-def get_nearest_recommendations(request):
+@async_require_GET
+async def get_nearest_recommendations(request):
     limit = _parse_limit(request)
     city_override = request.GET.get("cityId")
     ip_override = request.GET.get("ip")
 
+    # Async so a slow IP geolocation lookup only parks this coroutine under ASGI.
     client_ip = get_client_ip(request, ip_override=ip_override)
-    resolved = resolve_client_city(
-        cities=provider.get_cities(),
+    resolved = await aresolve_client_city(
+        cities=await sync_to_async(provider.get_cities)(),
         client_ip=client_ip,
         preferred_city_id=city_override,
     )
@@ -82,7 +93,7 @@ def get_nearest_recommendations(request):
         )
 
     city = resolved["city"]
-    items = recommendation_service.get_nearest_by_city(city_id=city["cityId"], limit=limit)
+    items = await sync_to_async(recommendation_service.get_nearest_by_city)(city_id=city["cityId"], limit=limit)
     return JsonResponse(
         {
             "kind": "nearest",
@@ -139,7 +150,23 @@ def get_user_interests(request, user_id: str):
 
 @require_GET
 def get_registered_users(request):
-    users = User.objects.filter(is_active=True).order_by("-date_joined")
+    """
+    Active users, newest first, one page at a time: pass the previous response's
+    `nextCursor` as `cursor` to continue (keyset pagination on date_joined, id).
+    `count` is the number of users on this page, not the total; `nextCursor` is null on
+    the last page.
+    """
+    limit = _parse_limit(request, default=USERS_PAGE_LIMIT, maximum=USERS_PAGE_MAX_LIMIT)
+    users = User.objects.filter(is_active=True).order_by("-date_joined", "-id")
+    cursor = request.GET.get("cursor")
+    if cursor:
+        try:
+            joined, last_id = _decode_user_cursor(cursor)
+        except ValueError:
+            return JsonResponse({"detail": "Invalid cursor"}, status=400)
+        users = users.filter(Q(date_joined__lt=joined) | Q(date_joined=joined, id__lt=last_id))
+    page = list(users.only("id", "email", "first_name", "last_name", "age", "date_joined")[: limit + 1])
+    next_cursor = _encode_user_cursor(page[limit - 1]) if len(page) > limit else None
     payload = [
         {
             "userId": str(user.id),
@@ -149,9 +176,22 @@ def get_registered_users(request):
             "age": user.age,
             "dateJoined": user.date_joined.isoformat(),
         }
-        for user in users
+        for user in page[:limit]
     ]
-    return JsonResponse({"count": len(payload), "items": payload})
+    return JsonResponse({"count": len(payload), "items": payload, "nextCursor": next_cursor})
+
+
+def _encode_user_cursor(user) -> str:
+    raw = f"{user.date_joined.isoformat()}|{user.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_user_cursor(cursor: str):
+    try:
+        joined, last_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(joined), uuid.UUID(last_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("invalid cursor") from exc
 
 
 @require_GET
@@ -160,12 +200,12 @@ def get_user_ratings(request, user_id: str):
     return JsonResponse({"userId": user_id, "count": len(ratings), "items": ratings})
 
 
-def _parse_limit(request) -> int:
+def _parse_limit(request, default: int = DEFAULT_LIMIT, maximum: int = 100) -> int:
     raw_limit = request.GET.get("limit")
     if raw_limit is None:
-        return DEFAULT_LIMIT
+        return default
     try:
         parsed = int(raw_limit)
     except ValueError:
-        return DEFAULT_LIMIT
-    return max(1, min(parsed, 100))
\ No newline at end of file
+        return default
+    return max(1, min(parsed, maximum))
\ No newline at end of file
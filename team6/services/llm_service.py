@@ -1,9 +1,10 @@
 import os
-import requests
 from typing import List
 import re
 from collections import Counter
 
+from core import http_client
+
 class FreeAIService:
     """سرویس تولید خلاصه و تگ با Hugging Face"""
     def __init__(self):
@@ -29,7 +30,7 @@ class FreeAIService:
             }
         }
         try:
-            response = requests.post(self.base_url, headers=headers, json=payload, timeout=30)
+            response = http_client.post(self.base_url, upstream="huggingface", headers=headers, json=payload, timeout=30)
             if response.status_code != 200:
                 print("HF Error:", response.text)
                 return None
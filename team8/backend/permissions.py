@@ -1,7 +1,8 @@
-import requests
 from rest_framework.permissions import BasePermission
 from django.conf import settings
 
+from .utils import http
+
 
 class IsAuthenticatedViaCookie(BasePermission):
     """Verify auth via Core service, populate request.user_data"""
@@ -14,7 +15,7 @@ class IsAuthenticatedViaCookie(BasePermission):
             return False
 
         try:
-            resp = requests.get(
+            resp = http.get(
                 f"{settings.CORE_BASE_URL}/api/auth/verify/",
                 cookies={"access_token": token},
                 timeout=2
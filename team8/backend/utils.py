@@ -1,7 +1,23 @@
+from http.cookiejar import DefaultCookiePolicy
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from rest_framework.views import exception_handler
 from django.conf import settings
 
+# Keep-alive pools shared by every call to Core and the AI service. This service is deployed on
+# its own (build context ./backend), so it keeps a local session rather than app404's core.http_client.
+# Only GETs are retried, twice, with backoff; cookies from responses are never stored.
+http = requests.Session()
+http.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+_adapter = HTTPAdapter(
+    pool_maxsize=10,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504), allowed_methods={"GET"}),
+)
+http.mount("http://", _adapter)
+http.mount("https://", _adapter)
+
 
 def custom_exception_handler(exc, context):
     """Clean error responses"""
@@ -14,7 +30,7 @@ def custom_exception_handler(exc, context):
 def call_ai_service(endpoint, data, timeout=10):
     """Call AI service endpoint"""
     try:
-        resp = requests.post(
+        resp = http.post(
             f"{settings.AI_SERVICE_URL}/{endpoint}",
             json=data,
             timeout=timeout
@@ -22,8 +38,25 @@ def call_ai_service(endpoint, data, timeout=10):
         return resp.json() if resp.status_code == 200 else None
     except Exception:
         return None
+
+
+def send_to_ai_service(endpoint, data, timeout=10):
+    """Call AI service endpoint (path may start with '/')"""
+    return call_ai_service(endpoint.lstrip("/"), data, timeout=timeout)
+
+
+def log_activity(user, action_type, target_id=None, metadata=None):
+    """
+    Record a user action
+
+    Args:
+        user: User instance
+        action_type: ActivityLog action type
+        target_id: Related object id
         metadata: Additional metadata dict
     """
+    from .models import ActivityLog
+
     try:
         ActivityLog.objects.create(
             user=user,
@@ -48,7 +81,7 @@ def verify_user_with_core(cookies):
     try:
         from .settings import CORE_BASE_URL
         
-        response = requests.get(
+        response = http.get(
             f"{CORE_BASE_URL}/api/auth/verify/",
             cookies=cookies,
             timeout=3
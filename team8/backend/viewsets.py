@@ -6,6 +6,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
 from django.db.models import Avg, Count, Q
 from django.utils import timezone
 
@@ -73,16 +76,14 @@ class PlaceViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Simple bounding box calculation (for better accuracy, use PostGIS)
-        lat_delta = radius / 111  # 1 degree lat ≈ 111km
-        lng_delta = radius / (111 * abs(float(lat)))
-        
+        # location is a geography column: PostGIS does the radius test on the sphere,
+        # using the spatial index to skip places outside the search area
+        center = Point(lng, lat, srid=4326)
         places = self.get_queryset().filter(
-            latitude__gte=lat - lat_delta,
-            latitude__lte=lat + lat_delta,
-            longitude__gte=lng - lng_delta,
-            longitude__lte=lng + lng_delta
-        )
+            location__dwithin=(center, D(km=radius))
+        ).annotate(
+            distance=Distance('location', center)
+        ).order_by('distance')
         
         serializer = self.get_serializer(places, many=True)
         return Response(serializer.data)